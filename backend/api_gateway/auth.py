@@ -0,0 +1,103 @@
+import hashlib
+import time
+from typing import Dict, Any
+
+from starlette.requests import Request
+
+from common.cache import TTLCache
+from common.config import (
+    GATEWAY_PRINCIPAL_CACHE_SIZE,
+    GATEWAY_PRINCIPAL_CACHE_TTL,
+    PRINCIPAL_HEADER_TTL_SECONDS,
+)
+from common.security.jwt import decode_token, TokenError
+from common.security.principal import sign_principal
+from common.security.revocation import revocations
+# Loads the `sql` revocation feed: the gateway checks every request against the auth service's table
+import services.auth.models
+
+# Claims forwarded to services in the signed principal header
+PRINCIPAL_CLAIMS = ("sub", "email", "role", "tier", "active", "jti")
+
+# Invalid tokens are remembered briefly so garbage tokens are not re-decoded
+NEGATIVE_TTL = 5.0
+
+
+class Principal:
+    __slots__ = ("claims", "header")
+
+    def __init__(self, claims: Dict[str, Any], header: str):
+        self.claims = claims
+        self.header = header
+
+    @property
+    def user_id(self) -> str | None:
+        return self.claims.get("sub")
+
+    @property
+    def is_admin(self) -> bool:
+        return (self.claims.get("role") or "").lower() == "admin"
+
+
+class PrincipalResolver:
+    """Verifies bearer tokens once and caches the result by SHA-256 digest."""
+
+    def __init__(self, maxsize: int = GATEWAY_PRINCIPAL_CACHE_SIZE, ttl: float = GATEWAY_PRINCIPAL_CACHE_TTL):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def _lookup(self, authorization: str | None) -> tuple[bytes | None, Principal | None]:
+        """The cached or freshly verified principal, before the revocation check."""
+        if not authorization or not authorization.startswith("Bearer "):
+            return None, None
+        token = authorization.split(" ", 1)[1]
+        key = hashlib.sha256(token.encode()).digest()
+        cached = self.cache.get(key)
+        if cached is not None:
+            return key, cached or None
+        try:
+            data = decode_token(token)
+        except TokenError:
+            self.cache.set(key, False, ttl=NEGATIVE_TTL)
+            return key, None
+        claims = {k: data[k] for k in PRINCIPAL_CLAIMS if k in data}
+        # The signed header outlives the cache entry, so a cached header is always fresh
+        ttl = min(self.cache.ttl, PRINCIPAL_HEADER_TTL_SECONDS)
+        if data.get("exp"):
+            ttl = min(ttl, data["exp"] - time.time())
+        principal = Principal(claims, sign_principal(claims, token, PRINCIPAL_HEADER_TTL_SECONDS, data.get("exp")))
+        if ttl > 0:
+            self.cache.set(key, principal, ttl=ttl)
+        return key, principal
+
+    def _revoked(self, key: bytes) -> None:
+        self.cache.set(key, False, ttl=NEGATIVE_TTL)
+        return None
+
+    # Revocation is re-checked on every call: the token may have been revoked since it was cached
+
+    def resolve(self, authorization: str | None) -> Principal | None:
+        key, principal = self._lookup(authorization)
+        if principal is not None and revocations.is_revoked(principal.claims.get("jti")):
+            return self._revoked(key)
+        return principal
+
+    async def resolve_async(self, authorization: str | None) -> Principal | None:
+        """resolve() for the event loop: a revocation filter hit is confirmed in a worker thread."""
+        key, principal = self._lookup(authorization)
+        if principal is not None and await revocations.is_revoked_async(principal.claims.get("jti")):
+            return self._revoked(key)
+        return principal
+
+
+class PrincipalMiddleware:
+    """Resolves the caller once per request, before anything that needs it, without blocking the event loop."""
+
+    def __init__(self, app, resolver: PrincipalResolver):
+        self.app = app
+        self.resolver = resolver
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            request = Request(scope)
+            request.state.principal = await self.resolver.resolve_async(request.headers.get("authorization"))
+        await self.app(scope, receive, send)
@@ -0,0 +1,70 @@
+from fastapi.responses import JSONResponse
+
+from common.config import GATEWAY_MAX_BODY_BYTES
+
+
+def too_large_response(limit: int) -> JSONResponse:
+    return JSONResponse(status_code=413, content={"detail": f"Request body exceeds {limit} bytes"}, headers={"Connection": "close"})
+
+
+class BodyLimitMiddleware:
+    """Rejects request bodies over the configured size.
+
+    A declared Content-Length over the limit is refused before the route runs.
+    Chunked or under-declared bodies are counted as they are received, so a
+    streamed upload is cut off as soon as it crosses the limit rather than
+    after it has been read.
+
+    Crossing the limit looks like a client disconnect to whatever is reading
+    the body: a route's body stream, or StreamingResponse watching receive()
+    from its own task group. Whatever the route does with that, a 413 is
+    sent if the response has not started; otherwise the response is left to
+    end where it was cut off.
+    """
+
+    def __init__(self, app, max_bytes: int = GATEWAY_MAX_BODY_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+        declared = next((v for k, v in scope["headers"] if k == b"content-length"), None)
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            await too_large_response(self.max_bytes)(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def counting_receive():
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                if exceeded:
+                    return
+                started = True
+            elif not started:
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, tracking_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not started:
+            await too_large_response(self.max_bytes)(scope, receive, send)
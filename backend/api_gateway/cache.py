@@ -0,0 +1,135 @@
+import hashlib
+import re
+import time
+from typing import List, NamedTuple
+
+from fastapi import Request, Response
+
+from common.cache import TTLCache
+from common.config import GATEWAY_CACHE_ENABLED, GATEWAY_CACHE_MAX_ENTRIES
+from .auth import Principal
+
+
+class CacheRule(NamedTuple):
+    pattern: "re.Pattern[str]"
+    ttl: int
+    per_user: bool
+
+
+def rule(path_regex: str, ttl: int, per_user: bool = False) -> CacheRule:
+    return CacheRule(re.compile(path_regex), ttl, per_user)
+
+
+# Gateway paths whose GET responses rarely change. per_user rules are keyed by the caller.
+CACHE_RULES: List[CacheRule] = [
+    rule(r"^/api/v1/subscriptions?/tiers(/[^/]+)?$", ttl=300),
+    rule(r"^/api/v1/i18n/languages$", ttl=300),
+    rule(r"^/api/v1/i18n/default-language$", ttl=300),
+    rule(r"^/api/v1/forms/templates$", ttl=60, per_user=True),
+]
+
+
+class CachedResponse(NamedTuple):
+    status_code: int
+    body: bytes
+    media_type: str
+    etag: str
+    stored_at: float
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+class ResponseCache:
+    def __init__(self, rules: List[CacheRule] = CACHE_RULES, maxsize: int = GATEWAY_CACHE_MAX_ENTRIES, enabled: bool = GATEWAY_CACHE_ENABLED):
+        self.rules = rules
+        self.enabled = enabled
+        self.entries = TTLCache(maxsize=maxsize)
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def rule_for(self, request: Request) -> CacheRule | None:
+        if not self.enabled or request.method != "GET":
+            return None
+        path = request.url.path
+        for r in self.rules:
+            if r.pattern.match(path):
+                return r
+        return None
+
+    def key_for(self, request: Request, rule: CacheRule, principal: Principal | None) -> tuple | None:
+        user = None
+        if rule.per_user:
+            if principal is None or principal.user_id is None:
+                return None
+            user = principal.user_id
+        lang = request.headers.get("accept-language", "")
+        return (request.url.path, str(request.query_params), lang, user)
+
+    def get(self, key: tuple) -> CachedResponse | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def storable(self, cache_control: str | None) -> bool:
+        """False when the upstream forbids a shared cache from keeping its response."""
+        directives = {d.split("=", 1)[0].strip().lower() for d in (cache_control or "").split(",")}
+        return not directives & {"no-store", "private"}
+
+    def store(self, key: tuple, rule: CacheRule, status_code: int, body: bytes, media_type: str) -> CachedResponse:
+        entry = CachedResponse(status_code, body, media_type, make_etag(body), time.time())
+        self.entries.set(key, entry, ttl=rule.ttl)
+        return entry
+
+    def purge(self, prefix: str | None = None) -> int:
+        if not prefix:
+            count = len(self.entries)
+            self.entries.clear()
+            return count
+        count = 0
+        for key in self.entries.keys():
+            if key[0].startswith(prefix):
+                self.entries.pop(key)
+                count += 1
+        return count
+
+    def respond(self, request: Request, entry: CachedResponse, rule: CacheRule, hit: bool) -> Response:
+        scope = "private" if rule.per_user else "public"
+        remaining = max(0, round(rule.ttl - (time.time() - entry.stored_at)))
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": f"{scope}, max-age={remaining}",
+            "X-Cache": "HIT" if hit else "MISS",
+        }
+        if rule.per_user:
+            headers["Vary"] = "Authorization, Accept-Language"
+        else:
+            headers["Vary"] = "Accept-Language"
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, status_code=entry.status_code, media_type=entry.media_type, headers=headers)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,89 @@
+import asyncio
+import hashlib
+import re
+from typing import Awaitable, Callable, Dict, List, NamedTuple, TypeVar
+
+from fastapi import Request
+
+from common.db.mysql import READ_STICKY_COOKIE
+
+T = TypeVar("T")
+
+
+class CoalesceRule(NamedTuple):
+    pattern: "re.Pattern[str]"
+    per_user: bool
+
+
+def rule(path_regex: str, per_user: bool = False) -> CoalesceRule:
+    return CoalesceRule(re.compile(path_regex), per_user)
+
+
+# Opt-in gateway paths whose concurrent identical GETs share one upstream call.
+# per_user rules only collapse requests carrying the same Authorization header.
+# A client that just wrote (READ_STICKY_COOKIE) must read after its write, so it
+# never joins a call that may have started before it.
+COALESCE_RULES: List[CoalesceRule] = [
+    rule(r"^/api/v1/subscriptions/tiers(/[^/]+)?$"),
+    rule(r"^/api/v1/i18n/languages$"),
+    rule(r"^/api/v1/i18n/default-language$"),
+    rule(r"^/api/v1/forms/templates$", per_user=True),
+    rule(r"^/api/v1/subscriptions/my-subscription$", per_user=True),
+    rule(r"^/api/v1/users/dashboard-stats$", per_user=True),
+    rule(r"^/api/v1/notifications/my-notifications$", per_user=True),
+]
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key.
+
+    The first caller starts the call as a separate task; later callers await
+    the same task. The task is shielded, so a disconnecting client does not
+    cancel the call for everyone else.
+    """
+
+    def __init__(self, rules: List[CoalesceRule] = COALESCE_RULES):
+        self.rules = rules
+        self._inflight: Dict[tuple, "asyncio.Task"] = {}
+        self.leaders = 0
+        self.collapsed = 0
+
+    def key_for(self, request: Request) -> tuple | None:
+        if request.method != "GET" or READ_STICKY_COOKIE in request.cookies:
+            return None
+        path = request.url.path
+        for r in self.rules:
+            if r.pattern.match(path):
+                auth = None
+                if r.per_user:
+                    header = request.headers.get("authorization")
+                    if not header:
+                        return None
+                    auth = hashlib.sha256(header.encode()).digest()
+                return (path, str(request.query_params), request.headers.get("accept-language", ""), auth)
+        return None
+
+    async def do(self, key: tuple, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.leaders += 1
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: tuple, task: "asyncio.Task"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved when every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "upstream_calls": self.leaders,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._inflight),
+        }
@@ -0,0 +1,213 @@
+import time
+import zlib
+from typing import Dict, List, Tuple
+
+from common.config import (
+    GATEWAY_COMPRESSION_ENABLED,
+    GATEWAY_COMPRESSION_MIN_BYTES,
+    GATEWAY_GZIP_LEVEL,
+    GATEWAY_BROTLI_QUALITY,
+)
+from .metrics import MAX_TRACKED_ROUTES, route_key
+
+# brotli is optional; without it only gzip is offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Types that are already compressed or not worth the CPU
+INCOMPRESSIBLE_TYPES = ("image/", "video/", "audio/", "application/pdf", "application/zip", "application/gzip", "application/octet-stream")
+
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    encodings = {}
+    for part in value.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[coding.strip().lower()] = q
+    return encodings
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """Pick br or gzip from Accept-Encoding; None means send the body as is."""
+    if not accept_encoding:
+        return None
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    offers = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for coding in offers:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class Compressor:
+    """Incremental encoder; every chunk is flushed so streamed bodies are not held back."""
+
+    def __init__(self, coding: str):
+        self.coding = coding
+        if coding == "br":
+            self._br = brotli.Compressor(quality=GATEWAY_BROTLI_QUALITY)
+        else:
+            self._gz = zlib.compressobj(GATEWAY_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.coding == "br":
+            out = self._br.process(data)
+            return out + (self._br.finish() if final else self._br.flush())
+        out = self._gz.compress(data)
+        return out + self._gz.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionStats:
+    def __init__(self):
+        self.routes: Dict[str, Dict[str, float]] = {}
+        self.skipped = 0
+
+    def record(self, path: str, coding: str, bytes_in: int, bytes_out: int, cpu_seconds: float):
+        key = route_key(path)
+        if key not in self.routes and len(self.routes) >= MAX_TRACKED_ROUTES:
+            key = "other"
+        entry = self.routes.setdefault(key, {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_ms": 0.0, "gzip": 0, "br": 0})
+        entry["responses"] += 1
+        entry[coding] += 1
+        entry["bytes_in"] += bytes_in
+        entry["bytes_out"] += bytes_out
+        entry["cpu_ms"] += cpu_seconds * 1000
+
+    def snapshot(self) -> dict:
+        routes = {}
+        for key, entry in self.routes.items():
+            routes[key] = dict(
+                entry,
+                cpu_ms=round(entry["cpu_ms"], 3),
+                bytes_saved=entry["bytes_in"] - entry["bytes_out"],
+                ratio=round(entry["bytes_out"] / entry["bytes_in"], 3) if entry["bytes_in"] else None,
+            )
+        return {"brotli_available": brotli is not None, "skipped": self.skipped, "routes": routes}
+
+
+class CompressionMiddleware:
+    """Negotiates gzip/brotli response encoding from Accept-Encoding.
+
+    Bodies smaller than the threshold, non-compressible types and responses
+    the upstream already encoded pass through untouched. Streamed bodies are
+    buffered only until the threshold is reached, then compressed chunk by
+    chunk.
+    """
+
+    def __init__(self, app, stats: CompressionStats, minimum_size: int = GATEWAY_COMPRESSION_MIN_BYTES, enabled: bool = GATEWAY_COMPRESSION_ENABLED):
+        self.app = app
+        self.stats = stats
+        self.minimum_size = minimum_size
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        accept = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"accept-encoding"), None)
+        coding = negotiate(accept)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressingResponder(self, scope["path"], coding, send)
+        await self.app(scope, receive, responder)
+
+
+class CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, path: str, coding: str, send):
+        self.middleware = middleware
+        self.path = path
+        self.coding = coding
+        self.send = send
+        self.start = None
+        self.buffer: List[bytes] = []
+        self.buffered = 0
+        self.compressor: Compressor | None = None
+        self.passthrough = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu = 0.0
+
+    def eligible(self, start) -> bool:
+        if start["status"] < 200 or start["status"] in (204, 304):
+            return False
+        headers = {k.lower(): v for k, v in start.get("headers", [])}
+        if b"content-encoding" in headers:
+            return False
+        content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+        return not content_type.startswith(INCOMPRESSIBLE_TYPES)
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            if not self.eligible(message):
+                self.passthrough = True
+                self.middleware.stats.skipped += 1
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.compressor is None:
+            self.buffer.append(body)
+            self.buffered += len(body)
+            if more and self.buffered < self.middleware.minimum_size:
+                return
+            body, self.buffer = b"".join(self.buffer), []
+            if not more and len(body) < self.middleware.minimum_size:
+                # Small body: send it as is
+                self.passthrough = True
+                self.middleware.stats.skipped += 1
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+            self.compressor = Compressor(self.coding)
+            await self.send(self.compressed_start())
+
+        started = time.thread_time()
+        out = self.compressor.compress(body, final=not more)
+        self.cpu += time.thread_time() - started
+        self.bytes_in += len(body)
+        self.bytes_out += len(out)
+        await self.send({"type": "http.response.body", "body": out, "more_body": more})
+        if not more:
+            self.middleware.stats.record(self.path, self.coding, self.bytes_in, self.bytes_out, self.cpu)
+
+    def compressed_start(self) -> dict:
+        headers: List[Tuple[bytes, bytes]] = []
+        vary = None
+        for key, value in self.start.get("headers", []):
+            name = key.lower()
+            if name == b"content-length":
+                continue
+            if name == b"vary":
+                vary = value
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                # The encoded body differs byte-for-byte from the one the tag describes
+                value = b"W/" + value
+            headers.append((key, value))
+        if vary is None:
+            vary = b"Accept-Encoding"
+        elif b"accept-encoding" not in vary.lower():
+            vary = vary + b", Accept-Encoding"
+        headers.append((b"vary", vary))
+        headers.append((b"content-encoding", self.coding.encode()))
+        return dict(self.start, headers=headers)
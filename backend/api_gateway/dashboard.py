@@ -0,0 +1,92 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, NamedTuple
+
+from common.cache import TTLCache
+from common.config import (
+    USER_SERVICE_URL,
+    SUBSCRIPTION_SERVICE_URL,
+    NOTIFICATION_SERVICE_URL,
+    REPORT_SERVICE_URL,
+    AFFILIATE_SERVICE_URL,
+    GATEWAY_DASHBOARD_DEADLINE,
+    GATEWAY_DASHBOARD_CACHE_TTL,
+)
+
+
+# How many recent notifications to include alongside the unread count
+LATEST_NOTIFICATIONS = 5
+
+
+class Source(NamedTuple):
+    base_url: str
+    path: str
+    deadline: float
+    # Statuses that mean "nothing to show" rather than a failed source
+    empty_statuses: tuple = ()
+
+
+# Upstream service paths (not gateway paths) fetched for the advisor dashboard
+SOURCES: Dict[str, Source] = {
+    "profile": Source(USER_SERVICE_URL, "api/v1/users/profile", GATEWAY_DASHBOARD_DEADLINE),
+    "subscription": Source(SUBSCRIPTION_SERVICE_URL, "api/v1/subscription/report-limits", GATEWAY_DASHBOARD_DEADLINE),
+    # Only the latest few are fetched; the service counts the unread ones
+    "notifications": Source(NOTIFICATION_SERVICE_URL, f"api/v1/notifications/my-notifications?limit={LATEST_NOTIFICATIONS}", GATEWAY_DASHBOARD_DEADLINE),
+    "reports": Source(REPORT_SERVICE_URL, "api/v1/reports/statistics", GATEWAY_DASHBOARD_DEADLINE),
+    # Advisors without an approved affiliate profile get 403 here
+    "affiliate": Source(AFFILIATE_SERVICE_URL, "api/v1/affiliates/dashboard", GATEWAY_DASHBOARD_DEADLINE, empty_statuses=(403, 404)),
+}
+
+def summarize_notifications(body: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "unread": body.get("unread_count", 0),
+        "latest": body.get("notifications", []),
+    }
+
+
+SHAPERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "notifications": summarize_notifications,
+}
+
+Fetch = Callable[[Source], Awaitable[Any]]
+
+
+class DashboardAggregator:
+    """Fans out to every source concurrently and keeps whatever arrives before its deadline."""
+
+    def __init__(self, sources: Dict[str, Source] = SOURCES, cache_ttl: float = GATEWAY_DASHBOARD_CACHE_TTL):
+        self.sources = sources
+        self.cache = TTLCache(maxsize=10000, ttl=cache_ttl)
+
+    async def _one(self, name: str, source: Source, fetch: Fetch):
+        try:
+            resp = await asyncio.wait_for(fetch(source), timeout=source.deadline)
+        except Exception:
+            return name, False, None
+        if resp.status_code in source.empty_statuses:
+            return name, True, None
+        if resp.status_code != 200:
+            return name, False, None
+        try:
+            body = resp.json()
+        except ValueError:
+            return name, False, None
+        shaper = SHAPERS.get(name)
+        return name, True, shaper(body) if shaper else body
+
+    async def build(self, user_id: str, fetch: Fetch) -> Dict[str, Any]:
+        cached = self.cache.get(user_id)
+        if cached is not None:
+            return cached
+        results = await asyncio.gather(*(self._one(name, source, fetch) for name, source in self.sources.items()))
+        dashboard: Dict[str, Any] = {}
+        missing = []
+        for name, ok, value in results:
+            dashboard[name] = value
+            if not ok:
+                missing.append(name)
+        dashboard["partial"] = bool(missing)
+        dashboard["missing"] = missing
+        # Only complete dashboards are cached; a partial one is retried on the next load
+        if not missing:
+            self.cache.set(user_id, dashboard)
+        return dashboard
@@ -1,6 +1,10 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Depends, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 import httpx
 
 from common.config import (
@@ -17,9 +21,97 @@ from common.config import (
     STORAGE_SERVICE_URL,
     I18N_SERVICE_URL,
     PRO_SERVICE_URL,
+    GATEWAY_BATCH_MAX_ITEMS,
 )
+from common.db.mysql import get_session
+from common.security.principal import PRINCIPAL_HEADER
+from common.security.users import load_user
+from .auth import PrincipalMiddleware, PrincipalResolver, Principal
+from .bodylimit import BodyLimitMiddleware
+from .cache import ResponseCache
+from .coalesce import SingleFlight
+from .compression import CompressionMiddleware, CompressionStats
+from .dashboard import DashboardAggregator, Source
+from .metrics import MetricsMiddleware, metrics
+from .ratelimit import INTERNAL_SCOPE_KEY, AdmissionMiddleware, LoadMonitor, RateLimiter, admission_stats
+from .resilience import UpstreamUnavailable
+from .schemas import BatchRequest, BatchItemResult, BatchResponse
+from .upstreams import InProcessResponse, UpstreamRegistry, service_scope
 
-app = FastAPI(title="API Gateway", version="1.0.0")
+# Long-lived keep-alive clients, one pool per upstream service
+upstreams = UpstreamRegistry()
+# Bearer tokens are verified once here; services receive a signed principal
+principals = PrincipalResolver()
+# Cached GET responses for rarely-changing routes (see cache.CACHE_RULES)
+response_cache = ResponseCache()
+# Concurrent identical GETs on opt-in routes share one upstream call
+inflight = SingleFlight()
+# Advisor dashboard assembled from several services in parallel
+dashboards = DashboardAggregator()
+# Per-user/IP token buckets and lag-based load shedding
+rate_limiter = RateLimiter()
+load_monitor = LoadMonitor()
+# gzip/brotli savings and CPU cost per route
+compression_stats = CompressionStats()
+
+
+def get_principal(request: Request) -> Principal | None:
+    if not hasattr(request.state, "principal"):
+        request.state.principal = principals.resolve(request.headers.get("authorization"))
+    return request.state.principal
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await upstreams.start()
+    load_monitor.start()
+    try:
+        yield
+    finally:
+        await load_monitor.stop()
+        await internal.aclose()
+        await upstreams.close()
+
+
+app = FastAPI(title="API Gateway", version="1.0.0", lifespan=lifespan)
+
+# Carries the issuing request's client address to a sub-request; only read by
+# internal_entry, so a value sent from outside the gateway is never trusted
+INTERNAL_CLIENT_HEADER = "x-gateway-client"
+
+
+async def internal_entry(scope, receive, send):
+    """Gateway entry for sub-requests: the caller's address is restored and admission is skipped."""
+    key = INTERNAL_CLIENT_HEADER.encode()
+    client = next((v.decode() for k, v in scope["headers"] if k == key), None)
+    scope = dict(scope, headers=[(k, v) for k, v in scope["headers"] if k != key])
+    scope[INTERNAL_SCOPE_KEY] = True
+    if client:
+        scope["client"] = (client, 0)
+    await app(scope, receive, send)
+
+# In-process client for sub-requests that go back through the gateway's own routes
+# (identity encoding: compressing a body only to decode it again in-process is wasted CPU)
+internal = httpx.AsyncClient(
+    transport=httpx.ASGITransport(app=internal_entry, raise_app_exceptions=False),
+    base_url="http://gateway",
+    headers={"accept-encoding": "identity"},
+)
+
+# Headers a sub-request inherits from the request that issued it
+INHERITED_HEADERS = ("authorization", "accept-language", "x-forwarded-for", "cookie")
+
+# Oversized uploads are refused before (or while) they are forwarded
+app.add_middleware(BodyLimitMiddleware)
+
+# Compression wraps the routes, including streamed pass-through bodies
+app.add_middleware(CompressionMiddleware, stats=compression_stats)
+
+# Admission control runs inside CORS so rejections still carry CORS headers
+app.add_middleware(AdmissionMiddleware, limiter=rate_limiter, monitor=load_monitor, resolve_principal=get_principal)
+
+# The caller is resolved up front so routes and admission never block on a revocation lookup
+app.add_middleware(PrincipalMiddleware, resolver=principals)
 
 # Add CORS middleware
 app.add_middleware(
@@ -37,24 +129,248 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so Server-Timing and the route histograms cover every layer
+app.add_middleware(MetricsMiddleware)
+
 @app.get("/health")
 async def health():
     return {"status": "ok", "gateway": True}
 
-async def proxy(request: Request, target_base: str, path: str):
-    url = f"{target_base}/{path}"
-    method = request.method
+def component_samples():
+    """Counters and gauges of the gateway components, sampled on each scrape."""
+    cache = response_cache.stats()
+    coalescing = inflight.stats()
+    admission = admission_stats(rate_limiter, load_monitor)
+    compression = compression_stats.snapshot()
+    upstream_stats = upstreams.stats()
+    breaker_states = {"closed": 0, "half_open": 1, "open": 2}
+    return [
+        ("gateway_cache_requests_total", "counter", "Response cache lookups by result.",
+         [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"]), ({"result": "not_modified"}, cache["not_modified"])]),
+        ("gateway_cache_entries", "gauge", "Entries in the response cache.", [({}, cache["entries"])]),
+        ("gateway_coalesced_requests_total", "counter", "GETs served by another request's in-flight upstream call.", [({}, coalescing["collapsed"])]),
+        ("gateway_admission_total", "counter", "Admission decisions.",
+         [({"result": "allowed"}, admission["allowed"]), ({"result": "limited"}, admission["limited"]), ({"result": "shed"}, admission["shed"])]),
+        ("gateway_event_loop_lag_seconds", "gauge", "Smoothed event-loop lag.", [({}, admission["loop_lag_ms"] / 1000)]),
+        ("gateway_compression_bytes_total", "counter", "Response bytes before and after compression, by route.",
+         [({"route": route, "stage": stage}, entry[f"bytes_{stage}"]) for route, entry in compression["routes"].items() for stage in ("in", "out")]),
+        ("gateway_compression_cpu_seconds_total", "counter", "Encoder CPU time by route.",
+         [({"route": route}, entry["cpu_ms"] / 1000) for route, entry in compression["routes"].items()]),
+        ("gateway_upstream_breaker_state", "gauge", "Circuit breaker state (0 closed, 1 half-open, 2 open).",
+         [({"upstream": name}, breaker_states.get(stats["breaker"], 0)) for name, stats in upstream_stats.items()]),
+        ("gateway_upstream_in_flight", "gauge", "Upstream calls in flight.",
+         [({"upstream": name}, stats["in_flight"]) for name, stats in upstream_stats.items()]),
+        ("gateway_upstream_rejected_total", "counter", "Calls rejected by the upstream bulkhead.",
+         [({"upstream": name}, stats["rejected"]) for name, stats in upstream_stats.items()]),
+    ]
+
+metrics.add_collector(component_samples)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Upstream response headers preserved by streaming pass-through
+PASSTHROUGH_HEADERS = {
+    "content-type",
+    "content-disposition",
+    "content-length",
+    "content-encoding",
+    "cache-control",
+    "etag",
+    "last-modified",
+}
+# The same for a body httpx has already decoded
+DECODED_PASSTHROUGH_HEADERS = PASSTHROUGH_HEADERS - {"content-length", "content-encoding"}
+
+def upstream_headers(request: Request) -> dict:
     headers = dict(request.headers)
     headers.pop("host", None)
-    async with httpx.AsyncClient() as client:
-        content = await request.body()
-        resp = await client.request(method, url, headers=headers, content=content, params=request.query_params)
-        return JSONResponse(status_code=resp.status_code, content=resp.json() if resp.headers.get("content-type", "").startswith("application/json") else {"raw": resp.text})
+    # Never forward a principal header supplied by the client
+    headers.pop(PRINCIPAL_HEADER.lower(), None)
+    principal = get_principal(request)
+    if principal:
+        headers[PRINCIPAL_HEADER] = principal.header
+    # Services limit some anonymous endpoints per client address
+    if request.client:
+        prior = headers.get("x-forwarded-for")
+        headers["x-forwarded-for"] = f"{prior}, {request.client.host}" if prior else request.client.host
+    return headers
+
+def forward_cookies(upstream_resp: httpx.Response, response):
+    # Services set cookies too (e.g. the database read-your-writes marker); there may be several
+    for value in upstream_resp.headers.get_list("set-cookie"):
+        response.headers.append("set-cookie", value)
+    return response
+
+def request_content(request: Request):
+    """Request body to forward, streamed as it arrives so uploads never sit in gateway memory."""
+    if request.headers.get("content-length", "0") == "0" and "transfer-encoding" not in request.headers:
+        return None
+    return request.stream()
+
+async def proxy(request: Request, target_base: str, path: str, stream: bool = False):
+    upstream = upstreams.get(target_base)
+    method = request.method
+    headers = upstream_headers(request)
+    rule = None if stream else response_cache.rule_for(request)
+    cache_key = response_cache.key_for(request, rule, get_principal(request)) if rule else None
+    if cache_key is not None:
+        entry = response_cache.get(cache_key)
+        if entry is not None:
+            return response_cache.respond(request, entry, rule, hit=True)
+    coalesce_key = None if stream else inflight.key_for(request)
+    if upstream.app is not None and cache_key is None and coalesce_key is None:
+        # Mounted in-process: both bodies stream straight between the client and the service
+        return InProcessResponse(upstream, service_scope(request.scope, path, headers))
+    if stream:
+        return await stream_proxy(request, upstream, path, headers)
+    content = request_content(request)
+
+    def send():
+        return upstream.call(lambda base: upstream.client.request(method, f"{base}/{path}", headers=headers, content=content, params=request.query_params))
+
+    resp = await (inflight.do(coalesce_key, send) if coalesce_key is not None else send())
+    if cache_key is not None and resp.status_code == 200 and response_cache.storable(resp.headers.get("cache-control")):
+        entry = response_cache.store(cache_key, rule, resp.status_code, resp.content, resp.headers.get("content-type", "application/json"))
+        return response_cache.respond(request, entry, rule, hit=False)
+    # The body is passed on as the service sent it, only decoded from its transfer encoding
+    headers = {k: v for k, v in resp.headers.items() if k.lower() in DECODED_PASSTHROUGH_HEADERS}
+    response = Response(content=resp.content, status_code=resp.status_code, headers=headers)
+    # A coalesced response is shared by several clients; cookies meant for one are not copied to all
+    return response if coalesce_key is not None else forward_cookies(resp, response)
+
+async def stream_proxy(request: Request, upstream, path: str, headers: dict):
+    # Forward request and response bodies chunk by chunk without decoding them
+    content = request_content(request)
+
+    async def send(base: str):
+        upstream_request = upstream.client.build_request(request.method, f"{base}/{path}", headers=headers, content=content, params=request.query_params)
+        return await upstream.client.send(upstream_request, stream=True)
+
+    resp = await upstream.call(send)
+    if content is not None:
+        # An upstream may answer before reading the whole upload; reading the rest
+        # here runs it past the body limit before the response starts, so an
+        # oversized upload still gets its 413
+        try:
+            async for _ in content:
+                pass
+        except BaseException:
+            await resp.aclose()
+            raise
+    passthrough = {k: v for k, v in resp.headers.items() if k.lower() in PASSTHROUGH_HEADERS}
+    return forward_cookies(resp, StreamingResponse(
+        resp.aiter_raw(),
+        status_code=resp.status_code,
+        headers=passthrough,
+        background=BackgroundTask(resp.aclose),
+    ))
+
+# Upstream failures: fail fast instead of surfacing a 500
+
+@app.exception_handler(UpstreamUnavailable)
+async def upstream_unavailable_handler(request: Request, exc: UpstreamUnavailable):
+    return JSONResponse(status_code=503, content={"detail": exc.reason}, headers={"Retry-After": str(int(exc.retry_after))})
+
+@app.exception_handler(httpx.TimeoutException)
+async def upstream_timeout_handler(request: Request, exc: httpx.TimeoutException):
+    return JSONResponse(status_code=504, content={"detail": "Upstream timeout"})
+
+@app.exception_handler(httpx.TransportError)
+async def upstream_error_handler(request: Request, exc: httpx.TransportError):
+    return JSONResponse(status_code=502, content={"detail": "Upstream unavailable"})
+
+# Sub-request dispatch (batch and aggregation endpoints)
+
+async def dispatch(request: Request, method: str, path: str, headers: dict | None = None, body=None) -> httpx.Response:
+    sub_headers = {k: v for k, v in request.headers.items() if k in INHERITED_HEADERS}
+    sub_headers.update({k.lower(): v for k, v in (headers or {}).items()})
+    sub_headers.pop(INTERNAL_CLIENT_HEADER, None)
+    if request.client:
+        sub_headers[INTERNAL_CLIENT_HEADER] = request.client.host
+    return await internal.request(method, path, headers=sub_headers, json=body)
+
+def response_body(resp: httpx.Response):
+    if resp.headers.get("content-type", "").startswith("application/json"):
+        try:
+            return resp.json()
+        except ValueError:
+            pass
+    return resp.text
+
+@app.post("/api/v1/batch", response_model=BatchResponse)
+async def batch(payload: BatchRequest, request: Request):
+    if len(payload.requests) > GATEWAY_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {GATEWAY_BATCH_MAX_ITEMS} requests per batch")
+
+    async def run(item) -> BatchItemResult:
+        if item.path.split("?", 1)[0].rstrip("/") == "/api/v1/batch":
+            return BatchItemResult(id=item.id, status=400, body={"detail": "Nested batch not allowed"})
+        try:
+            resp = await dispatch(request, item.method, item.path, item.headers, item.body)
+        except Exception:
+            return BatchItemResult(id=item.id, status=502, body={"detail": "Sub-request failed"})
+        return BatchItemResult(id=item.id, status=resp.status_code, body=response_body(resp))
+
+    results = await asyncio.gather(*(run(item) for item in payload.requests))
+    return BatchResponse(responses=list(results))
+
+@app.get("/api/v1/dashboard")
+async def dashboard(request: Request):
+    principal = get_principal(request)
+    if principal is None or principal.user_id is None:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    headers = upstream_headers(request)
+
+    async def fetch(source: Source) -> httpx.Response:
+        upstream = upstreams.get(source.base_url)
+        return await upstream.call(lambda base: upstream.client.get(f"{base}/{source.path}", headers=headers))
+
+    return await dashboards.build(principal.user_id, fetch)
+
+# Gateway administration
+
+def require_admin(request: Request, db: Session = Depends(get_session)) -> Principal:
+    principal = get_principal(request)
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    # The token's role claim outlives a demotion; the users row is authoritative
+    try:
+        user = load_user(db, int(principal.user_id))
+    except (TypeError, ValueError):
+        user = None
+    if user is None or not user.active:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    if (user.role or "").lower() != "admin":
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return principal
+
+@app.post("/api/v1/gateway/cache/purge")
+async def purge_cache(prefix: str | None = None, admin: Principal = Depends(require_admin)):
+    return {"purged": response_cache.purge(prefix)}
+
+@app.get("/api/v1/gateway/cache/stats")
+async def cache_stats(admin: Principal = Depends(require_admin)):
+    return response_cache.stats()
+
+@app.get("/api/v1/gateway/stats")
+async def gateway_stats(admin: Principal = Depends(require_admin)):
+    return {
+        "cache": response_cache.stats(),
+        "coalescing": inflight.stats(),
+        "upstreams": upstreams.stats(),
+        "admission": admission_stats(rate_limiter, load_monitor),
+        "compression": compression_stats.snapshot(),
+    }
+
+# Auth routes whose request and response bodies are streamed (bulk uploads, per-row results)
+STREAMED_AUTH_PATHS = {"admin/bulk-register"}
 
 @app.api_route("/api/v1/auth/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
 async def proxy_auth(path: str, request: Request):
     # Forward to service's /auth/... endpoints
-    return await proxy(request, AUTH_SERVICE_URL, f"api/v1/auth/{path}")
+    return await proxy(request, AUTH_SERVICE_URL, f"api/v1/auth/{path}", stream=path in STREAMED_AUTH_PATHS)
 
 @app.api_route("/api/v1/users/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
 async def proxy_users(path: str, request: Request):
@@ -73,7 +389,8 @@ async def proxy_subscriptions(path: str, request: Request):
 
 @app.api_route("/api/v1/payments/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
 async def proxy_payments(path: str, request: Request):
-    return await proxy(request, PAYMENT_SERVICE_URL, f"api/v1/{path}")
+    # Streamed so invoice PDFs pass through untouched
+    return await proxy(request, PAYMENT_SERVICE_URL, f"api/v1/{path}", stream=True)
 
 @app.api_route("/api/v1/calculate/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
 async def proxy_calculate(path: str, request: Request):
@@ -81,7 +398,8 @@ async def proxy_calculate(path: str, request: Request):
 
 @app.api_route("/api/v1/reports/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
 async def proxy_reports(path: str, request: Request):
-    return await proxy(request, REPORT_SERVICE_URL, f"api/v1/{path}")
+    # Streamed so report PDF downloads pass through untouched
+    return await proxy(request, REPORT_SERVICE_URL, f"api/v1/{path}", stream=True)
 
 # Newly added proxies for remaining services
 @app.api_route("/api/v1/forms/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
@@ -119,7 +437,8 @@ async def proxy_notifications(path: str, request: Request):
 
 @app.api_route("/api/v1/storage/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
 async def proxy_storage(path: str, request: Request):
-    return await proxy(request, STORAGE_SERVICE_URL, f"api/v1/{path}")
+    # Streamed: file uploads and downloads
+    return await proxy(request, STORAGE_SERVICE_URL, f"api/v1/{path}", stream=True)
 
 @app.api_route("/api/v1/i18n/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
 async def proxy_i18n(path: str, request: Request):
@@ -0,0 +1,235 @@
+import re
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import httpx
+
+# Latency buckets in seconds (Prometheus `le` bounds)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Path segments that identify a resource rather than a route (ids, uuids, hashes)
+ID_SEGMENT = re.compile(r"^\d+$|^(?=.*\d)[0-9a-f-]{8,}$|^[A-Za-z]+[_-]\d[\w-]*$", re.IGNORECASE)
+
+# Distinct route labels kept per metric; further routes are reported as "other"
+MAX_TRACKED_ROUTES = 500
+
+Labels = Tuple[Tuple[str, str], ...]
+# (name, type, help, [(labels, value)]) produced by a collector at scrape time
+Sample = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+@lru_cache(maxsize=4096)
+def route_key(path: str) -> str:
+    return "/".join(":id" if ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+class Histogram:
+    """Fixed-bucket histogram.
+
+    Observations happen on the event loop thread only, so plain list and float
+    updates need no lock; a scrape may see a sample mid-update, which Prometheus
+    tolerates.
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.help: Dict[str, str] = {}
+        self.collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def histogram(self, name: str, help: str):
+        self.histograms.setdefault(name, {})
+        self.help[name] = help
+
+    def observe(self, name: str, value: float, **labels: str):
+        series = self.histograms[name]
+        # Call sites pass labels in a fixed order, so no sort is needed
+        key = tuple(labels.items())
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = Histogram()
+        hist.observe(value)
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """Register a callable sampled on every scrape (component counters and gauges)."""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name, series in self.histograms.items():
+            lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in list(series.items()):
+                labels = dict(key)
+                cumulative = 0
+                for bound, count in zip(hist.bounds + (float("inf"),), hist.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{format_labels(dict(labels, le=le))} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {hist.sum}")
+                lines.append(f"{name}_count{format_labels(labels)} {hist.count}")
+        for collector in self.collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{format_labels(labels)} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+metrics = MetricsRegistry()
+metrics.histogram("gateway_request_duration_seconds", "Time from request receipt to the end of the response body, by route.")
+metrics.histogram("gateway_upstream_duration_seconds", "Time spent in upstream calls (until response headers for streamed routes).")
+metrics.histogram("gateway_upstream_connect_seconds", "TCP connect time for new upstream connections.")
+metrics.histogram("gateway_upstream_ttfb_seconds", "Time from sending an upstream request to its response headers.")
+metrics.histogram("gateway_upstream_body_seconds", "Time to read an upstream response body after its headers.")
+
+
+class Timings:
+    """Per-request timing accumulator, summarized in the Server-Timing header."""
+
+    __slots__ = ("started", "upstream", "connect", "ttfb", "body")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.upstream = 0.0
+        self.connect = 0.0
+        self.ttfb = 0.0
+        self.body = 0.0
+
+    def server_timing(self) -> str:
+        parts = [f"gw;dur={(time.perf_counter() - self.started) * 1000:.1f}"]
+        if self.upstream:
+            parts.append(f"upstream;dur={self.upstream * 1000:.1f}")
+        if self.connect:
+            parts.append(f"connect;dur={self.connect * 1000:.1f}")
+        if self.ttfb:
+            parts.append(f"ttfb;dur={self.ttfb * 1000:.1f}")
+        if self.body:
+            parts.append(f"body;dur={self.body * 1000:.1f}")
+        return ", ".join(parts)
+
+
+current_timings: ContextVar[Timings | None] = ContextVar("gateway_timings", default=None)
+
+
+class UpstreamTrace:
+    """httpx trace callback recording connect, time-to-first-byte and body time."""
+
+    __slots__ = ("upstream", "timings", "sent", "connect_started", "headers_at")
+
+    def __init__(self, upstream: str, timings: Timings | None):
+        self.upstream = upstream
+        self.timings = timings
+        self.sent = time.perf_counter()
+        self.connect_started = None
+        self.headers_at = None
+
+    async def __call__(self, event: str, info: dict):
+        now = time.perf_counter()
+        if event == "connection.connect_tcp.started":
+            self.connect_started = now
+        elif event == "connection.connect_tcp.complete" and self.connect_started is not None:
+            elapsed = now - self.connect_started
+            metrics.observe("gateway_upstream_connect_seconds", elapsed, upstream=self.upstream)
+            if self.timings:
+                self.timings.connect = max(self.timings.connect, elapsed)
+        elif event.endswith("send_request_headers.started"):
+            self.sent = now
+        elif event.endswith("receive_response_headers.complete"):
+            self.headers_at = now
+            metrics.observe("gateway_upstream_ttfb_seconds", now - self.sent, upstream=self.upstream)
+            if self.timings:
+                self.timings.ttfb += now - self.sent
+        elif event.endswith("receive_response_body.complete") and self.headers_at is not None:
+            metrics.observe("gateway_upstream_body_seconds", now - self.headers_at, upstream=self.upstream)
+            if self.timings:
+                self.timings.body += now - self.headers_at
+
+
+def trace_hook(upstream: str):
+    """httpx request event hook attaching an UpstreamTrace to each outgoing request."""
+
+    async def hook(request: httpx.Request):
+        request.extensions["trace"] = UpstreamTrace(upstream, current_timings.get())
+
+    return hook
+
+
+def observe_upstream(upstream: str, started: float):
+    elapsed = time.perf_counter() - started
+    metrics.observe("gateway_upstream_duration_seconds", elapsed, upstream=upstream)
+    timings = current_timings.get()
+    if timings:
+        timings.upstream += elapsed
+
+
+class MetricsMiddleware:
+    """Times every request, adds Server-Timing and records the per-route histogram."""
+
+    def __init__(self, app, registry: MetricsRegistry = metrics, exclude: Tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.registry = registry
+        self.exclude = exclude
+        self.routes: set = set()
+
+    def label_for(self, path: str) -> str:
+        route = route_key(path)
+        if route not in self.routes:
+            if len(self.routes) >= MAX_TRACKED_ROUTES:
+                return "other"
+            self.routes.add(route)
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+        timings = Timings()
+        token = current_timings.set(timings)
+        status = 500
+
+        async def timed_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing().encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            current_timings.reset(token)
+            self.registry.observe(
+                "gateway_request_duration_seconds",
+                time.perf_counter() - timings.started,
+                route=self.label_for(scope["path"]),
+                method=scope["method"],
+                status=f"{status // 100}xx",
+            )
@@ -0,0 +1,36 @@
+"""Single-process deployment: the gateway and every service app in one ASGI process.
+
+    uvicorn api_gateway.monolith:app --host 0.0.0.0 --port 8000
+
+Gateway routes, path rewriting, caching and resilience policies are unchanged.
+Proxied requests are handed to the imported service apps at the ASGI level
+instead of over a loopback HTTP hop, so uploads and downloads stream through
+unbuffered; cached routes and aggregation reach them through an in-process
+ASGI transport. Each service can still be run on its own with
+`uvicorn services.<name>.main:app`.
+"""
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from fastapi import FastAPI
+
+from .main import app, upstreams
+from .upstreams import load_service_apps
+
+services = load_service_apps()
+for name, service_app in services.items():
+    upstreams.mount(name, service_app)
+
+gateway_lifespan = app.router.lifespan_context
+
+
+@asynccontextmanager
+async def lifespan(gateway: FastAPI):
+    # Services start before the gateway opens its clients and stop after it closes them
+    async with AsyncExitStack() as stack:
+        for service_app in services.values():
+            await stack.enter_async_context(service_app.router.lifespan_context(service_app))
+        await stack.enter_async_context(gateway_lifespan(gateway))
+        yield
+
+
+app.router.lifespan_context = lifespan
@@ -0,0 +1,156 @@
+import asyncio
+import math
+import re
+import time
+from typing import Callable, Dict, List, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from common.config import (
+    GATEWAY_RATE_LIMIT_ENABLED,
+    GATEWAY_RATE_LIMIT_BACKEND,
+    GATEWAY_SHED_LAG_MS,
+)
+from common.ratelimit import BucketStore, load_bucket_store
+from .auth import Principal
+
+# (requests per second, burst) by JWT tier claim; anonymous callers are keyed by IP
+TIER_LIMITS: Dict[str, Tuple[float, float]] = {
+    "anonymous": (5, 20),
+    "free": (5, 30),
+    "starter": (10, 60),
+    "starter+": (10, 60),
+    "specialist": (15, 90),
+    "specialist+": (15, 90),
+    "pro": (30, 150),
+    "enterprise": (100, 500),
+}
+
+# Route priority for load shedding; the first matching rule wins
+LOW, NORMAL, CRITICAL = 0, 1, 2
+PRIORITY_RULES: List[Tuple["re.Pattern[str]", int]] = [
+    (re.compile(r"^/health$"), CRITICAL),
+    (re.compile(r"^/api/v1/auth/"), CRITICAL),
+    (re.compile(r"^/api/v1/payments/(verify|webhook)"), CRITICAL),
+    (re.compile(r"analytics|statistics|/search|activity-log|/history|/queue"), LOW),
+    (re.compile(r"^/api/v1/(dashboard|batch)$"), LOW),
+]
+
+# Gateway-owned endpoints that are never rate limited
+EXEMPT_PATHS = {"/health", "/metrics"}
+
+# Scope flag on sub-requests the gateway sends to itself (batch items); the
+# request that issued them has already been admitted
+INTERNAL_SCOPE_KEY = "gateway.internal"
+
+
+def priority_for(path: str) -> int:
+    for pattern, priority in PRIORITY_RULES:
+        if pattern.search(path):
+            return priority
+    return NORMAL
+
+
+class LoadMonitor:
+    """Tracks event-loop lag, i.e. how long ready work waits before it runs."""
+
+    def __init__(self, interval: float = 0.05, threshold_ms: float = GATEWAY_SHED_LAG_MS):
+        self.interval = interval
+        self.threshold = threshold_ms / 1000.0
+        self.lag = 0.0
+        self.shed = 0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            sample = max(0.0, time.monotonic() - start - self.interval)
+            self.lag = 0.8 * self.lag + 0.2 * sample
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def should_shed(self, priority: int) -> bool:
+        if not self.threshold or priority >= CRITICAL:
+            return False
+        # Low-priority routes go first; normal routes only under twice the lag
+        limit = self.threshold if priority == LOW else self.threshold * 2
+        return self.lag > limit
+
+
+class RateLimiter:
+    def __init__(self, store: BucketStore | None = None, enabled: bool = GATEWAY_RATE_LIMIT_ENABLED):
+        self.store = store or load_bucket_store(GATEWAY_RATE_LIMIT_BACKEND)
+        self.enabled = enabled
+        self.allowed = 0
+        self.limited = 0
+
+    def bucket_for(self, request: Request, principal: Principal | None) -> Tuple[str, float, float]:
+        if principal is not None and principal.user_id is not None:
+            tier = (principal.claims.get("tier") or "free").lower()
+            rate, burst = TIER_LIMITS.get(tier, TIER_LIMITS["free"])
+            return f"user:{principal.user_id}", rate, burst
+        rate, burst = TIER_LIMITS["anonymous"]
+        host = request.client.host if request.client else "unknown"
+        return f"ip:{host}", rate, burst
+
+    async def check(self, request: Request, principal: Principal | None) -> JSONResponse | None:
+        key, rate, burst = self.bucket_for(request, principal)
+        allowed, _, retry_after = await self.store.take(key, rate, burst)
+        if allowed:
+            self.allowed += 1
+            return None
+        self.limited += 1
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Rate limit exceeded"},
+            headers={"Retry-After": str(max(1, math.ceil(retry_after))), "X-RateLimit-Limit": f"{rate:g}/s"},
+        )
+
+
+def admission_stats(limiter: RateLimiter, monitor: LoadMonitor) -> dict:
+    return {
+        "allowed": limiter.allowed,
+        "limited": limiter.limited,
+        "shed": monitor.shed,
+        "loop_lag_ms": round(monitor.lag * 1000, 2),
+    }
+
+
+class AdmissionMiddleware:
+    """Sheds load under event-loop lag, then applies the caller's rate limit."""
+
+    def __init__(self, app, limiter: RateLimiter, monitor: LoadMonitor, resolve_principal: Callable[[Request], Principal | None]):
+        self.app = app
+        self.limiter = limiter
+        self.monitor = monitor
+        self.resolve_principal = resolve_principal
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS or scope.get(INTERNAL_SCOPE_KEY):
+            await self.app(scope, receive, send)
+            return
+        if self.monitor.should_shed(priority_for(scope["path"])):
+            self.monitor.shed += 1
+            response = JSONResponse(status_code=503, content={"detail": "Gateway overloaded"}, headers={"Retry-After": "1"})
+            await response(scope, receive, send)
+            return
+        if self.limiter.enabled:
+            request = Request(scope)
+            response = await self.limiter.check(request, self.resolve_principal(request))
+            if response is not None:
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
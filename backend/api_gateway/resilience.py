@@ -0,0 +1,135 @@
+import asyncio
+import time
+from typing import List
+
+from common.config import (
+    GATEWAY_BREAKER_FAILURES,
+    GATEWAY_BREAKER_RESET_SECONDS,
+    GATEWAY_EJECT_FAILURES,
+    GATEWAY_EJECT_SECONDS,
+)
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling an upstream that is known to be unhealthy or saturated."""
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = GATEWAY_BREAKER_FAILURES, reset_timeout: float = GATEWAY_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        return max(1.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def on_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def on_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def on_abandon(self):
+        # The probe was cancelled before it produced a result
+        self._probing = False
+
+
+class Instance:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+
+class InstancePool:
+    """Round-robin over service instances, temporarily ejecting ones that keep failing."""
+
+    def __init__(self, base_urls: List[str], eject_failures: int = GATEWAY_EJECT_FAILURES, eject_seconds: float = GATEWAY_EJECT_SECONDS):
+        self.instances = [Instance(url) for url in base_urls]
+        self.eject_failures = eject_failures
+        self.eject_seconds = eject_seconds
+        self._next = 0
+
+    def pick(self) -> Instance:
+        now = time.monotonic()
+        count = len(self.instances)
+        for offset in range(count):
+            instance = self.instances[(self._next + offset) % count]
+            if instance.available(now):
+                self._next = (self._next + offset + 1) % count
+                return instance
+        # Everything is ejected: try the one that comes back soonest
+        return min(self.instances, key=lambda i: i.ejected_until)
+
+    def on_success(self, instance: Instance):
+        instance.consecutive_failures = 0
+        instance.ejected_until = 0.0
+
+    def on_failure(self, instance: Instance):
+        instance.consecutive_failures += 1
+        # A single-instance service is left to the circuit breaker
+        if len(self.instances) > 1 and instance.consecutive_failures >= self.eject_failures:
+            instance.ejected_until = time.monotonic() + self.eject_seconds
+
+    def stats(self) -> list:
+        now = time.monotonic()
+        return [
+            {"url": i.base_url, "ejected": not i.available(now), "consecutive_failures": i.consecutive_failures}
+            for i in self.instances
+        ]
+
+
+class Bulkhead:
+    """Caps concurrent calls to one upstream; waits briefly for a slot, then fails fast."""
+
+    def __init__(self, limit: int, wait: float):
+        self.limit = limit
+        self.wait = wait
+        self._sem = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.rejected = 0
+
+    async def acquire(self):
+        try:
+            await asyncio.wait_for(self._sem.acquire(), timeout=self.wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise UpstreamUnavailable("Upstream concurrency limit reached")
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._sem.release()
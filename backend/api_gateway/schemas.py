@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    method: str = Field(default="GET", pattern=r"^(GET|POST|PUT|PATCH|DELETE)$")
+    path: str = Field(pattern=r"^/api/v1/")
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
+
+class BatchItemResult(BaseModel):
+    id: Optional[str] = None
+    status: int
+    body: Optional[Any] = None
+
+class BatchResponse(BaseModel):
+    responses: List[BatchItemResult]
@@ -0,0 +1,296 @@
+import importlib
+import importlib.util
+import logging
+import time
+from typing import Awaitable, Callable, Dict
+
+import httpx
+from starlette.responses import PlainTextResponse, Response
+
+from common.config import (
+    AUTH_SERVICE_URL,
+    USER_SERVICE_URL,
+    SUBSCRIPTION_SERVICE_URL,
+    PAYMENT_SERVICE_URL,
+    CALCULATION_SERVICE_URL,
+    REPORT_SERVICE_URL,
+    FORM_SERVICE_URL,
+    AFFILIATE_SERVICE_URL,
+    ADMIN_SERVICE_URL,
+    NOTIFICATION_SERVICE_URL,
+    STORAGE_SERVICE_URL,
+    I18N_SERVICE_URL,
+    PRO_SERVICE_URL,
+    GATEWAY_MAX_CONNECTIONS,
+    GATEWAY_MAX_KEEPALIVE_CONNECTIONS,
+    GATEWAY_KEEPALIVE_EXPIRY,
+    GATEWAY_HTTP2,
+    GATEWAY_UPSTREAM_CONCURRENCY,
+    GATEWAY_BULKHEAD_WAIT,
+    upstream_timeout,
+    upstream_connect_timeout,
+)
+from .metrics import observe_upstream, trace_hook
+from .resilience import Bulkhead, CircuitBreaker, InstancePool, UpstreamUnavailable
+
+# Service name -> base URL; names are used to look up per-upstream timeouts.
+# A URL setting may list several instances separated by commas.
+UPSTREAMS: Dict[str, str] = {
+    "auth": AUTH_SERVICE_URL,
+    "user": USER_SERVICE_URL,
+    "subscription": SUBSCRIPTION_SERVICE_URL,
+    "payment": PAYMENT_SERVICE_URL,
+    "calculation": CALCULATION_SERVICE_URL,
+    "report": REPORT_SERVICE_URL,
+    "form": FORM_SERVICE_URL,
+    "affiliate": AFFILIATE_SERVICE_URL,
+    "admin": ADMIN_SERVICE_URL,
+    "notification": NOTIFICATION_SERVICE_URL,
+    "storage": STORAGE_SERVICE_URL,
+    "i18n": I18N_SERVICE_URL,
+    "pro": PRO_SERVICE_URL,
+}
+
+# Upstream name -> module exposing the service's FastAPI `app`, for in-process deployment
+SERVICE_MODULES: Dict[str, str] = {
+    "auth": "services.auth.main",
+    "user": "services.user.main",
+    "subscription": "services.subscription.main",
+    "payment": "services.payment.main",
+    "calculation": "services.calculation.main",
+    "report": "services.report.main",
+    "form": "services.form.main",
+    "affiliate": "services.affiliates.main",
+    "notification": "services.notification.main",
+    "storage": "services.storage.main",
+    "i18n": "services.i18n.main",
+    "pro": "services.pro.main",
+}
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 keep-alive without it
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def build_client(name: str | None = None, transport: httpx.AsyncBaseTransport | None = None) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=transport,
+        limits=httpx.Limits(
+            max_connections=GATEWAY_MAX_CONNECTIONS,
+            max_keepalive_connections=GATEWAY_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=GATEWAY_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(upstream_timeout(name), connect=upstream_connect_timeout(name)),
+        http2=GATEWAY_HTTP2 and HTTP2_AVAILABLE,
+    )
+
+
+def load_service_apps(names: list[str] | None = None) -> dict:
+    """Import service apps by upstream name; a service that fails to import is skipped."""
+    apps = {}
+    for name in names or SERVICE_MODULES:
+        try:
+            apps[name] = importlib.import_module(SERVICE_MODULES[name]).app
+        except Exception:
+            logger.exception("Service %s could not be loaded in-process; proxying it over HTTP", name)
+    return apps
+
+
+def split_instances(value: str) -> list[str]:
+    return [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+
+
+# Upstream failures that count against the breaker and instance health
+FAILURE_STATUSES = {502, 503, 504}
+
+
+def service_scope(scope: dict, path: str, headers: dict) -> dict:
+    """Scope for a mounted service app: the gateway request rewritten to the service path and headers."""
+    keys = ("type", "asgi", "http_version", "method", "scheme", "server", "client", "query_string", "extensions")
+    sub = {k: scope[k] for k in keys if k in scope}
+    sub.update(
+        path=f"/{path}",
+        raw_path=f"/{path}".encode(),
+        root_path="",
+        headers=[(k.lower().encode("latin-1"), str(v).encode("latin-1")) for k, v in headers.items()],
+        state={},
+    )
+    return sub
+
+
+class Upstream:
+    """Client, instances and failure policy for one upstream service."""
+
+    def __init__(self, name: str | None, base_url: str, transport: httpx.AsyncBaseTransport | None = None, app=None):
+        self.name = name or base_url
+        # Mounted in-process ASGI app, if any; the client then goes through `transport` to it
+        self.app = app
+        self.client = build_client(name, transport)
+        # Connect / time-to-first-byte / body timings for the metrics endpoint
+        self.client.event_hooks = {"request": [trace_hook(self.name)], "response": []}
+        self.pool = InstancePool(split_instances(base_url))
+        self.breaker = CircuitBreaker()
+        self.bulkhead = Bulkhead(GATEWAY_UPSTREAM_CONCURRENCY, GATEWAY_BULKHEAD_WAIT)
+
+    async def call(self, send: Callable[[str], Awaitable[httpx.Response]]) -> httpx.Response:
+        """Run send(instance_base_url) under the breaker, bulkhead and instance pool."""
+        if not self.breaker.allow():
+            raise UpstreamUnavailable("Circuit open", retry_after=self.breaker.retry_after())
+        try:
+            await self.bulkhead.acquire()
+        except UpstreamUnavailable:
+            self.breaker.on_abandon()
+            raise
+        instance = self.pool.pick()
+        started = time.perf_counter()
+        try:
+            resp = await send(instance.base_url)
+        except httpx.TransportError:
+            self.pool.on_failure(instance)
+            self.breaker.on_failure()
+            raise
+        except BaseException:
+            self.breaker.on_abandon()
+            raise
+        finally:
+            self.bulkhead.release()
+            observe_upstream(self.name, started)
+        if resp.status_code in FAILURE_STATUSES:
+            self.pool.on_failure(instance)
+            self.breaker.on_failure()
+        else:
+            self.pool.on_success(instance)
+            self.breaker.on_success()
+        return resp
+
+    async def forward(self, scope: dict, receive, send):
+        """Serve a request from the mounted app on the gateway's own receive/send.
+
+        Nothing is buffered: the service reads the upload as the client sends
+        it and its response goes out as it is produced. An upload the service
+        never reads is drained before its response starts, as stream_proxy
+        does, so the gateway's body limit still applies to it.
+        """
+        if not self.breaker.allow():
+            raise UpstreamUnavailable("Circuit open", retry_after=self.breaker.retry_after())
+        try:
+            await self.bulkhead.acquire()
+        except UpstreamUnavailable:
+            self.breaker.on_abandon()
+            raise
+        started = time.perf_counter()
+        status = None
+        body_read = False
+
+        async def service_receive():
+            nonlocal body_read
+            body_read = True
+            return await receive()
+
+        async def service_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if not body_read:
+                    request = await receive()
+                    while request["type"] == "http.request" and request.get("more_body", False):
+                        request = await receive()
+            await send(message)
+
+        try:
+            await self.app(scope, service_receive, service_send)
+        except Exception:
+            # Unhandled service errors become 500 responses, as they would over HTTP
+            logger.exception("In-process service %s failed", self.name)
+            if status is None:
+                status = 500
+                await PlainTextResponse("Internal Server Error", status_code=500)(scope, receive, send)
+        except BaseException:
+            self.breaker.on_abandon()
+            raise
+        finally:
+            self.bulkhead.release()
+            observe_upstream(self.name, started)
+        if status in FAILURE_STATUSES:
+            self.breaker.on_failure()
+        else:
+            self.breaker.on_success()
+
+    def stats(self) -> dict:
+        return {
+            "breaker": self.breaker.state,
+            "in_flight": self.bulkhead.in_flight,
+            "rejected": self.bulkhead.rejected,
+            "instances": self.pool.stats(),
+        }
+
+
+class InProcessResponse(Response):
+    """Returned by a gateway route in place of a proxied response: hands the request to a mounted app."""
+
+    def __init__(self, upstream: Upstream, scope: dict):
+        self.upstream = upstream
+        self.service_scope = scope
+        self.background = None
+
+    async def __call__(self, scope, receive, send):
+        await self.upstream.forward(self.service_scope, receive, send)
+        if self.background is not None:
+            await self.background()
+
+
+class UpstreamRegistry:
+    """One long-lived keep-alive client per upstream service setting.
+
+    Upstreams are created on gateway startup and their clients closed on
+    shutdown. A base URL that is not in UPSTREAMS is registered on first use.
+    Services mounted in-process are called directly at the ASGI level (see
+    Upstream.forward) instead of over the network. Callers that need the
+    whole response body (cached routes, aggregation) use their client, which
+    goes through an in-process ASGI transport.
+    """
+
+    def __init__(self, upstreams: Dict[str, str] | None = None):
+        self.upstreams = dict(upstreams if upstreams is not None else UPSTREAMS)
+        self.apps: Dict[str, object] = {}
+        self.transports: Dict[str, httpx.AsyncBaseTransport] = {}
+        self._services: Dict[str, Upstream] = {}
+
+    def mount(self, name: str, app):
+        """Serve upstream `name` from an ASGI app in this process; call before start()."""
+        self.apps[name] = app
+        # Unhandled service errors become 500 responses, as they would over HTTP
+        self.transports[name] = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+    @property
+    def mounted(self) -> list[str]:
+        return sorted(self.transports)
+
+    async def start(self):
+        for name, base_url in self.upstreams.items():
+            if base_url not in self._services:
+                self._services[base_url] = Upstream(name, base_url, self.transports.get(name), self.apps.get(name))
+
+    async def close(self):
+        services = list(self._services.values())
+        self._services.clear()
+        for upstream in services:
+            await upstream.client.aclose()
+
+    def get(self, base_url: str) -> Upstream:
+        upstream = self._services.get(base_url)
+        if upstream is None:
+            name = next((n for n, url in self.upstreams.items() if url == base_url), None)
+            upstream = Upstream(name, base_url, self.transports.get(name), self.apps.get(name))
+            self._services[base_url] = upstream
+        return upstream
+
+    def client_for(self, base_url: str) -> httpx.AsyncClient:
+        return self.get(base_url).client
+
+    def stats(self) -> dict:
+        return {
+            upstream.name: dict(upstream.stats(), in_process=upstream.name in self.transports)
+            for upstream in self._services.values()
+        }
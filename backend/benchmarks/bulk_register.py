@@ -0,0 +1,91 @@
+"""Time to provision --users users: /auth/admin/bulk-register vs one /auth/register call each.
+
+Drives the auth app in-process over ASGI against the database from .env. A
+--sample of users goes through /auth/register one at a time (the way an
+onboarding script calls it today) and that rate is extrapolated to --users;
+then all --users are uploaded as one CSV to the bulk endpoint. Password hashing
+uses PASSWORD_HASH_WORKERS processes, so run it on a node sized like production.
+
+    python -m benchmarks.bulk_register --users 10000 --sample 200
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+from benchmarks.stubs import print_table
+from common.db.mysql import SessionLocal, dispose_async_engine
+from common.security.jwt import create_access_token
+from services.auth import main as auth_main
+from services.auth.hashing import hasher
+from services.auth.repository import create_user, get_user_by_email
+
+API = "/api/v1"
+
+
+def admin_token() -> str:
+    db = SessionLocal()
+    try:
+        admin = get_user_by_email(db, "bench-admin@example.com") or create_user(
+            db, name="Bench Admin", email="bench-admin@example.com", password=uuid.uuid4().hex, role="admin", user_type="admin"
+        )
+        return create_access_token(auth_main.access_claims(admin))
+    finally:
+        db.close()
+
+
+def person(run: str, n: int) -> dict:
+    return {"name": f"Bulk {n}", "email": f"bulk-{run}-{n}@example.com", "password": f"pw-{run}-{n}", "organization": "Bench Corp"}
+
+
+async def one_by_one(client: httpx.AsyncClient, run: str, sample: int, users: int) -> dict:
+    started = time.perf_counter()
+    for n in range(sample):
+        resp = await client.post(f"{API}/auth/register", json=person(run, n))
+        resp.raise_for_status()
+    elapsed = time.perf_counter() - started
+    return {"label": f"register x{sample}, extrapolated", "users": users, "seconds": round(elapsed / sample * users, 1),
+            "users_per_s": round(sample / elapsed, 1)}
+
+
+async def bulk(client: httpx.AsyncClient, run: str, offset: int, users: int, token: str) -> dict:
+    fields = ["name", "email", "password", "organization"]
+    body = ",".join(fields) + "\n" + "".join(
+        ",".join(person(run, n)[f] for f in fields) + "\n" for n in range(offset, offset + users)
+    )
+    counts = {}
+    started = time.perf_counter()
+    async with client.stream("POST", f"{API}/auth/admin/bulk-register", content=body,
+                             headers={"Authorization": f"Bearer {token}", "Content-Type": "text/csv"}) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            counts = json.loads(line).get("summary", counts)
+    elapsed = time.perf_counter() - started
+    print(f"Bulk upload: {counts}")
+    return {"label": "bulk-register", "users": users, "seconds": round(elapsed, 1), "users_per_s": round(users / elapsed, 1)}
+
+
+async def main(args):
+    run = uuid.uuid4().hex[:8]
+    token = admin_token()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=auth_main.app), base_url="http://auth", timeout=None) as client:
+            rows = [
+                await one_by_one(client, run, args.sample, args.users),
+                await bulk(client, run, args.sample, args.users, token),
+            ]
+    finally:
+        hasher.shutdown()
+        await dispose_async_engine()
+    print_table(rows)
+    print(f"Hashing workers: {hasher.workers}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--sample", type=int, default=200, help="users registered one at a time for the baseline")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+"""Compare sync sessions in FastAPI's threadpool with the async engine under concurrent load.
+
+Each operation is run the way a handler runs it: the sync variant opens a
+SessionLocal and calls the sync repository through run_in_threadpool (the
+same 40-thread limiter FastAPI uses for `def` handlers); the async variant
+uses AsyncSessionLocal and the async repositories on the event loop.
+
+Operations: login (user lookup, password check, refresh token insert) and
+subscription status (subscription lookup and limits). Needs the MySQL
+database from .env and the async driver (MYSQL_ASYNC_DRIVER, asyncmy by
+default); a benchmark user is created on first run.
+
+    python -m benchmarks.db_async_sessions --requests 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from benchmarks.stubs import summarize, print_table
+from common.db.mysql import SessionLocal, AsyncSessionLocal, dispose_async_engine
+from services.auth import repository as auth_repo, async_repository as auth_async
+from services.subscription import repository as sub_repo, async_repository as sub_async
+
+EMAIL = "bench-async@example.com"
+PASSWORD = "bench-password"
+
+
+def ensure_user() -> int:
+    db = SessionLocal()
+    try:
+        user = auth_repo.get_user_by_email(db, EMAIL)
+        if not user:
+            user = auth_repo.create_user(db, name="Benchmark", email=EMAIL, password=PASSWORD, tier="pro", verified=True)
+        sub_repo.get_or_create_subscription(db, user.id)
+        return user.id
+    finally:
+        db.close()
+
+
+def sync_login():
+    db = SessionLocal()
+    try:
+        user = auth_repo.get_user_by_email(db, EMAIL)
+        assert user and auth_repo.verify_password(PASSWORD, user.password_hash)
+        auth_repo.create_refresh_token(db, user.id)
+    finally:
+        db.close()
+
+
+async def async_login():
+    async with AsyncSessionLocal() as db:
+        user = await auth_async.get_user_by_email(db, EMAIL)
+        assert user and await auth_async.verify_password(PASSWORD, user.password_hash)
+        await auth_async.create_refresh_token(db, user.id)
+
+
+def sync_status(user_id: int):
+    db = SessionLocal()
+    try:
+        sub_repo.get_or_create_subscription(db, user_id)
+        sub_repo.get_limits(db, user_id)
+    finally:
+        db.close()
+
+
+async def async_status(user_id: int):
+    async with AsyncSessionLocal() as db:
+        sub = await sub_async.get_or_create_subscription(db, user_id)
+        sub_async.limits_for(sub)
+
+
+async def run(label: str, call, total: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return summarize(label, latencies, time.perf_counter() - started)
+
+
+async def main(total: int, concurrency: int):
+    user_id = await run_in_threadpool(ensure_user)
+    rows = [
+        await run("login: sync + threadpool", lambda: run_in_threadpool(sync_login), total, concurrency),
+        await run("login: async engine", async_login, total, concurrency),
+        await run("status: sync + threadpool", lambda: run_in_threadpool(sync_status, user_id), total, concurrency),
+        await run("status: async engine", lambda: async_status(user_id), total, concurrency),
+    ]
+    await dispose_async_engine()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,99 @@
+"""Requests/sec of /auth/check-email: the previous SELECT-per-request handler vs the email index.
+
+Seeds --users users (skipped when the users table already holds that many),
+then drives both handlers in-process over ASGI with the same traffic: mostly
+unregistered addresses (a registration form being typed), --hit-ratio of
+registered ones. The per-IP limit is lifted for the run. Uses the MySQL
+database from .env.
+
+    python -m benchmarks.email_check --users 100000 --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from benchmarks.stubs import summarize, print_table
+from common.db.mysql import SessionLocal, get_session, dispose_async_engine
+from services.auth.email_index import email_index
+from services.auth import main as auth_main
+from services.auth.models import User
+from services.auth.repository import get_user_by_email
+
+BATCH = 10000
+
+legacy_app = FastAPI()
+
+
+@legacy_app.get("/api/v1/auth/check-email")
+def legacy_check_email(email: str, db: Session = Depends(get_session)):
+    # The handler as it was: one SELECT of the whole user row per keystroke pause
+    return {"exists": get_user_by_email(db, email) is not None}
+
+
+def seed(users: int):
+    db = SessionLocal()
+    try:
+        have = db.scalar(select(func.count(User.id))) or 0
+        now = datetime.utcnow()
+        for offset in range(have, users, BATCH):
+            db.execute(insert(User), [
+                {"name": f"Bench {n}", "email": f"bench-{n}@example.com", "password_hash": "-", "created_at": now, "updated_at": now}
+                for n in range(offset, min(offset + BATCH, users))
+            ])
+            db.commit()
+    finally:
+        db.close()
+
+
+async def run(label: str, app, emails: list[str], concurrency: int) -> dict:
+    latencies: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://auth") as client:
+        async def one(email: str):
+            async with sem:
+                start = time.perf_counter()
+                resp = await client.get("/api/v1/auth/check-email", params={"email": email})
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(e) for e in emails))
+        return summarize(label, latencies, time.perf_counter() - started)
+
+
+async def main(args):
+    # The benchmark sends everything from one address
+    auth_main.EMAIL_CHECK_RATE = auth_main.EMAIL_CHECK_BURST = 1e9
+    seed(args.users)
+    started = time.perf_counter()
+    email_index.sync()
+    print(f"Built email index over {len(email_index.filter)} users in {time.perf_counter() - started:.1f}s")
+    emails = [
+        f"bench-{random.randrange(args.users)}@example.com" if random.random() < args.hit_ratio else f"typing-{random.random()}@example"
+        for _ in range(args.requests)
+    ]
+    try:
+        rows = [
+            await run("select per request", legacy_app, emails, args.concurrency),
+            await run("email index", auth_main.app, emails, args.concurrency),
+        ]
+    finally:
+        await dispose_async_engine()
+    print_table(rows)
+    print(email_index.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--hit-ratio", type=float, default=0.1)
+    asyncio.run(main(parser.parse_args()))
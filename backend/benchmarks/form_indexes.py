@@ -0,0 +1,138 @@
+"""Time the form service's Mongo lookups on a seeded collection, without and with the form indexes.
+
+Seeds a scratch database (MONGO_DB + "_bench" by default) with templates,
+drafts and a million submissions spread over many users. It then runs each
+lookup the way the handlers do (my_submissions, my_drafts, save_draft,
+get_schema), once with only the _id indexes and once after
+services.form.indexes.ensure_indexes. The winning plan stage and the number of
+documents examined are reported next to the latencies.
+
+    python -m benchmarks.form_indexes --submissions 1000000 --users 10000 --requests 200
+
+Seeding is skipped when the scratch database already holds the requested
+number of submissions; pass --reseed to start over.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.stubs import summarize, print_table
+from common.config import MONGO_DB
+from common.db.mongo import get_mongo_client, close_mongo
+from services.form.indexes import TEMPLATES, SUBMISSIONS, DRAFTS, ensure_indexes
+
+BATCH = 10000
+
+
+async def seed(db, submissions: int, users: int, templates: int, drafts: int):
+    await db[TEMPLATES].insert_many([{"key": f"tpl-{i}", "title": f"Template {i}", "sections": [], "version": 1} for i in range(templates)])
+    start = datetime(2024, 1, 1)
+    for offset in range(0, submissions, BATCH):
+        await db[SUBMISSIONS].insert_many([
+            {
+                "template_key": f"tpl-{n % templates}",
+                "user_id": n % users,
+                "data": {"amount": n},
+                "created_at": (start + timedelta(seconds=n)).isoformat(),
+            }
+            for n in range(offset, min(offset + BATCH, submissions))
+        ])
+    for offset in range(0, drafts, BATCH):
+        await db[DRAFTS].insert_many([
+            {"user_id": n % users, "template_key": f"tpl-{n // users % templates}", "data": {}, "updated_at": start.isoformat()}
+            for n in range(offset, min(offset + BATCH, drafts))
+        ])
+
+
+def plan_stage(plan: dict) -> str:
+    stages = []
+    while plan:
+        stages.append(plan.get("stage", "?"))
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return ">".join(reversed(stages))
+
+
+async def explain(cursor) -> tuple[str, int]:
+    info = await cursor.explain()
+    stats = info.get("executionStats", {})
+    return plan_stage(info.get("queryPlanner", {}).get("winningPlan", {})), stats.get("totalDocsExamined", -1)
+
+
+def lookups(db, users: int, templates: int):
+    async def my_submissions():
+        await db[SUBMISSIONS].find({"user_id": random.randrange(users)}).sort("created_at", -1).limit(20).to_list(20)
+
+    async def my_drafts():
+        await db[DRAFTS].find({"user_id": random.randrange(users)}).to_list(None)
+
+    async def save_draft():
+        selector = {"user_id": random.randrange(users), "template_key": f"tpl-{random.randrange(templates)}"}
+        await db[DRAFTS].update_one(selector, {"$set": {"data": {}, "updated_at": datetime.utcnow().isoformat(), **selector}}, upsert=True)
+        await db[DRAFTS].find_one(selector)
+
+    async def get_schema():
+        await db[TEMPLATES].find_one({"key": f"tpl-{random.randrange(templates)}"})
+
+    plans = {
+        "my_submissions": lambda: db[SUBMISSIONS].find({"user_id": 1}).sort("created_at", -1).limit(20),
+        "my_drafts": lambda: db[DRAFTS].find({"user_id": 1}),
+        "save_draft": lambda: db[DRAFTS].find({"user_id": 1, "template_key": "tpl-0"}),
+        "get_schema": lambda: db[TEMPLATES].find({"key": "tpl-1"}).limit(1),
+    }
+    return [(name, call, plans[name]) for name, call in
+            (("my_submissions", my_submissions), ("my_drafts", my_drafts), ("save_draft", save_draft), ("get_schema", get_schema))]
+
+
+async def run(label: str, db, users: int, templates: int, total: int, concurrency: int) -> list[dict]:
+    rows = []
+    for name, call, plan in lookups(db, users, templates):
+        latencies: list[float] = []
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with sem:
+                start = time.perf_counter()
+                await call()
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        row = summarize(f"{name}: {label}", latencies, time.perf_counter() - started)
+        row["plan"], row["docs_examined"] = await explain(plan())
+        rows.append(row)
+    return rows
+
+
+async def main(args):
+    db = get_mongo_client()[args.database]
+    try:
+        if args.reseed or await db[SUBMISSIONS].estimated_document_count() != args.submissions:
+            await get_mongo_client().drop_database(args.database)
+            started = time.perf_counter()
+            await seed(db, args.submissions, args.users, args.templates, args.drafts)
+            print(f"Seeded {args.submissions} submissions in {time.perf_counter() - started:.1f}s")
+        for name in (TEMPLATES, SUBMISSIONS, DRAFTS):
+            await db[name].drop_indexes()
+        rows = await run("no indexes", db, args.users, args.templates, args.requests, args.concurrency)
+        started = time.perf_counter()
+        await ensure_indexes(db)
+        print(f"Built form indexes in {time.perf_counter() - started:.1f}s")
+        rows += await run("indexed", db, args.users, args.templates, args.requests, args.concurrency)
+        print_table(rows)
+    finally:
+        close_mongo()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", default=f"{MONGO_DB}_bench")
+    parser.add_argument("--submissions", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--templates", type=int, default=200)
+    parser.add_argument("--drafts", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--reseed", action="store_true")
+    asyncio.run(main(parser.parse_args()))
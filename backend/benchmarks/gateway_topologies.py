@@ -0,0 +1,102 @@
+"""Compare the split deployment (gateway -> HTTP -> service) with the single-process monolith.
+
+Requests are driven through the gateway app in-process, so the only difference
+between the two runs is the gateway -> service hop. The split run serves each
+service with uvicorn on the port from its configured URL; the monolith run
+mounts the same service apps on the gateway's upstream registry.
+
+Flows default to the calculation steps of the report-generation flow in
+flow.md, which need no database; pass --flow to add others when MySQL/Mongo
+are available.
+
+    python -m benchmarks.gateway_topologies --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from api_gateway import main as gateway
+from api_gateway.upstreams import SERVICE_MODULES, load_service_apps
+from benchmarks.stubs import serve_in_thread, summarize, print_table
+from common.security.jwt import create_access_token
+
+# (label, method, gateway path, JSON body); the gateway forwards
+# /api/v1/calculate/{path} to the service's /api/v1/{path}
+DEFAULT_FLOWS = [
+    ("validate inputs", "POST", "/api/v1/calculate/calculate/validate-inputs", {"age": 35, "annual_income": 1200000}),
+    ("term insurance", "POST", "/api/v1/calculate/calculate/term-insurance", {"age": 35, "annual_income": 1200000, "dependents": 2}),
+]
+DEFAULT_SERVICES = ["calculation"]
+
+
+def parse_flow(value: str):
+    """METHOD:PATH[:JSON], e.g. GET:/api/v1/subscriptions/tiers"""
+    method, rest = value.split(":", 1)
+    path, _, body = rest.partition(":")
+    return (f"{method.upper()} {path}", method.upper(), path, json.loads(body) if body else None)
+
+
+async def run(client: httpx.AsyncClient, label: str, method: str, path: str, body, total: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    failures = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal failures
+        async with sem:
+            start = time.perf_counter()
+            resp = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code >= 400:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    row = summarize(label, latencies, time.perf_counter() - started)
+    row["errors"] = failures
+    return row
+
+
+async def run_flows(topology: str, flows, total: int, concurrency: int) -> list[dict]:
+    token = create_access_token({"sub": "1", "email": "bench@example.com", "tier": "enterprise", "role": "advisor"})
+    transport = httpx.ASGITransport(app=gateway.app)
+    rows = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway", headers={"Authorization": f"Bearer {token}"}) as client:
+        for label, method, path, body in flows:
+            rows.append(await run(client, f"{topology}: {label}", method, path, body, total, concurrency))
+    return rows
+
+
+async def main(flows, service_names: list[str], total: int, concurrency: int):
+    apps = load_service_apps(service_names)
+    # Measure the hop itself, not admission control
+    gateway.rate_limiter.enabled = False
+
+    # Split: each service behind its own uvicorn server at the configured URL
+    for name, service_app in apps.items():
+        serve_in_thread(service_app, port=urlsplit(gateway.upstreams.upstreams[name]).port)
+    await gateway.upstreams.start()
+    rows = await run_flows("split", flows, total, concurrency)
+    await gateway.upstreams.close()
+
+    # Monolith: the same apps mounted in-process
+    for name, service_app in apps.items():
+        gateway.upstreams.mount(name, service_app)
+    await gateway.upstreams.start()
+    rows += await run_flows("monolith", flows, total, concurrency)
+    await gateway.upstreams.close()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--service", action="append", choices=sorted(SERVICE_MODULES), help="services to deploy both ways (default: calculation)")
+    parser.add_argument("--flow", action="append", type=parse_flow, help="extra METHOD:PATH[:JSON] flow to run")
+    args = parser.parse_args()
+    asyncio.run(main(DEFAULT_FLOWS + (args.flow or []), args.service or DEFAULT_SERVICES, args.requests, args.concurrency))
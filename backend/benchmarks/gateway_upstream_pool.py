@@ -0,0 +1,63 @@
+"""Compare the gateway's old per-request httpx client with the pooled upstream registry.
+
+Both strategies call the same local stub upstream at a fixed concurrency and
+report p50/p99 latency and requests/sec.
+
+    python -m benchmarks.gateway_upstream_pool --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from api_gateway.upstreams import UpstreamRegistry
+from benchmarks.stubs import json_stub, serve_in_thread, summarize, print_table
+
+
+async def run(label: str, call, total: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return summarize(label, latencies, time.perf_counter() - started)
+
+
+async def main(total: int, concurrency: int):
+    base_url = serve_in_thread(json_stub({"tiers": ["free", "pro"]}))
+    url = f"{base_url}/api/v1/subscriptions/tiers"
+
+    async def per_request_client():
+        # What proxy() used to do for every request
+        async with httpx.AsyncClient() as client:
+            resp = await client.get(url)
+            resp.json()
+
+    registry = UpstreamRegistry({"stub": base_url})
+    await registry.start()
+
+    async def pooled_client():
+        resp = await registry.client_for(base_url).get(url)
+        resp.json()
+
+    rows = [
+        await run("per-request client", per_request_client, total, concurrency),
+        await run("pooled registry", pooled_client, total, concurrency),
+    ]
+    await registry.close()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,116 @@
+"""Storm the auth service with logins and measure how the rest of the service holds up.
+
+Starts services.auth.main under uvicorn in a child process, once per mode:
+"inline" (PASSWORD_HASH_WORKERS=0, hashing in the request threadpool as
+before) and "pool" (the hashing process pool, PASSWORD_HASH_WORKERS from the
+environment or one per core). While --concurrency clients log in as fast as they
+can, a single client polls /auth/check-email, which does no hashing. Reported
+per mode: logins/sec (and per core), 503s shed by admission control, login
+latency, and check-email p99.
+
+    python -m benchmarks.login_storm --seconds 20 --concurrency 64
+
+Uses the database from .env; the schema must exist (python -m common.db.bootstrap auth).
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+from benchmarks.stubs import free_port, summarize, print_table
+
+API = "/api/v1"
+
+
+def start_service(port: int, workers: str | None) -> subprocess.Popen:
+    env = dict(os.environ)
+    if workers is not None:
+        env["PASSWORD_HASH_WORKERS"] = workers
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "services.auth.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if (await client.get(f"{API}/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("auth service did not start")
+
+
+async def storm(client: httpx.AsyncClient, email: str, password: str, seconds: float, concurrency: int):
+    stop = time.perf_counter() + seconds
+    logins: list[float] = []
+    probes: list[float] = []
+    shed = 0
+    failed = 0
+
+    async def login_loop():
+        nonlocal shed, failed
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            resp = await client.post(f"{API}/auth/login", json={"email": email, "password": password})
+            if resp.status_code == 200:
+                logins.append(time.perf_counter() - started)
+            elif resp.status_code == 503:
+                shed += 1
+                await asyncio.sleep(float(resp.headers.get("retry-after", "1")))
+            else:
+                failed += 1
+
+    async def probe_loop():
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            await client.get(f"{API}/auth/check-email", params={"email": email})
+            probes.append(time.perf_counter() - started)
+            await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    await asyncio.gather(probe_loop(), *(login_loop() for _ in range(concurrency)))
+    return logins, probes, shed, failed, time.perf_counter() - started
+
+
+async def run_mode(label: str, workers: str | None, args) -> dict:
+    port = free_port()
+    proc = start_service(port, workers)
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60.0) as client:
+            await wait_ready(client)
+            email, password = f"storm-{uuid.uuid4().hex[:12]}@example.com", "storm-password"
+            resp = await client.post(f"{API}/auth/register", json={"name": "Storm", "email": email, "password": password})
+            resp.raise_for_status()
+            logins, probes, shed, failed, elapsed = await storm(client, email, password, args.seconds, args.concurrency)
+    finally:
+        proc.terminate()
+        proc.wait()
+    row = summarize(f"login: {label}", logins, elapsed)
+    cores = os.cpu_count() or 1
+    row["per_core"] = round(row["rps"] / cores, 1)
+    row["shed_503"] = shed
+    row["errors"] = failed
+    row["probe_p99_ms"] = summarize("probe", probes, elapsed)["p99_ms"]
+    return row
+
+
+async def main(args):
+    rows = [await run_mode("inline", "0", args), await run_mode("pool", os.environ.get("PASSWORD_HASH_WORKERS"), args)]
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,151 @@
+"""Time refresh-token lookups on a large table, plaintext layout vs hashed layout.
+
+Seeds two scratch tables in the configured MySQL database with --rows tokens
+each (10M by default), most of them expired or revoked the way an unswept table
+accumulates them:
+
+  plain:  the previous layout, VARCHAR(256) unique token, user_id index, nothing deleted
+  hashed: CHAR(64) SHA-256 unique token_hash, (user_id, revoked) and expires_at
+          indexes, swept with the same batched delete as the auth service
+
+It then runs get_valid_refresh_token's query for random live tokens against
+each table and reports latency, row count and table/index size.
+
+    python -m benchmarks.refresh_tokens --rows 10000000 --requests 2000
+
+Seeding is skipped when the tables already hold --rows rows; pass --reseed to start over.
+"""
+import argparse
+import base64
+import random
+import time
+from datetime import datetime, timedelta
+from hashlib import blake2b
+
+from sqlalchemy import CHAR, Boolean, Column, DateTime, Index, Integer, MetaData, String, Table, delete, func, select, text
+
+from benchmarks.stubs import summarize, print_table
+from common.db.mysql import engine
+from services.auth.repository import hash_refresh_token
+
+BATCH = 10000
+metadata = MetaData()
+
+plain = Table(
+    "bench_refresh_tokens_plain", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, index=True),
+    Column("token", String(256), unique=True, nullable=False),
+    Column("revoked", Boolean, default=False),
+    Column("expires_at", DateTime, nullable=False),
+)
+
+hashed = Table(
+    "bench_refresh_tokens_hashed", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer),
+    Column("token_hash", CHAR(64), unique=True, nullable=False),
+    Column("revoked", Boolean, default=False),
+    Column("expires_at", DateTime, nullable=False),
+    Index("ix_bench_hashed_user_revoked", "user_id", "revoked"),
+    Index("ix_bench_hashed_expires_at", "expires_at"),
+)
+
+
+def token(n: int) -> str:
+    # Deterministic stand-in for token_urlsafe(64), so lookups can regenerate any seeded token
+    return base64.urlsafe_b64encode(blake2b(n.to_bytes(8, "big"), digest_size=64).digest()).rstrip(b"=").decode()
+
+
+def row(n: int, users: int, live_every: int, now: datetime) -> dict:
+    live = n % live_every == 0
+    # Stale rows are split between revoked and expired
+    return {
+        "user_id": n % users,
+        "revoked": not live and n % 2 == 0,
+        "expires_at": now + timedelta(days=30) if live else now - timedelta(days=n % 60 + 1),
+    }
+
+
+def seed(rows: int, users: int, live_every: int):
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    now = datetime.utcnow()
+    for offset in range(0, rows, BATCH):
+        batch = range(offset, min(offset + BATCH, rows))
+        with engine.begin() as conn:
+            conn.execute(plain.insert(), [dict(row(n, users, live_every, now), token=token(n)) for n in batch])
+            conn.execute(hashed.insert(), [dict(row(n, users, live_every, now), token_hash=hash_refresh_token(token(n))) for n in batch])
+
+
+def sweep(batch_size: int) -> int:
+    # services.auth.repository.sweep_refresh_tokens against the scratch table
+    deleted = 0
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(hashed.update().where(hashed.c.revoked == True).values(expires_at=now - timedelta(seconds=1)))
+    while True:
+        with engine.begin() as conn:
+            ids = conn.scalars(
+                select(hashed.c.id).where(hashed.c.expires_at < now).order_by(hashed.c.expires_at).limit(batch_size)
+            ).all()
+            if ids:
+                conn.execute(delete(hashed).where(hashed.c.id.in_(ids)))
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            return deleted
+
+
+def table_size(name: str) -> str:
+    if engine.dialect.name != "mysql":
+        return "-"
+    with engine.connect() as conn:
+        data, index = conn.execute(
+            text("SELECT data_length, index_length FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = :t"),
+            {"t": name},
+        ).one()
+    return f"{data / 2**20:.0f}+{index / 2**20:.0f} MiB"
+
+
+def lookups(label: str, table: Table, column: str, key, rows: int, live_every: int, total: int) -> dict:
+    latencies: list[float] = []
+    with engine.connect() as conn:
+        count = conn.scalar(select(func.count()).select_from(table))
+        for _ in range(total):
+            n = random.randrange(0, rows, live_every)
+            stmt = select(table).where(table.c[column] == key(token(n)), table.c.revoked == False)
+            start = time.perf_counter()
+            assert conn.execute(stmt).first() is not None
+            latencies.append(time.perf_counter() - start)
+    result = summarize(label, latencies, sum(latencies))
+    result["rows"] = count
+    result["size"] = table_size(table.name)
+    return result
+
+
+def main(args):
+    live_every = max(1, round(1 / args.live_fraction))
+    with engine.connect() as conn:
+        seeded = engine.dialect.has_table(conn, plain.name) and conn.scalar(select(func.count()).select_from(plain)) == args.rows
+    if args.reseed or not seeded:
+        started = time.perf_counter()
+        seed(args.rows, args.users, live_every)
+        print(f"Seeded {args.rows} tokens per table in {time.perf_counter() - started:.1f}s")
+    started = time.perf_counter()
+    deleted = sweep(args.sweep_batch)
+    print(f"Swept {deleted} stale rows from {hashed.name} in {time.perf_counter() - started:.1f}s")
+    print_table([
+        lookups("plain token", plain, "token", lambda t: t, args.rows, live_every, args.requests),
+        lookups("hashed + swept", hashed, "token_hash", hash_refresh_token, args.rows, live_every, args.requests),
+    ])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--live-fraction", type=float, default=0.1, help="share of seeded tokens still valid")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--sweep-batch", type=int, default=1000)
+    parser.add_argument("--reseed", action="store_true")
+    main(parser.parse_args())
@@ -0,0 +1,71 @@
+"""Measure cold-start time of each service: module import, and import plus lifespan startup and a first request.
+
+Every sample runs in a fresh interpreter, so nothing is cached between runs.
+To compare against another revision, check it out separately and point
+--tree at its backend directory:
+
+    git worktree add /tmp/before <rev>
+    python -m benchmarks.service_startup --tree /tmp/before/backend --label before
+    python -m benchmarks.service_startup --label after
+
+Uses the databases from .env; services that fail to import are reported as errors.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from api_gateway.upstreams import SERVICE_MODULES
+from benchmarks.stubs import print_table
+
+# Runs in the child interpreter: argv = module, path
+CHILD = r"""
+import asyncio, importlib, json, sys, time
+import httpx
+started = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+
+async def first_request():
+    app = module.app
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://service") as client:
+            await client.get(sys.argv[2])
+
+asyncio.run(first_request())
+print(json.dumps({"import": imported - started, "ready": time.perf_counter() - started}))
+"""
+
+
+def sample(tree: str, module: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [tree, os.environ.get("PYTHONPATH")])))
+    proc = subprocess.run([sys.executable, "-c", CHILD, module, "/health"], cwd=tree, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def measure(tree: str, label: str, name: str, repeat: int) -> dict:
+    row = {"label": label, "service": name}
+    try:
+        samples = [sample(tree, SERVICE_MODULES[name]) for _ in range(repeat)]
+    except RuntimeError as exc:
+        return dict(row, import_ms="error", ready_ms=str(exc)[:60])
+    return dict(
+        row,
+        import_ms=round(statistics.median(s["import"] for s in samples) * 1000, 1),
+        ready_ms=round(statistics.median(s["ready"] for s in samples) * 1000, 1),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tree", default=os.getcwd(), help="backend directory to measure (default: this one)")
+    parser.add_argument("--label", default="current")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per service; the median is reported")
+    parser.add_argument("services", nargs="*", help=", ".join(SERVICE_MODULES))
+    args = parser.parse_args()
+    names = args.services or list(SERVICE_MODULES)
+    print_table([measure(os.path.abspath(args.tree), args.label, name, args.repeat) for name in names])
@@ -0,0 +1,84 @@
+"""Shared helpers for the benchmark scripts: local stub upstreams and latency summaries."""
+import json
+import socket
+import statistics
+import threading
+import time
+
+import uvicorn
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_in_thread(app, port: int | None = None) -> str:
+    """Run an ASGI app with uvicorn in a daemon thread and return its base URL."""
+    port = port or free_port()
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("stub upstream did not start")
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+def json_stub(payload: dict | None = None, delay: float = 0.0):
+    """Minimal ASGI app answering every request with the same JSON body."""
+    import asyncio
+
+    body = json.dumps(payload or {"status": "ok"}).encode()
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        # drain request body
+        more = True
+        while more:
+            message = await receive()
+            more = message.get("more_body", False)
+        if delay:
+            await asyncio.sleep(delay)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(label: str, latencies: list[float], elapsed: float) -> dict:
+    return {
+        "label": label,
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def print_table(rows: list[dict]):
+    if not rows:
+        return
+    keys = list(rows[0].keys())
+    widths = {k: max(len(k), *(len(str(r[k])) for r in rows)) for k in keys}
+    print("  ".join(k.ljust(widths[k]) for k in keys))
+    for r in rows:
+        print("  ".join(str(r[k]).ljust(widths[k]) for k in keys))
@@ -0,0 +1,73 @@
+"""Per-request cost of the access-token revocation check.
+
+Times common.security.principal.resolve_claims, once with revocation off and once
+against a filter holding --revoked jtis (memory feed), on both the gateway-header
+path and the bare-JWT path. Also reports the measured false-positive rate (each
+one costs a feed lookup), the time to rebuild the filter from a full sync, and
+how long a revocation takes to reach another process's filter.
+
+    python -m benchmarks.token_revocation --revoked 100000 --requests 200000
+"""
+import argparse
+import time
+import uuid
+
+from benchmarks.stubs import print_table
+from common.security import principal
+from common.security.jwt import create_access_token
+from common.security.principal import resolve_claims, sign_principal
+from common.security.revocation import MemoryRevocationFeed, RevocationList
+
+
+def per_call(label: str, call, total: int) -> dict:
+    started = time.perf_counter()
+    for _ in range(total):
+        call()
+    elapsed = time.perf_counter() - started
+    return {"label": label, "calls": total, "us_per_call": round(elapsed / total * 1e6, 2)}
+
+
+def main(args):
+    feed = MemoryRevocationFeed()
+    expires = time.time() + 3600
+    for _ in range(args.revoked):
+        feed.revoke(uuid.uuid4().hex, None, expires)
+
+    started = time.perf_counter()
+    filled = RevocationList(feed, interval=args.interval)
+    filled.sync()
+    print(f"Built filter for {args.revoked} jtis in {(time.perf_counter() - started) * 1000:.0f} ms, {len(filled.filter.bits) / 1024:.0f} KiB")
+
+    token = create_access_token({"sub": "1", "email": "bench@example.com", "tier": "pro", "role": "advisor", "active": True})
+    claims = principal.decode_token(token)
+    header = sign_principal({k: claims[k] for k in ("sub", "email", "role", "tier", "active", "jti")}, token, 300, claims.get("exp"))
+
+    rows = []
+    for label, revocations in (("off", RevocationList(None)), (f"{args.revoked} revoked", filled)):
+        principal.revocations = revocations
+        rows.append(per_call(f"header, {label}", lambda: resolve_claims(token, header), args.requests))
+        rows.append(per_call(f"jwt, {label}", lambda: resolve_claims(token), args.requests))
+    print_table(rows)
+
+    probes = [uuid.uuid4().hex for _ in range(args.requests)]
+    false_positives = sum(jti in filled.filter for jti in probes)
+    print(f"False positives: {false_positives}/{len(probes)} ({false_positives / len(probes):.4%}, target {filled.error_rate:.4%})")
+
+    # A second process's view: it only learns about revocations through its sync thread
+    other = RevocationList(feed, interval=args.interval)
+    other.start()
+    time.sleep(args.interval * 2)
+    jti = uuid.uuid4().hex
+    filled.revoke(jti, None, expires)
+    started = time.perf_counter()
+    while not other.is_revoked(jti):
+        time.sleep(0.005)
+    print(f"Revocation visible to another list after {(time.perf_counter() - started) * 1000:.0f} ms (sync interval {args.interval}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--revoked", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--interval", type=float, default=0.5, help="sync interval of the simulated other process")
+    main(parser.parse_args())
@@ -15,13 +15,79 @@ MYSQL_PORT = int(os.getenv("MYSQL_PORT", "3306"))
 MYSQL_USER = os.getenv("MYSQL_USER", "root")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD", "password")
 MYSQL_DB = os.getenv("MYSQL_DB", "salahkaarpro")
+# Driver for the async engine used by the async session dependency (asyncmy or aiomysql)
+MYSQL_ASYNC_DRIVER = os.getenv("MYSQL_ASYNC_DRIVER", "asyncmy")
+# Connection pool per engine (each service process has its own)
+MYSQL_POOL_SIZE = int(os.getenv("MYSQL_POOL_SIZE", "10"))
+MYSQL_MAX_OVERFLOW = int(os.getenv("MYSQL_MAX_OVERFLOW", "10"))
+MYSQL_POOL_TIMEOUT = float(os.getenv("MYSQL_POOL_TIMEOUT", "30"))
+# Connections older than this are replaced on checkout; keep it below the server's wait_timeout
+MYSQL_POOL_RECYCLE = int(os.getenv("MYSQL_POOL_RECYCLE", "1800"))
+# Ping on every checkout; off by default since recycle already retires stale connections
+MYSQL_POOL_PRE_PING = os.getenv("MYSQL_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+# Optional read replicas (comma-separated SQLAlchemy URLs) used by get_read_session
+MYSQL_REPLICA_URLS = [u.strip() for u in os.getenv("MYSQL_REPLICA_URLS", "").split(",") if u.strip()]
+# After a user writes, their read-only sessions stay on the primary for this long
+MYSQL_READ_STICKY_SECONDS = float(os.getenv("MYSQL_READ_STICKY_SECONDS", "5"))
+# Per-request query counting (common/db/instrumentation.py); debug adds X-DB-* headers and a log line per request
+DB_QUERY_DEBUG = os.getenv("DB_QUERY_DEBUG", "false").lower() in ("1", "true", "yes")
+# Queries slower than this are logged (0 disables)
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+# A statement repeated this many times in one request is logged as a likely N+1 (0 disables)
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "5"))
+# Schema is created by `python -m common.db.bootstrap` at deploy time; true also creates it when a service starts
+DB_BOOTSTRAP_ON_STARTUP = os.getenv("DB_BOOTSTRAP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
 
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 MONGO_DB = os.getenv("MONGO_DB", "salahkaarpro")
+# Shared Motor client per process (common/db/mongo.py)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
 
 JWT_SECRET = os.getenv("JWT_SECRET", "insecure-dev-secret-change-me")
 JWT_EXPIRES_MINUTES = int(os.getenv("JWT_EXPIRES_MINUTES", "60"))
 REFRESH_EXPIRES_MINUTES = int(os.getenv("REFRESH_EXPIRES_MINUTES", "43200"))  # 30 days
+# Live refresh tokens kept per user; older ones are revoked on login
+REFRESH_TOKENS_PER_USER = int(os.getenv("REFRESH_TOKENS_PER_USER", "10"))
+# Auth service background deletion of expired/revoked refresh tokens (0 disables it)
+REFRESH_SWEEP_INTERVAL_SECONDS = float(os.getenv("REFRESH_SWEEP_INTERVAL_SECONDS", "300"))
+REFRESH_SWEEP_BATCH = int(os.getenv("REFRESH_SWEEP_BATCH", "1000"))
+# Revoked access tokens (common/security/revocation.py): feed is sql, memory, off or module:Class
+TOKEN_REVOCATION_FEED = os.getenv("TOKEN_REVOCATION_FEED", "sql")
+TOKEN_REVOCATION_SYNC_SECONDS = float(os.getenv("TOKEN_REVOCATION_SYNC_SECONDS", "2"))
+TOKEN_REVOCATION_REBUILD_SECONDS = float(os.getenv("TOKEN_REVOCATION_REBUILD_SECONDS", "300"))
+TOKEN_REVOCATION_CAPACITY = int(os.getenv("TOKEN_REVOCATION_CAPACITY", "100000"))
+TOKEN_REVOCATION_ERROR_RATE = float(os.getenv("TOKEN_REVOCATION_ERROR_RATE", "0.001"))
+# /auth/check-email: in-process email index (sync 0 disables it), positive cache and per-IP limit
+EMAIL_INDEX_SYNC_SECONDS = float(os.getenv("EMAIL_INDEX_SYNC_SECONDS", "5"))
+EMAIL_INDEX_REBUILD_SECONDS = float(os.getenv("EMAIL_INDEX_REBUILD_SECONDS", "600"))
+EMAIL_INDEX_CAPACITY = int(os.getenv("EMAIL_INDEX_CAPACITY", "1000000"))
+EMAIL_INDEX_ERROR_RATE = float(os.getenv("EMAIL_INDEX_ERROR_RATE", "0.01"))
+EMAIL_CHECK_CACHE_TTL = float(os.getenv("EMAIL_CHECK_CACHE_TTL", "60"))
+EMAIL_CHECK_RATE = float(os.getenv("EMAIL_CHECK_RATE", "2"))
+EMAIL_CHECK_BURST = float(os.getenv("EMAIL_CHECK_BURST", "30"))
+# "memory", "sqlite:<path>" (shared by the processes on one host) or "package.module:ClassName" of a common.ratelimit.BucketStore
+EMAIL_CHECK_RATE_LIMIT_BACKEND = os.getenv("EMAIL_CHECK_RATE_LIMIT_BACKEND", "memory")
+# Peers (IPs or CIDRs, i.e. the gateway) whose X-Forwarded-For names the caller; other peers are the caller
+TRUSTED_PROXIES = [p.strip() for p in os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1").split(",") if p.strip()]
+# Admin bulk registration: rows per INSERT transaction and per upload
+BULK_REGISTER_CHUNK = int(os.getenv("BULK_REGISTER_CHUNK", "500"))
+BULK_REGISTER_MAX_ROWS = int(os.getenv("BULK_REGISTER_MAX_ROWS", "50000"))
+# pbkdf2_sha256 rounds; stored hashes with fewer rounds are upgraded on the next successful login
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+# Processes dedicated to password hashing in the auth service (0 hashes in the request threadpool)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS") or os.cpu_count() or 1)
+# Refuse with 503 when queued hashing work would delay a request longer than this
+PASSWORD_HASH_MAX_WAIT_MS = float(os.getenv("PASSWORD_HASH_MAX_WAIT_MS", "500"))
+
+# Signed principal header forwarded by the gateway to services
+INTERNAL_PRINCIPAL_SECRET = os.getenv("INTERNAL_PRINCIPAL_SECRET", JWT_SECRET)
+PRINCIPAL_HEADER_TTL_SECONDS = int(os.getenv("PRINCIPAL_HEADER_TTL_SECONDS", "300"))
+# Per-process cache of authenticated users; rows changed by other processes are
+# evicted every USER_CACHE_SYNC_SECONDS (0 disables it, leaving only the TTL)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "30"))
+USER_CACHE_SYNC_SECONDS = float(os.getenv("USER_CACHE_SYNC_SECONDS", "2"))
 
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://localhost:8001")
 USER_SERVICE_URL = os.getenv("USER_SERVICE_URL", "http://localhost:8002")
@@ -37,9 +103,69 @@ STORAGE_SERVICE_URL = os.getenv("STORAGE_SERVICE_URL", "http://localhost:8011")
 I18N_SERVICE_URL = os.getenv("I18N_SERVICE_URL", "http://localhost:8012")
 PRO_SERVICE_URL = os.getenv("PRO_SERVICE_URL", "http://localhost:8013")
 
+# API gateway upstream connection pools (one pool per service URL)
+GATEWAY_MAX_CONNECTIONS = int(os.getenv("GATEWAY_MAX_CONNECTIONS", "100"))
+GATEWAY_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GATEWAY_MAX_KEEPALIVE_CONNECTIONS", "20"))
+GATEWAY_KEEPALIVE_EXPIRY = float(os.getenv("GATEWAY_KEEPALIVE_EXPIRY", "30"))
+GATEWAY_HTTP2 = os.getenv("GATEWAY_HTTP2", "true").lower() in ("1", "true", "yes")
+GATEWAY_CONNECT_TIMEOUT = float(os.getenv("GATEWAY_CONNECT_TIMEOUT", "5"))
+GATEWAY_READ_TIMEOUT = float(os.getenv("GATEWAY_READ_TIMEOUT", "30"))
+
+# Per-upstream bulkhead, circuit breaker and instance ejection
+GATEWAY_UPSTREAM_CONCURRENCY = int(os.getenv("GATEWAY_UPSTREAM_CONCURRENCY", "100"))
+GATEWAY_BULKHEAD_WAIT = float(os.getenv("GATEWAY_BULKHEAD_WAIT", "0.1"))
+GATEWAY_BREAKER_FAILURES = int(os.getenv("GATEWAY_BREAKER_FAILURES", "5"))
+GATEWAY_BREAKER_RESET_SECONDS = float(os.getenv("GATEWAY_BREAKER_RESET_SECONDS", "30"))
+GATEWAY_EJECT_FAILURES = int(os.getenv("GATEWAY_EJECT_FAILURES", "3"))
+GATEWAY_EJECT_SECONDS = float(os.getenv("GATEWAY_EJECT_SECONDS", "30"))
+
+
+# Verified bearer tokens cached by the gateway, keyed by token digest
+GATEWAY_PRINCIPAL_CACHE_SIZE = int(os.getenv("GATEWAY_PRINCIPAL_CACHE_SIZE", "50000"))
+GATEWAY_PRINCIPAL_CACHE_TTL = float(os.getenv("GATEWAY_PRINCIPAL_CACHE_TTL", "60"))
+
+# Gateway response cache for semi-static GET routes
+GATEWAY_CACHE_ENABLED = os.getenv("GATEWAY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+GATEWAY_CACHE_MAX_ENTRIES = int(os.getenv("GATEWAY_CACHE_MAX_ENTRIES", "10000"))
+
+# POST /api/v1/batch
+GATEWAY_BATCH_MAX_ITEMS = int(os.getenv("GATEWAY_BATCH_MAX_ITEMS", "20"))
+
+# GET /api/v1/dashboard fan-out
+GATEWAY_DASHBOARD_DEADLINE = float(os.getenv("GATEWAY_DASHBOARD_DEADLINE", "1.5"))
+GATEWAY_DASHBOARD_CACHE_TTL = float(os.getenv("GATEWAY_DASHBOARD_CACHE_TTL", "10"))
+
+# Tier-aware rate limiting and load shedding (limits live in api_gateway/ratelimit.py)
+GATEWAY_RATE_LIMIT_ENABLED = os.getenv("GATEWAY_RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# "memory", "sqlite:<path>" (shared by the processes on one host) or "package.module:ClassName" of a common.ratelimit.BucketStore
+GATEWAY_RATE_LIMIT_BACKEND = os.getenv("GATEWAY_RATE_LIMIT_BACKEND", "memory")
+# Event-loop lag above which low-priority routes are shed (0 disables shedding)
+GATEWAY_SHED_LAG_MS = float(os.getenv("GATEWAY_SHED_LAG_MS", "200"))
+
+
+# Largest request body the gateway accepts; bodies are streamed to upstreams, never buffered
+GATEWAY_MAX_BODY_BYTES = int(os.getenv("GATEWAY_MAX_BODY_BYTES", str(25 * 1024 * 1024)))
+
+# Gateway response compression (brotli is used when the package is installed)
+GATEWAY_COMPRESSION_ENABLED = os.getenv("GATEWAY_COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+GATEWAY_COMPRESSION_MIN_BYTES = int(os.getenv("GATEWAY_COMPRESSION_MIN_BYTES", "1024"))
+GATEWAY_GZIP_LEVEL = int(os.getenv("GATEWAY_GZIP_LEVEL", "6"))
+GATEWAY_BROTLI_QUALITY = int(os.getenv("GATEWAY_BROTLI_QUALITY", "4"))
+
+def upstream_timeout(name: str | None) -> float:
+    # Per-upstream override, e.g. REPORT_SERVICE_TIMEOUT=60
+    value = os.getenv(f"{name.upper()}_SERVICE_TIMEOUT") if name else None
+    return float(value) if value else GATEWAY_READ_TIMEOUT
+
+
+def upstream_connect_timeout(name: str | None) -> float:
+    # Per-upstream override, e.g. NOTIFICATION_SERVICE_CONNECT_TIMEOUT=1
+    value = os.getenv(f"{name.upper()}_SERVICE_CONNECT_TIMEOUT") if name else None
+    return float(value) if value else GATEWAY_CONNECT_TIMEOUT
+
 
-def mysql_url() -> str:
+def mysql_url(driver: str = "pymysql") -> str:
     # URL-encode credentials to support special characters like '@' or ':'
     user_enc = quote_plus(MYSQL_USER)
     pass_enc = quote_plus(MYSQL_PASSWORD)
-    return f"mysql+pymysql://{user_enc}:{pass_enc}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
\ No newline at end of file
+    return f"mysql+{driver}://{user_enc}:{pass_enc}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""Create the MySQL schema and Mongo indexes once per deploy instead of on every worker start.
+
+    python -m common.db.bootstrap              # every service
+    python -m common.db.bootstrap auth user    # selected services
+    python -m common.db.bootstrap --skip-mongo # MySQL only
+
+Only missing tables and indexes are created (existing ones are not altered),
+so it is safe to run on every deploy. Services no longer inspect the schema at import;
+set DB_BOOTSTRAP_ON_STARTUP=true to have them do it in their lifespan instead
+(local development with a throwaway database).
+"""
+import argparse
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
+from typing import Iterable, List
+
+from starlette.concurrency import run_in_threadpool
+
+from common.config import DB_BOOTSTRAP_ON_STARTUP
+from common.db.mysql import Base, engine, dispose_async_engine
+
+# Services that own MySQL tables, by the name used on the command line
+MODEL_MODULES = {
+    "auth": "services.auth.models",
+    "user": "services.user.models",
+    "subscription": "services.subscription.models",
+    "payment": "services.payment.models",
+    "affiliates": "services.affiliates.models",
+    "notification": "services.notification.models",
+    "storage": "services.storage.models",
+    "i18n": "services.i18n.models",
+    "pro": "services.pro.models",
+}
+
+# Services that own Mongo indexes; each module has `async def ensure_indexes(db)`
+INDEX_MODULES = {
+    "form": "services.form.indexes",
+}
+
+
+def bootstrap(names: Iterable[str] | None = None) -> List[str]:
+    """Import the services' models and create any missing tables; returns the known table names."""
+    for name in names or MODEL_MODULES:
+        if name in MODEL_MODULES:
+            importlib.import_module(MODEL_MODULES[name])
+    Base.metadata.create_all(bind=engine)
+    return sorted(Base.metadata.tables)
+
+
+async def bootstrap_indexes(names: Iterable[str] | None = None) -> List[str]:
+    """Create any missing Mongo indexes for the given services; returns the index names."""
+    # Imported here so services that only need db_lifespan don't load the Mongo driver
+    from common.db.mongo import get_mongo_db, close_mongo
+
+    created: List[str] = []
+    try:
+        for name in names or INDEX_MODULES:
+            if name in INDEX_MODULES:
+                created += await importlib.import_module(INDEX_MODULES[name]).ensure_indexes(get_mongo_db())
+    finally:
+        close_mongo()
+    return created
+
+
+@asynccontextmanager
+async def db_lifespan(app):
+    """Service lifespan: optional dev-time schema creation, engine disposal on shutdown."""
+    if DB_BOOTSTRAP_ON_STARTUP:
+        await run_in_threadpool(Base.metadata.create_all, bind=engine)
+    yield
+    await dispose_async_engine()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    known = {**MODEL_MODULES, **INDEX_MODULES}
+    parser.add_argument("services", nargs="*", metavar="service", help=", ".join(known))
+    parser.add_argument("--skip-mongo", action="store_true", help="only create MySQL tables")
+    args = parser.parse_args()
+    unknown = sorted(set(args.services) - set(known))
+    if unknown:
+        parser.error(f"unknown service: {', '.join(unknown)}")
+    if not args.services or set(args.services) & set(MODEL_MODULES):
+        tables = bootstrap(args.services)
+        print(f"Schema ready: {len(tables)} tables ({', '.join(tables)})")
+    if not args.skip_mongo and (not args.services or set(args.services) & set(INDEX_MODULES)):
+        indexes = asyncio.run(bootstrap_indexes(args.services))
+        print(f"Mongo indexes ready: {', '.join(indexes)}")
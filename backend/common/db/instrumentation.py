@@ -0,0 +1,112 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from common.config import DB_QUERY_DEBUG, DB_SLOW_QUERY_MS, DB_N_PLUS_ONE_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+# Longest statement text written to the log
+MAX_LOGGED_STATEMENT = 500
+
+
+def _short(statement: str) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= MAX_LOGGED_STATEMENT else statement[:MAX_LOGGED_STATEMENT] + "..."
+
+
+class QueryStats:
+    """Queries run on behalf of one request.
+
+    Sync handlers run in the threadpool with a copy of the request context, so
+    they update the same object the middleware created.
+    """
+
+    __slots__ = ("count", "elapsed", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.elapsed = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.elapsed += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        return [(statement, n) for statement, n in self.statements.items() if n >= threshold]
+
+
+current_queries: ContextVar[QueryStats | None] = ContextVar("db_query_stats", default=None)
+
+
+# Registered on the Engine class, so every engine (primary, replicas, async) is covered
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = current_queries.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if DB_SLOW_QUERY_MS and elapsed * 1000 >= DB_SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, _short(statement))
+
+
+@event.listens_for(Engine, "handle_error")
+def _failed_execute(context):
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+class QueryStatsMiddleware:
+    """Counts queries and DB time per request and logs likely N+1 patterns.
+
+    With DB_QUERY_DEBUG the totals are also logged for every request and
+    returned in X-DB-Queries / X-DB-Time-Ms and a `db` Server-Timing entry.
+    """
+
+    def __init__(self, app, debug: bool = DB_QUERY_DEBUG, n_plus_one: int = DB_N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.debug = debug
+        self.n_plus_one = n_plus_one
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = QueryStats()
+        token = current_queries.set(stats)
+
+        async def send_with_stats(message):
+            if self.debug and message["type"] == "http.response.start":
+                elapsed_ms = f"{stats.elapsed * 1000:.1f}"
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.count).encode()))
+                headers.append((b"x-db-time-ms", elapsed_ms.encode()))
+                headers.append((b"server-timing", f'db;dur={elapsed_ms};desc="{stats.count} queries"'.encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            current_queries.reset(token)
+            self.report(scope, stats)
+
+    def report(self, scope, stats: QueryStats):
+        if self.n_plus_one:
+            for statement, n in stats.repeated(self.n_plus_one):
+                logger.warning("Likely N+1 in %s %s: same statement ran %d times: %s", scope["method"], scope["path"], n, _short(statement))
+        if self.debug and stats.count:
+            logger.info("%s %s: %d queries, %.1f ms in DB", scope["method"], scope["path"], stats.count, stats.elapsed * 1000)
@@ -1,5 +1,21 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from common.config import MONGO_URI, MONGO_DB
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from common.config import MONGO_URI, MONGO_DB, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE
 
-mongo_client = AsyncIOMotorClient(MONGO_URI)
-mongo_db = mongo_client[MONGO_DB]
\ No newline at end of file
+# One client per process, created on first use (inside the running event loop)
+# and closed from the service lifespan with close_mongo()
+_mongo_client: AsyncIOMotorClient | None = None
+
+def get_mongo_client() -> AsyncIOMotorClient:
+    global _mongo_client
+    if _mongo_client is None:
+        _mongo_client = AsyncIOMotorClient(MONGO_URI, maxPoolSize=MONGO_MAX_POOL_SIZE, minPoolSize=MONGO_MIN_POOL_SIZE)
+    return _mongo_client
+
+def get_mongo_db() -> AsyncIOMotorDatabase:
+    return get_mongo_client()[MONGO_DB]
+
+def close_mongo():
+    global _mongo_client
+    if _mongo_client is not None:
+        _mongo_client.close()
+        _mongo_client = None
@@ -1,11 +1,150 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from common.config import mysql_url
+import math
+import time
+from contextvars import ContextVar
+from itertools import cycle
 
-engine = create_engine(mysql_url(), pool_pre_ping=True)
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
+from common.cache import TTLCache
+from common.config import (
+    mysql_url,
+    MYSQL_ASYNC_DRIVER,
+    MYSQL_POOL_SIZE,
+    MYSQL_MAX_OVERFLOW,
+    MYSQL_POOL_TIMEOUT,
+    MYSQL_POOL_RECYCLE,
+    MYSQL_POOL_PRE_PING,
+    MYSQL_REPLICA_URLS,
+    MYSQL_READ_STICKY_SECONDS,
+)
+from common.db.telemetry import InstrumentedQueuePool, InstrumentedAsyncQueuePool, register_engine
+from common.security.jwt import TokenError
+from common.security.principal import PRINCIPAL_HEADER, resolve_claims
+
+def pool_options() -> dict:
+    return {
+        "pool_size": MYSQL_POOL_SIZE,
+        "max_overflow": MYSQL_MAX_OVERFLOW,
+        "pool_timeout": MYSQL_POOL_TIMEOUT,
+        "pool_recycle": MYSQL_POOL_RECYCLE,
+        "pool_pre_ping": MYSQL_POOL_PRE_PING,
+    }
+
+engine = create_engine(mysql_url(), poolclass=InstrumentedQueuePool, **pool_options())
+register_engine("primary", engine)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 Base = declarative_base()
 
+replica_engines = []
+for i, url in enumerate(MYSQL_REPLICA_URLS):
+    replica_engines.append(create_engine(url, poolclass=InstrumentedQueuePool, **pool_options()))
+    register_engine(f"replica_{i}", replica_engines[-1])
+_next_replica = cycle(replica_engines)
+
+class RoutingSession(Session):
+    """Reads go to one replica per session (round-robin); writes, and everything after them, to the primary."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica = next(_next_replica) if replica_engines else None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.replica is None or self._flushing or self.info.get("wrote") or self.info.get("pinned"):
+            return engine
+        return self.replica
+
+ReadSessionLocal = sessionmaker(bind=engine, class_=RoutingSession, autocommit=False, autoflush=False)
+
+# Per request (set by ReadYourWritesMiddleware): whether any session wrote
+_request_writes: ContextVar[dict | None] = ContextVar("db_request_writes", default=None)
+
+def _mark_write(session):
+    session.info["wrote"] = True
+    writes = _request_writes.get()
+    if writes is not None:
+        writes["wrote"] = True
+
+def _flushed(session, flush_context):
+    _mark_write(session)
+
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_write(orm_execute_state.session)
+
+# On Session itself, so AsyncSession (which runs a plain Session underneath) is covered too
+event.listen(Session, "after_flush", _flushed)
+event.listen(Session, "do_orm_execute", _executed)
+
+# Cookie holding the epoch second until which the client's reads use the primary.
+# It travels with the client, so the next request sees its own write whichever
+# worker or service instance serves it.
+READ_STICKY_COOKIE = "db_primary_until"
+
+# Users who wrote recently, for clients that do not keep cookies (same process only)
+_recent_writers = TTLCache(maxsize=100000, ttl=MYSQL_READ_STICKY_SECONDS)
+
+def _caller(request: Request) -> str | None:
+    auth = request.headers.get("authorization", "")
+    if not auth.startswith("Bearer "):
+        return None
+    try:
+        sub = resolve_claims(auth.split(" ", 1)[1], request.headers.get(PRINCIPAL_HEADER)).get("sub")
+    except TokenError:
+        return None
+    return str(sub) if sub is not None else None
+
+def _wrote_recently(request: Request) -> bool:
+    until = request.cookies.get(READ_STICKY_COOKIE)
+    if until:
+        now = time.time()
+        try:
+            # A value further out than a write could have set is ignored
+            if now < float(until) <= now + MYSQL_READ_STICKY_SECONDS + 1:
+                return True
+        except ValueError:
+            pass
+    return bool(_recent_writers.get(_caller(request)))
+
+class ReadYourWritesMiddleware:
+    """Pins a client's reads to the primary for MYSQL_READ_STICKY_SECONDS after it writes.
+
+    Any session that writes during the request (sync or async) flags it. The
+    response then sets READ_STICKY_COOKIE and the caller is remembered in this
+    process. Writes made after the response has started, as in a streamed
+    response, only reach the in-process record. Does nothing without replicas.
+    """
+
+    def __init__(self, app, sticky_seconds: float = MYSQL_READ_STICKY_SECONDS):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replica_engines:
+            await self.app(scope, receive, send)
+            return
+        writes = {}
+        token = _request_writes.set(writes)
+
+        async def send_with_marker(message):
+            if message["type"] == "http.response.start" and writes.get("wrote"):
+                until = math.ceil(time.time() + self.sticky_seconds)
+                cookie = f"{READ_STICKY_COOKIE}={until}; Max-Age={math.ceil(self.sticky_seconds)}; Path=/; HttpOnly; SameSite=Lax"
+                message = dict(message, headers=[*message.get("headers", []), (b"set-cookie", cookie.encode())])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_marker)
+        finally:
+            _request_writes.reset(token)
+            if writes.get("wrote"):
+                # Resolving the caller may confirm a revocation against the database
+                caller = await run_in_threadpool(_caller, Request(scope))
+                if caller is not None:
+                    _recent_writers.set(caller, True)
+
 # FastAPI dependency: yield a session and ensure close after request
 # Note: Do NOT wrap with @contextmanager; FastAPI expects a generator function.
 def get_session():
@@ -13,4 +152,43 @@ def get_session():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# FastAPI dependency for read-heavy endpoints: SELECTs go to a replica when MYSQL_REPLICA_URLS is set,
+# except for clients that wrote within MYSQL_READ_STICKY_SECONDS (see ReadYourWritesMiddleware)
+def get_read_session(request: Request):
+    db = ReadSessionLocal()
+    if replica_engines and _wrote_recently(request):
+        db.info["pinned"] = True
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Async engine, created on first use so services that never touch it don't need the driver
+_async_engine: AsyncEngine | None = None
+_async_sessionmaker: async_sessionmaker | None = None
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        _async_engine = create_async_engine(mysql_url(MYSQL_ASYNC_DRIVER), poolclass=InstrumentedAsyncQueuePool, **pool_options())
+        register_engine("primary_async", _async_engine.sync_engine)
+        # expire_on_commit=False: attributes stay readable after commit without a lazy (sync) reload
+        _async_sessionmaker = async_sessionmaker(bind=_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _async_sessionmaker()
+
+# FastAPI dependency for async handlers; runs on the event loop instead of the threadpool
+async def get_async_session():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def dispose_async_engine():
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _async_sessionmaker = None
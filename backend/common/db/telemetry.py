@@ -0,0 +1,132 @@
+import threading
+import time
+from typing import Dict
+
+from fastapi import APIRouter
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolTelemetry:
+    """Checkout counters for one connection pool; updated from worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.pre_ping_failures = 0
+        self.invalidations = 0
+
+    def wait_started(self):
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def wait_finished(self, elapsed: float, timed_out: bool = False):
+        with self._lock:
+            self.waiting -= 1
+            self.wait_total += elapsed
+            self.wait_max = max(self.wait_max, elapsed)
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+    def on_invalidate(self, error: BaseException | None):
+        with self._lock:
+            # Pre-ping failures surface as DisconnectionError raised during checkout
+            if isinstance(error, exc.DisconnectionError):
+                self.pre_ping_failures += 1
+            else:
+                self.invalidations += 1
+
+    def snapshot(self, pool) -> dict:
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "idle": pool.checkedin(),
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "checkouts": self.checkouts,
+            "wait_ms_total": round(self.wait_total * 1000, 2),
+            "wait_ms_avg": round(self.wait_total * 1000 / (self.checkouts + self.timeouts), 3) if self.checkouts + self.timeouts else 0.0,
+            "wait_ms_max": round(self.wait_max * 1000, 2),
+            "timeouts": self.timeouts,
+            "pre_ping_failures": self.pre_ping_failures,
+            "invalidations": self.invalidations,
+        }
+
+
+class InstrumentedPoolMixin:
+    """Times every checkout, including time spent blocked on a full pool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.telemetry = PoolTelemetry()
+
+    def _do_get(self):
+        telemetry = self.telemetry
+        telemetry.wait_started()
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            telemetry.wait_finished(time.perf_counter() - started, timed_out=True)
+            raise
+        except BaseException:
+            telemetry.wait_finished(time.perf_counter() - started)
+            raise
+        telemetry.wait_finished(time.perf_counter() - started)
+        return conn
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep the counters
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# Engines reported by /health/db-pool, by name
+ENGINES: Dict[str, Engine] = {}
+
+
+def register_engine(name: str, engine: Engine):
+    """Expose an engine built on an instrumented pool (pass engine.sync_engine for async engines)."""
+    ENGINES[name] = engine
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        telemetry = getattr(engine.pool, "telemetry", None)
+        if telemetry is not None:
+            telemetry.on_invalidate(exception)
+
+
+def pool_stats() -> dict:
+    stats = {}
+    for name, engine in ENGINES.items():
+        telemetry = getattr(engine.pool, "telemetry", None)
+        if telemetry is not None:
+            stats[name] = telemetry.snapshot(engine.pool)
+    return stats
+
+
+pool_router = APIRouter()
+
+
+@pool_router.get("/health/db-pool")
+def db_pool_health():
+    return pool_stats()
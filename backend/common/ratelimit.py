@@ -0,0 +1,100 @@
+import asyncio
+import importlib
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Tuple
+
+from common.cache import TTLCache
+
+
+class BucketStore(ABC):
+    """Holds token-bucket state.
+
+    The in-memory store limits per process; a store backed by a shared
+    key-value service lets several gateway replicas enforce one budget.
+    """
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float, float]:
+        """Try to take `cost` tokens. Returns (allowed, tokens_left, retry_after_seconds)."""
+
+
+def refill(tokens: float, updated: float, now: float, rate: float, burst: float, cost: float) -> Tuple[bool, float, float]:
+    tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    return False, tokens, (cost - tokens) / rate
+
+
+class MemoryBucketStore(BucketStore):
+    def __init__(self, maxsize: int = 100000):
+        self._buckets = TTLCache(maxsize=maxsize)
+
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float, float]:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key) or (burst, now)
+        allowed, left, retry_after = refill(tokens, updated, now, rate, burst, cost)
+        # An idle bucket is full again after burst / rate seconds, so it can be dropped then
+        self._buckets.set(key, (left, now), ttl=burst / rate)
+        return allowed, left, retry_after
+
+
+class SqliteBucketStore(BucketStore):
+    """Buckets in a SQLite file, shared by every process on the host that opens it.
+
+    The local stand-in for a networked store: each take is one IMMEDIATE
+    transaction, so gateway workers pointed at the same file draw from one
+    budget. Expired buckets are purged every `purge_every` takes.
+    """
+
+    def __init__(self, path: str = "ratelimit.sqlite3", purge_every: int = 1000):
+        self.path = path
+        self.purge_every = purge_every
+        self._takes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        # Bucket state is disposable; a lost write after a crash only refills a bucket early
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, expires REAL NOT NULL)"
+        )
+
+    def _take(self, key: str, rate: float, burst: float, cost: float) -> Tuple[bool, float, float]:
+        with self._lock:
+            db = self._conn
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                # Wall clock, not monotonic: the timestamps are compared across processes
+                now = time.time()
+                row = db.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens, updated = row or (burst, now)
+                allowed, left, retry_after = refill(tokens, updated, now, rate, burst, cost)
+                db.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?)", (key, left, now, now + burst / rate))
+                self._takes += 1
+                if self._takes % self.purge_every == 0:
+                    db.execute("DELETE FROM buckets WHERE expires < ?", (now,))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return allowed, left, retry_after
+
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float, float]:
+        return await asyncio.to_thread(self._take, key, rate, burst, cost)
+
+    def close(self):
+        self._conn.close()
+
+
+def load_bucket_store(spec: str) -> BucketStore:
+    """`memory`, `sqlite:<path>` or a `package.module:ClassName` import path for a custom store."""
+    if not spec or spec == "memory":
+        return MemoryBucketStore()
+    if spec == "sqlite" or spec.startswith("sqlite:"):
+        return SqliteBucketStore(spec.partition(":")[2] or "ratelimit.sqlite3")
+    module_name, _, class_name = spec.partition(":")
+    cls = getattr(importlib.import_module(module_name), class_name)
+    return cls()
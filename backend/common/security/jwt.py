@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta, timezone
+from uuid import uuid4
 import jwt
 from typing import Dict, Any
 from common.config import JWT_SECRET, JWT_EXPIRES_MINUTES
@@ -8,7 +9,8 @@ ALGORITHM = "HS256"
 def create_access_token(data: Dict[str, Any], expires_minutes: int | None = None) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes or JWT_EXPIRES_MINUTES)
-    to_encode.update({"exp": expire})
+    # jti lets a single token be revoked before it expires (common.security.revocation)
+    to_encode.update({"exp": expire, "jti": to_encode.get("jti") or uuid4().hex})
     return jwt.encode(to_encode, JWT_SECRET, algorithm=ALGORITHM)
 
 class TokenError(Exception):
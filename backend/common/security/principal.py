@@ -0,0 +1,68 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Dict, Any
+
+from common.config import INTERNAL_PRINCIPAL_SECRET
+from common.security.jwt import decode_token, TokenError
+from common.security.revocation import revocations
+
+# Header the API gateway sets after verifying the bearer token once.
+# Services trust it instead of re-decoding the JWT.
+PRINCIPAL_HEADER = "X-Internal-Principal"
+
+_KEY = INTERNAL_PRINCIPAL_SECRET.encode()
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def token_digest(token: str) -> str:
+    return _b64encode(hashlib.sha256(token.encode()).digest()[:16])
+
+
+def sign_principal(claims: Dict[str, Any], token: str, expires_in: int, token_exp: float | None = None) -> str:
+    """Signed principal for `token`: only valid alongside that token, and never past its expiry."""
+    exp = int(time.time()) + expires_in
+    if token_exp:
+        exp = min(exp, int(token_exp))
+    body = dict(claims, exp=exp, tkd=token_digest(token))
+    payload = _b64encode(json.dumps(body, separators=(",", ":"), sort_keys=True).encode())
+    sig = hmac.new(_KEY, payload.encode(), hashlib.sha256).digest()
+    return f"{payload}.{_b64encode(sig)}"
+
+
+def verify_principal(value: str | None, token: str) -> Dict[str, Any] | None:
+    if not value or "." not in value:
+        return None
+    payload, sig = value.rsplit(".", 1)
+    expected = hmac.new(_KEY, payload.encode(), hashlib.sha256).digest()
+    try:
+        if not hmac.compare_digest(expected, _b64decode(sig)):
+            return None
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        return None
+    if claims.get("exp", 0) < time.time():
+        return None
+    # A header replayed with another (or no) bearer token is not the caller's
+    if not hmac.compare_digest(str(claims.get("tkd", "")), token_digest(token)):
+        return None
+    return claims
+
+
+def resolve_claims(token: str, principal_header: str | None = None) -> Dict[str, Any]:
+    """Claims for a request: the gateway's signed principal if it matches the token, else the decoded JWT."""
+    claims = verify_principal(principal_header, token)
+    if claims is None:
+        claims = decode_token(token)
+    if revocations.is_revoked(claims.get("jti")):
+        raise TokenError("Token has been revoked")
+    return claims
@@ -0,0 +1,221 @@
+"""Access-token revocation, checked by every principal resolver without I/O on the common path.
+
+Logout records the token's jti in a RevocationFeed. Every process keeps a
+Bloom filter of the revoked jtis, refreshed from the feed by a background
+thread every TOKEN_REVOCATION_SYNC_SECONDS. A jti that is not in the filter,
+which is almost every request, is accepted after a few hash probes. A filter
+hit may be a false positive, so it is confirmed against the feed and the
+answer cached.
+
+Sync protocol, implemented by each feed:
+
+    revoke(jti, user_id, expires_at)   record a revocation (expires_at: epoch seconds)
+    changes(cursor) -> (cursor, [(jti, expires_at), ...])
+                                       revocations recorded after `cursor`; a None cursor
+                                       returns every unexpired one and a cursor to continue from.
+                                       Cursors are opaque to the caller.
+    is_revoked(jti) -> bool            authoritative check, used for filter hits
+
+Filters are rebuilt from a None cursor every TOKEN_REVOCATION_REBUILD_SECONDS
+so expired jtis drop out (Bloom filters cannot delete). TOKEN_REVOCATION_FEED
+picks the feed: `sql` (the auth service's revoked_access_tokens table in the
+shared MySQL database), `memory` (in-process, a local stand-in for development
+and the monolith), `off`, or a `package.module:ClassName` path.
+
+The `sql` feed lives with its table in services.auth and is registered when
+services.auth.models is imported. Processes that never load it (the
+calculation and report services) have no feed and open no database
+connections for it: they rely on the gateway, which checks every request
+before it signs the principal header.
+"""
+import asyncio
+import importlib
+from abc import ABC, abstractmethod
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from common.bloom import BloomFilter
+from common.cache import TTLCache
+from common.config import (
+    JWT_EXPIRES_MINUTES,
+    TOKEN_REVOCATION_FEED,
+    TOKEN_REVOCATION_SYNC_SECONDS,
+    TOKEN_REVOCATION_REBUILD_SECONDS,
+    TOKEN_REVOCATION_CAPACITY,
+    TOKEN_REVOCATION_ERROR_RATE,
+)
+
+logger = logging.getLogger(__name__)
+
+Changes = Tuple[Any, List[Tuple[str, float]]]
+
+
+class RevocationFeed(ABC):
+    @abstractmethod
+    def revoke(self, jti: str, user_id: int | None, expires_at: float):
+        ...
+
+    @abstractmethod
+    def changes(self, cursor: Any) -> Changes:
+        ...
+
+    @abstractmethod
+    def is_revoked(self, jti: str) -> bool:
+        ...
+
+
+class MemoryRevocationFeed(RevocationFeed):
+    """Per-process feed: only the process that revoked a token sees it."""
+
+    def __init__(self):
+        self._entries: List[Tuple[str, float]] = []
+        self._revoked: dict = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, jti: str, user_id: int | None, expires_at: float):
+        with self._lock:
+            self._entries.append((jti, expires_at))
+            self._revoked[jti] = expires_at
+
+    def changes(self, cursor: int | None) -> Changes:
+        now = time.time()
+        with self._lock:
+            entries = self._entries[cursor or 0:]
+            return len(self._entries), [e for e in entries if e[1] > now]
+
+    def is_revoked(self, jti: str) -> bool:
+        return self._revoked.get(jti, 0) > time.time()
+
+
+# Feeds by TOKEN_REVOCATION_FEED name; services that own a feed's storage add theirs
+FEEDS: Dict[str, Callable[[], RevocationFeed]] = {"memory": MemoryRevocationFeed}
+
+
+def register_revocation_feed(name: str, factory: Callable[[], RevocationFeed]):
+    """Make a feed available by name, and install it now if it is the configured one."""
+    FEEDS[name] = factory
+    if name == TOKEN_REVOCATION_FEED and revocations.feed is None:
+        revocations.feed = factory()
+
+
+def load_revocation_feed(spec: str) -> RevocationFeed | None:
+    """A registered feed name, `off` or a `package.module:ClassName` import path for a custom feed.
+
+    A name nobody has registered (yet) gives no feed.
+    """
+    if not spec or spec == "off":
+        return None
+    if spec in FEEDS:
+        return FEEDS[spec]()
+    if ":" not in spec:
+        return None
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class RevocationList:
+    def __init__(
+        self,
+        feed: RevocationFeed | None = None,
+        interval: float = TOKEN_REVOCATION_SYNC_SECONDS,
+        rebuild_every: float = TOKEN_REVOCATION_REBUILD_SECONDS,
+        capacity: int = TOKEN_REVOCATION_CAPACITY,
+        error_rate: float = TOKEN_REVOCATION_ERROR_RATE,
+    ):
+        self.feed = feed
+        self.interval = interval
+        self.rebuild_every = rebuild_every
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.filter = BloomFilter(capacity, error_rate)
+        self.cursor: Any = None
+        self.built_at = 0.0
+        # Answers for filter hits; negatives only briefly, the jti may be revoked later
+        self._confirmed = TTLCache(maxsize=10000, ttl=max(1.0, interval))
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.hits = 0
+        self.false_positives = 0
+
+    @classmethod
+    def from_config(cls) -> "RevocationList":
+        return cls(load_revocation_feed(TOKEN_REVOCATION_FEED))
+
+    def sync(self):
+        """Pull new revocations into the filter, rebuilding it when it is due."""
+        if self.cursor is None or time.monotonic() - self.built_at >= self.rebuild_every:
+            cursor, entries = self.feed.changes(None)
+            fresh = BloomFilter(max(self.capacity, 2 * len(entries)), self.error_rate)
+            fresh.update(jti for jti, _ in entries)
+            with self._lock:
+                self.filter, self.cursor = fresh, cursor
+            self.built_at = time.monotonic()
+            return
+        cursor, entries = self.feed.changes(self.cursor)
+        with self._lock:
+            self.filter.update(jti for jti, _ in entries)
+            self.cursor = cursor
+
+    def _run(self):
+        while True:
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Token revocation sync failed")
+            time.sleep(self.interval)
+
+    def start(self):
+        if self._thread is None and self.feed is not None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="token-revocation-sync", daemon=True)
+                    self._thread.start()
+
+    def revoke(self, jti: str, user_id: int | None, expires_at: float):
+        if self.feed is None:
+            return
+        self.feed.revoke(jti, user_id, expires_at)
+        with self._lock:
+            self.filter.add(jti)
+        self._confirmed.set(jti, True, ttl=max(1.0, expires_at - time.time()))
+
+    def _maybe_revoked(self, jti: str | None) -> bool | None:
+        """False when the filter rules the jti out, a cached answer, or None when the feed must be asked."""
+        # Tokens issued before jti was added carry none and cannot be revoked individually
+        if not jti or self.feed is None:
+            return False
+        if self._thread is None:
+            self.start()
+        if jti not in self.filter:
+            return False
+        return self._confirmed.get(jti)
+
+    def _confirm(self, jti: str) -> bool:
+        revoked = self.feed.is_revoked(jti)
+        self.hits += 1
+        self.false_positives += not revoked
+        # A revocation is permanent; a false positive is rechecked after `interval`
+        self._confirmed.set(jti, revoked, ttl=JWT_EXPIRES_MINUTES * 60 if revoked else None)
+        return revoked
+
+    def is_revoked(self, jti: str | None) -> bool:
+        revoked = self._maybe_revoked(jti)
+        return self._confirm(jti) if revoked is None else revoked
+
+    async def is_revoked_async(self, jti: str | None) -> bool:
+        """is_revoked for the event loop: a filter hit is confirmed against the feed in a worker thread."""
+        revoked = self._maybe_revoked(jti)
+        return await asyncio.to_thread(self._confirm, jti) if revoked is None else revoked
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.filter),
+            "filter_bytes": len(self.filter.bits),
+            "hits": self.hits,
+            "false_positives": self.false_positives,
+        }
+
+
+revocations = RevocationList.from_config()
@@ -0,0 +1,195 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable, List
+
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from common.cache import TTLCache
+from common.config import USER_CACHE_SIZE, USER_CACHE_SYNC_SECONDS, USER_CACHE_TTL
+from common.db import mysql
+from common.db.mysql import get_session, get_async_session
+from common.security.jwt import TokenError
+from common.security.principal import resolve_claims
+
+logger = logging.getLogger(__name__)
+
+# Columns never copied into a cached user
+PRIVATE_FIELDS = {"password_hash", "mfa_secret"}
+
+
+class UserSnapshot(SimpleNamespace):
+    """Detached, credential-free copy of a users row; safe to share between requests."""
+
+
+def snapshot(user: Any) -> UserSnapshot:
+    return UserSnapshot(**{c.key: getattr(user, c.key) for c in type(user).__table__.columns if c.key not in PRIVATE_FIELDS})
+
+
+# ORM model of the users table. The auth service owns it and registers it here
+# (services.auth.models), so common code does not import a service.
+_user_model = None
+
+
+def register_user_model(model):
+    global _user_model
+    _user_model = model
+
+
+def _model():
+    if _user_model is None:
+        raise RuntimeError("No user model registered; import services.auth.models before serving requests")
+    return _user_model
+
+
+_users = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+_subscribers: List[Callable[[int], None]] = []
+# Bumped on every invalidation; a lookup that raced with one does not repopulate the cache
+_version = 0
+_version_lock = threading.Lock()
+
+
+def subscribe(callback: Callable[[int], None]):
+    """Register a callback run on every invalidation (e.g. to fan out to other processes)."""
+    _subscribers.append(callback)
+
+
+def _evict(user_id: int):
+    global _version
+    with _version_lock:
+        _version += 1
+    _users.pop(int(user_id))
+
+
+def invalidate_user(user_id: int):
+    """Evict a user after a change to their row; call once the change is committed."""
+    _evict(user_id)
+    for callback in list(_subscribers):
+        callback(int(user_id))
+
+
+# Each sync re-reads rows stamped this long before the cursor: updated_at has
+# one-second precision, is set by the writing host's clock, and a transaction
+# may commit well after it stamped its rows.
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class UserChangeSync:
+    """Evicts users whose row another process changed, found by polling users.updated_at."""
+
+    def __init__(self, interval: float = USER_CACHE_SYNC_SECONDS):
+        self.interval = interval
+        self.cursor: datetime | None = None
+        # id -> updated_at of rows already seen inside the overlap window
+        self._seen: dict = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def sync(self):
+        model = _model()
+        db = mysql.SessionLocal()
+        try:
+            if self.cursor is None:
+                self.cursor = db.scalar(select(func.max(model.updated_at)))
+                if self.cursor is None:
+                    return
+            rows = db.execute(
+                select(model.id, model.updated_at).where(model.updated_at >= self.cursor - SYNC_OVERLAP)
+            ).all()
+        finally:
+            db.close()
+        for user_id, updated_at in rows:
+            if self._seen.get(user_id) != updated_at:
+                _evict(user_id)
+                self._seen[user_id] = updated_at
+            if updated_at > self.cursor:
+                self.cursor = updated_at
+        floor = self.cursor - SYNC_OVERLAP
+        self._seen = {k: v for k, v in self._seen.items() if v >= floor}
+
+    def _run(self):
+        while True:
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("User cache sync failed")
+            time.sleep(self.interval)
+
+    def start(self):
+        if self.interval and self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="user-cache-sync", daemon=True)
+                    self._thread.start()
+
+
+user_changes = UserChangeSync()
+
+
+def _user_id(authorization: str | None, principal_header: str | None) -> int:
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    token = authorization.split(" ", 1)[1]
+    try:
+        claims = resolve_claims(token, principal_header)
+    except TokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    try:
+        return int(claims.get("sub"))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+
+def _remember(user_id: int, user: Any, version: int) -> UserSnapshot | None:
+    if user is None:
+        return None
+    cached = snapshot(user)
+    if version == _version:
+        _users.set(user_id, cached)
+    return cached
+
+
+def load_user(db: Session, user_id: int) -> UserSnapshot | None:
+    """Cached users row, or None if there is no such user."""
+    user_changes.start()
+    user = _users.get(user_id)
+    if user is None:
+        version = _version
+        user = _remember(user_id, db.get(_model(), user_id), version)
+    return user
+
+
+def _active(user: UserSnapshot | None) -> UserSnapshot:
+    if user is None or not user.active:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return user
+
+
+def require_user(
+    authorization: str = Header(None),
+    x_internal_principal: str = Header(None),
+    db: Session = Depends(get_session),
+) -> UserSnapshot:
+    """Authenticated, active user; served from the cache without a SELECT when possible."""
+    return _active(load_user(db, _user_id(authorization, x_internal_principal)))
+
+
+async def require_user_async(
+    authorization: str = Header(None),
+    x_internal_principal: str = Header(None),
+    db: AsyncSession = Depends(get_async_session),
+) -> UserSnapshot:
+    """require_user for handlers on the async session."""
+    user_id = _user_id(authorization, x_internal_principal)
+    user_changes.start()
+    user = _users.get(user_id)
+    if user is None:
+        version = _version
+        user = _remember(user_id, await db.get(_model(), user_id), version)
+    return _active(user)
+
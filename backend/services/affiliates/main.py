@@ -1,11 +1,14 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Header
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File, Query
 from typing import Optional, List
 from sqlalchemy.orm import Session
 from datetime import datetime, date
 import uuid
 
-from common.db.mysql import get_session, engine
-from common.security.jwt import decode_token
+from common.db.mysql import get_session, get_read_session, ReadYourWritesMiddleware
+from common.db.telemetry import pool_router
+from common.db.bootstrap import db_lifespan
+from common.db.instrumentation import QueryStatsMiddleware
+from common.security.users import require_user
 from services.auth.models import User  # reusing User
 
 from .models import AffiliateProfile, AffiliateApplication, Referral, Commission, Payout, AffiliateBankAccount
@@ -32,14 +35,10 @@ from .schemas import (
 )
 
 
-app = FastAPI(title="Affiliates Service", version="1.0.0")
+app = FastAPI(title="Affiliates Service", version="1.0.0", lifespan=db_lifespan)
 router = APIRouter(prefix="/api/v1/affiliates", tags=["affiliates"])
 
 
-# Ensure tables exist
-from common.db.mysql import Base
-Base.metadata.create_all(bind=engine)
-
 
 def _ensure_affiliate_profile(session: Session, user: User) -> AffiliateProfile:
     profile = session.query(AffiliateProfile).filter_by(user_id=user.id).first()
@@ -55,18 +54,7 @@ def _ensure_affiliate_profile(session: Session, user: User) -> AffiliateProfile:
     return profile
 
 
-def require_auth(authorization: str = Header(None), db: Session = Depends(get_session)) -> User:
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    token = authorization.split(" ", 1)[1]
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user_id = payload.get("sub")
-    user = db.get(User, user_id)
-    if not user or not user.active:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return user
+require_auth = require_user
 
 
 def require_affiliate(user: User = Depends(require_auth), session: Session = Depends(get_session)) -> User:
@@ -183,7 +171,7 @@ async def upload_landing_photo(file: UploadFile = File(...), user: User = Depend
 
 
 @router.get("/dashboard", response_model=DashboardResponse, dependencies=[Depends(require_affiliate)])
-def dashboard(user: User = Depends(require_auth), session: Session = Depends(get_session)):
+def dashboard(user: User = Depends(require_auth), session: Session = Depends(get_read_session)):
     total_ref = session.query(Referral).filter_by(affiliate_user_id=user.id).count()
     active_advisors = session.query(Referral).filter_by(affiliate_user_id=user.id, status="active").count()
     pending_commission = session.query(Commission).filter_by(affiliate_user_id=user.id, status="pending_approval").with_entities(Commission.commission_amount).all()
@@ -209,7 +197,7 @@ def list_referrals(
     page: int = 1,
     limit: int = 20,
     user: User = Depends(require_auth),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
     q = session.query(Referral).filter_by(affiliate_user_id=user.id)
     if status_filter:
@@ -244,7 +232,7 @@ def list_commissions(
     page: int = 1,
     limit: int = 20,
     user: User = Depends(require_auth),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
     q = session.query(Commission).filter_by(affiliate_user_id=user.id)
     if status_filter:
@@ -291,7 +279,7 @@ def get_commission(commission_id: int, user: User = Depends(require_auth), sessi
 
 
 @router.get("/payouts", response_model=PayoutListResponse, dependencies=[Depends(require_affiliate)])
-def list_payouts(user: User = Depends(require_auth), session: Session = Depends(get_session)):
+def list_payouts(user: User = Depends(require_auth), session: Session = Depends(get_read_session)):
     rows = session.query(Payout).filter_by(affiliate_user_id=user.id).order_by(Payout.processed_at.desc()).all()
     items = [
         PayoutItem(
@@ -311,7 +299,7 @@ def performance(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     user: User = Depends(require_auth),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
     # Basic aggregate demo; replace with real analytics logic
     q_ref = session.query(Referral).filter_by(affiliate_user_id=user.id)
@@ -426,6 +414,9 @@ def marketing_assets(user: User = Depends(require_auth)):
     return MarketingAssetsResponse(items=items)
 
 app.include_router(router)
+app.include_router(pool_router)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatsMiddleware)
 
 # Admin guard consistent with other services
 def require_admin(user: User = Depends(require_auth)) -> User:
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from secrets import token_urlsafe
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.config import REFRESH_EXPIRES_MINUTES
+from services.auth.models import User, RefreshToken
+from services.auth.hashing import hasher
+from services.auth.repository import hash_refresh_token, stale_refresh_tokens, revoke_refresh_tokens
+
+# Async counterparts of the hot paths in repository.py, for handlers on get_async_session
+
+async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
+    stmt = select(User).where(User.email == email)
+    return await db.scalar(stmt)
+
+async def get_user_by_id(db: AsyncSession, user_id: int) -> User | None:
+    return await db.get(User, user_id)
+
+async def verify_password(plain_password: str, password_hash: str) -> bool:
+    # pbkdf2 is CPU-bound; it runs in the hashing process pool
+    return (await hasher.verify_and_update(plain_password, password_hash))[0]
+
+async def verify_and_rehash(user: User, plain_password: str) -> bool:
+    """Check the password; an outdated hash is replaced on the user (saved with the caller's next commit)."""
+    ok, new_hash = await hasher.verify_and_update(plain_password, user.password_hash)
+    if ok and new_hash:
+        user.password_hash = new_hash
+    return ok
+
+async def create_refresh_token(db: AsyncSession, user_id: int, token: str | None = None) -> RefreshToken:
+    token_value = token or token_urlsafe(64)
+    expires = datetime.now(timezone.utc) + timedelta(minutes=REFRESH_EXPIRES_MINUTES)
+    rt = RefreshToken(user_id=user_id, token_hash=hash_refresh_token(token_value), expires_at=expires)
+    db.add(rt)
+    await db.flush()
+    stale = (await db.scalars(stale_refresh_tokens(user_id))).all()
+    if stale:
+        await db.execute(revoke_refresh_tokens(stale))
+    await db.commit()
+    rt.token = token_value
+    return rt
+
+async def revoke_refresh_tokens_for_user(db: AsyncSession, user_id: int):
+    stmt = (
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked == False)
+        .values(revoked=True, expires_at=datetime.now(timezone.utc))
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+async def get_valid_refresh_token(db: AsyncSession, token: str) -> RefreshToken | None:
+    stmt = select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(token), RefreshToken.revoked == False)
+    rt = await db.scalar(stmt)
+    if not rt:
+        return None
+    # Treat naive DB datetimes as UTC, as the sync repository does
+    expires_at = rt.expires_at
+    if getattr(expires_at, "tzinfo", None) is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if expires_at < datetime.now(timezone.utc):
+        return None
+    return rt
@@ -0,0 +1,238 @@
+"""Bulk user provisioning for POST /auth/admin/bulk-register.
+
+The upload is CSV (with a header row of RegisterRequest field names) or
+NDJSON, one user per line. It is parsed record by record as it arrives, and
+rows are validated and provisioned in chunks of BULK_REGISTER_CHUNK:
+
+1. one SELECT finds emails that are already registered,
+2. passwords are hashed on every hashing worker,
+3. users and their verification tokens are written with multi-row INSERTs in
+   one transaction per chunk.
+
+One NDJSON result line per row is streamed back as each chunk commits,
+followed by a summary line.
+"""
+import codecs
+import csv
+import json
+from datetime import datetime, timedelta
+from secrets import token_urlsafe
+from typing import AsyncIterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import StreamingResponse
+
+from common.config import BULK_REGISTER_CHUNK, BULK_REGISTER_MAX_ROWS
+from common.db.mysql import AsyncSessionLocal
+from services.auth.email_index import email_index, normalize_email
+from services.auth.hashing import hasher
+from services.auth.models import User, EmailVerification
+from services.auth.schemas import RegisterRequest
+
+Row = Tuple[int, RegisterRequest]
+
+
+def describe(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(f"{'.'.join(str(p) for p in e['loc']) or 'row'}: {e['msg']}" for e in exc.errors())
+    return str(exc)
+
+
+async def records(chunks: AsyncIterator[bytes], is_csv: bool) -> AsyncIterator[str]:
+    """The upload split into records as it arrives; a CSV record spans lines while a quoted field is open."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = record = ""
+
+    def complete(line: str) -> str | None:
+        nonlocal record
+        record += line
+        if is_csv and record.count('"') % 2:
+            return None
+        done, record = record, ""
+        return done
+
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for text in lines:
+            done = complete(text + "\n")
+            if done is not None:
+                yield done
+    buffer += decoder.decode(b"", final=True)
+    if buffer or record:
+        yield record + buffer
+
+
+async def parse_rows(chunks: AsyncIterator[bytes], is_csv: bool) -> AsyncIterator[Tuple[int, RegisterRequest | None, dict]]:
+    """(row number, validated request or None, result line for a rejected row)."""
+    header = None
+    row = 0
+    async for record in records(chunks, is_csv):
+        if is_csv:
+            values = next(csv.reader([record]), [])
+            if not values:
+                continue
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            data = {k: v for k, v in zip(header, values) if k and v != ""}
+        elif record.strip():
+            data = record
+        else:
+            continue
+        row += 1
+        try:
+            if not is_csv:
+                data = json.loads(record)
+            yield row, RegisterRequest(**data), {}
+        except (ValueError, TypeError) as exc:
+            email = data.get("email") if isinstance(data, dict) else None
+            yield row, None, {"row": row, "email": email, "status": "invalid", "detail": describe(exc)}
+
+
+def user_values(req: RegisterRequest, password_hash: str, now: datetime) -> dict:
+    # Same defaults as /auth/register and create_user
+    return {
+        "user_type": req.user_type or "advisor",
+        "name": req.name,
+        "email": req.email,
+        "password_hash": password_hash,
+        "mobile": req.mobile,
+        "organization": req.organization,
+        "role": req.role,
+        "city": req.city,
+        "tier": req.tier or "Starter",
+        "terms_accepted": req.terms_accepted,
+        "locked_fields_after": now + timedelta(hours=72),
+    }
+
+
+async def insert_chunk(db: AsyncSession, rows: List[Row], hashes: List[str]) -> List[dict]:
+    now = datetime.utcnow()
+    await db.execute(insert(User), [user_values(req, h, now) for (_, req), h in zip(rows, hashes)])
+    ids = {
+        normalize_email(email): user_id
+        for user_id, email in await db.execute(select(User.id, User.email).where(User.email.in_([req.email for _, req in rows])))
+    }
+    tokens = [token_urlsafe(32) for _ in rows]
+    await db.execute(
+        insert(EmailVerification),
+        [{"user_id": ids[normalize_email(req.email)], "token": token} for (_, req), token in zip(rows, tokens)],
+    )
+    await db.commit()
+    return [
+        {"row": row, "email": req.email, "status": "created", "user_id": ids[normalize_email(req.email)], "verification_token": token}
+        for (row, req), token in zip(rows, tokens)
+    ]
+
+
+# Unique columns of users a row can collide on besides email
+UNIQUE_FIELDS = ("mobile",)
+
+
+def conflict(exc: IntegrityError) -> dict:
+    """Result for a row refused by a unique key: only an email collision means the user exists."""
+    message = str(exc.orig)
+    if "email" in message:
+        return {"status": "exists"}
+    field = next((f for f in UNIQUE_FIELDS if f in message), None)
+    return {"status": "invalid", "detail": f"{field}: already registered" if field else message}
+
+
+async def insert_one_by_one(db: AsyncSession, rows: List[Row], hashes: List[str]) -> List[dict]:
+    # Fallback when a chunk hits a unique key, e.g. an email registered concurrently or a reused mobile
+    results = []
+    for (row, req), password_hash in zip(rows, hashes):
+        try:
+            results += await insert_chunk(db, [(row, req)], [password_hash])
+        except IntegrityError as exc:
+            await db.rollback()
+            results.append(dict({"row": row, "email": req.email}, **conflict(exc)))
+    return results
+
+
+async def provision(db: AsyncSession, rows: List[Row]) -> List[dict]:
+    results: List[dict] = []
+    taken = {normalize_email(e) for e in (await db.scalars(select(User.email).where(User.email.in_([r.email for _, r in rows])))).all()}
+    fresh: List[Row] = []
+    for row, req in rows:
+        key = normalize_email(req.email)
+        if key in taken:
+            results.append({"row": row, "email": req.email, "status": "exists"})
+            continue
+        # Later duplicates within the upload are reported as existing too
+        taken.add(key)
+        fresh.append((row, req))
+    if not fresh:
+        return results
+    hashes = await hasher.hash_many([req.password for _, req in fresh])
+    try:
+        results += await insert_chunk(db, fresh, hashes)
+    except IntegrityError:
+        await db.rollback()
+        results += await insert_one_by_one(db, fresh, hashes)
+    for result in results:
+        if result["status"] == "created":
+            email_index.add(result["email"])
+    return sorted(results, key=lambda r: r["row"])
+
+
+def line(payload: dict) -> bytes:
+    return (json.dumps(payload) + "\n").encode()
+
+
+async def bulk_register(chunks: AsyncIterator[bytes], is_csv: bool) -> AsyncIterator[bytes]:
+    counts = {"created": 0, "exists": 0, "invalid": 0}
+    pending: List[Row] = []
+    async with AsyncSessionLocal() as db:
+
+        async def flush():
+            for result in await provision(db, pending):
+                counts[result["status"]] += 1
+                yield line(result)
+            pending.clear()
+
+        async for row, req, rejected in parse_rows(chunks, is_csv):
+            if row > BULK_REGISTER_MAX_ROWS:
+                yield line({"row": row, "status": "invalid", "detail": f"At most {BULK_REGISTER_MAX_ROWS} rows per upload"})
+                counts["invalid"] += 1
+                break
+            if req is None:
+                counts["invalid"] += 1
+                yield line(rejected)
+                continue
+            pending.append((row, req))
+            if len(pending) >= BULK_REGISTER_CHUNK:
+                async for out in flush():
+                    yield out
+        if pending:
+            async for out in flush():
+                yield out
+    yield line({"summary": counts})
+
+
+class UploadStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body iterator reads the request body itself.
+
+    StreamingResponse watches receive() for a disconnect while it streams,
+    which would swallow the upload; here the iterator is the only reader and
+    a disconnect reaches it as ClientDisconnect. Headers go out with the
+    first chunk, once the upload is being read.
+    """
+
+    async def stream_response(self, send):
+        chunks = self.body_iterator.__aiter__()
+        first = await anext(chunks, b"")
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.body", "body": first, "more_body": True})
+        async for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,140 @@
+"""In-process index of registered emails for /auth/check-email.
+
+A Bloom filter of normalized emails answers "not registered" without touching
+the database. Only filter hits (registered emails and ~EMAIL_INDEX_ERROR_RATE
+false positives) run a SELECT, and registered emails are then cached for
+EMAIL_CHECK_CACHE_TTL. A background thread builds the filter at startup and
+every EMAIL_INDEX_SYNC_SECONDS adds the users created or changed since the last
+sync (by users.updated_at), so registrations on other auth replicas and email
+changes in the user service show up within one interval. The filter is rebuilt
+every EMAIL_INDEX_REBUILD_SECONDS to drop emails that are no longer in use.
+Until the first build completes every check goes to the database.
+
+Registration itself always checks the database; the index only serves the
+availability hint.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.bloom import BloomFilter
+from common.cache import TTLCache
+from common.config import (
+    EMAIL_INDEX_SYNC_SECONDS,
+    EMAIL_INDEX_REBUILD_SECONDS,
+    EMAIL_INDEX_CAPACITY,
+    EMAIL_INDEX_ERROR_RATE,
+    EMAIL_CHECK_CACHE_TTL,
+)
+from common.db.mysql import SessionLocal
+from services.auth.models import User
+
+logger = logging.getLogger(__name__)
+
+# Each sync re-reads rows stamped this long before the cursor: updated_at has
+# one-second precision, is set by the writing host's clock, and a transaction
+# may commit well after it stamped its rows. Re-adding an email is harmless.
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def normalize_email(email: str) -> str:
+    # users.email compares case-insensitively under MySQL's default collation
+    return email.strip().lower()
+
+
+class EmailIndex:
+    def __init__(
+        self,
+        interval: float = EMAIL_INDEX_SYNC_SECONDS,
+        rebuild_every: float = EMAIL_INDEX_REBUILD_SECONDS,
+        capacity: int = EMAIL_INDEX_CAPACITY,
+        error_rate: float = EMAIL_INDEX_ERROR_RATE,
+    ):
+        self.interval = interval
+        self.rebuild_every = rebuild_every
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.filter: BloomFilter | None = None
+        self.cursor: datetime | None = None
+        self.built_at = 0.0
+        self.positives = TTLCache(maxsize=10000, ttl=EMAIL_CHECK_CACHE_TTL)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.negatives = 0
+        self.lookups = 0
+
+    def sync(self):
+        db = SessionLocal()
+        try:
+            if self.filter is None or time.monotonic() - self.built_at >= self.rebuild_every:
+                count = db.scalar(select(func.count(User.id))) or 0
+                fresh = BloomFilter(max(self.capacity, 2 * count), self.error_rate)
+                cursor = self._load(db, fresh, None)
+                with self._lock:
+                    self.filter, self.cursor = fresh, cursor
+                self.built_at = time.monotonic()
+            else:
+                self.cursor = self._load(db, self.filter, self.cursor)
+        finally:
+            db.close()
+
+    def _load(self, db, target: BloomFilter, cursor: datetime | None) -> datetime | None:
+        stmt = select(User.email, User.updated_at).execution_options(yield_per=10000)
+        if cursor is not None:
+            stmt = stmt.where(User.updated_at >= cursor - SYNC_OVERLAP)
+        for email, updated_at in db.execute(stmt):
+            with self._lock:
+                target.add(normalize_email(email))
+            if updated_at is not None and (cursor is None or updated_at > cursor):
+                cursor = updated_at
+        return cursor
+
+    def _run(self):
+        while True:
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Email index sync failed")
+            time.sleep(self.interval)
+
+    def start(self):
+        if self.interval and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="email-index-sync", daemon=True)
+            self._thread.start()
+
+    def add(self, email: str):
+        """Record a registration (or email change) made by this process right away."""
+        key = normalize_email(email)
+        if self.filter is not None:
+            with self._lock:
+                self.filter.add(key)
+        self.positives.set(key, True)
+
+    async def exists(self, db: AsyncSession, email: str) -> bool:
+        key = normalize_email(email)
+        # A rebuild swaps in a filter loaded before this process's latest add(); positives still have it
+        if self.positives.get(key):
+            return True
+        if self.filter is not None and key not in self.filter:
+            self.negatives += 1
+            return False
+        self.lookups += 1
+        found = await db.scalar(select(User.id).where(User.email == email)) is not None
+        if found:
+            self.positives.set(key, True)
+        return found
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.filter is not None,
+            "entries": len(self.filter) if self.filter is not None else 0,
+            "negatives": self.negatives,
+            "lookups": self.lookups,
+        }
+
+
+email_index = EmailIndex()
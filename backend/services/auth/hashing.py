@@ -0,0 +1,134 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from common.config import PASSWORD_HASH_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_WAIT_MS
+
+# Use a hashing scheme that avoids bcrypt backend issues. Hashes with fewer rounds
+# than configured are flagged by verify_and_update and rehashed on the next login.
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=PASSWORD_HASH_ROUNDS,
+)
+
+
+# Run inside the worker processes; they return their own CPU time for the backlog estimate
+def _hash(password: str) -> tuple[str, float]:
+    started = time.perf_counter()
+    return pwd_context.hash(password), time.perf_counter() - started
+
+
+def _verify_and_update(password: str, password_hash: str) -> tuple[tuple[bool, str | None], float]:
+    started = time.perf_counter()
+    return pwd_context.verify_and_update(password, password_hash), time.perf_counter() - started
+
+
+class HashingOverloaded(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("Password hashing backlog is full")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """Runs password hashing in a dedicated process pool with admission control.
+
+    pbkdf2 holds the GIL for its whole run, so hashing in the request
+    threadpool stalls every other handler in the process. Here it runs in
+    `workers` processes instead. A request is refused up front (HashingOverloaded)
+    when the work already queued would keep it waiting longer than `max_wait`,
+    rather than piling up behind a login storm. workers=0 hashes in the
+    request threadpool, as before, without admission control.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_wait: float = PASSWORD_HASH_MAX_WAIT_MS / 1000):
+        self.workers = workers
+        self.max_wait = max_wait
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        # Moving average of one hash/verify, seeded with a guess until the first one completes
+        self.cost = 0.05
+        self.rejected = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that already runs an event loop and threads is unsafe
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _submit(self, fn, *args, admit: bool = True) -> Future:
+        with self._lock:
+            wait = max(0, self.pending - self.workers + 1) * self.cost / self.workers
+            if admit and wait > self.max_wait:
+                self.rejected += 1
+                raise HashingOverloaded(retry_after=wait)
+            self.pending += 1
+            future = self._pool().submit(fn, *args)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future: Future):
+        with self._lock:
+            self.pending -= 1
+            if not future.cancelled() and future.exception() is None:
+                self.cost = 0.8 * self.cost + 0.2 * future.result()[1]
+
+    async def hash(self, password: str) -> str:
+        if not self.workers:
+            return await run_in_threadpool(pwd_context.hash, password)
+        result, _ = await asyncio.wrap_future(self._submit(_hash, password))
+        return result
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """Hash a batch on every worker (bulk provisioning).
+
+        Not subject to admission control. At most two hashes per worker are
+        queued at a time, so logins arriving meanwhile wait behind a couple of
+        hashes rather than the whole batch.
+        """
+        if not self.workers:
+            return await run_in_threadpool(lambda: [pwd_context.hash(p) for p in passwords])
+        window = asyncio.Semaphore(2 * self.workers)
+
+        async def one(password: str) -> str:
+            async with window:
+                result, _ = await asyncio.wrap_future(self._submit(_hash, password, admit=False))
+                return result
+
+        return list(await asyncio.gather(*(one(p) for p in passwords)))
+
+    async def verify_and_update(self, password: str, password_hash: str) -> tuple[bool, str | None]:
+        """(matches, new hash or None); a new hash means the stored one uses outdated parameters."""
+        if not self.workers:
+            return await run_in_threadpool(pwd_context.verify_and_update, password, password_hash)
+        result, _ = await asyncio.wrap_future(self._submit(_verify_and_update, password, password_hash))
+        return result
+
+    # For sync handlers: the calling thread waits, but the CPU work happens in the pool
+    def hash_blocking(self, password: str) -> str:
+        if not self.workers:
+            return pwd_context.hash(password)
+        return self._submit(_hash, password).result()[0]
+
+    def verify_and_update_blocking(self, password: str, password_hash: str) -> tuple[bool, str | None]:
+        if not self.workers:
+            return pwd_context.verify_and_update(password, password_hash)
+        return self._submit(_verify_and_update, password, password_hash).result()[0]
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "pending": self.pending, "avg_ms": round(self.cost * 1000, 2), "rejected": self.rejected}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+hasher = PasswordHasher()
@@ -1,14 +1,25 @@
-from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi import FastAPI, Depends, Header, HTTPException, Request
 from fastapi.responses import JSONResponse
 from fastapi import APIRouter
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
 from datetime import datetime
+from ipaddress import ip_address, ip_network
+import math
 import pyotp
 
-from common.db.mysql import Base, engine, get_session
+from common.db.mysql import get_session, get_async_session, ReadYourWritesMiddleware
+from common.db.telemetry import pool_router
+from common.db.bootstrap import db_lifespan
+from common.db.instrumentation import QueryStatsMiddleware
 from common.security.jwt import create_access_token, decode_token, TokenError
+from common.security.revocation import revocations
+from common.security.users import UserSnapshot, require_user, invalidate_user
 from common.i18n import get_locale, t
+from common.ratelimit import load_bucket_store
+from common.config import EMAIL_CHECK_RATE, EMAIL_CHECK_BURST, EMAIL_CHECK_RATE_LIMIT_BACKEND, TRUSTED_PROXIES
 
 from services.auth.schemas import (
     RegisterRequest,
@@ -38,8 +49,34 @@ from services.auth.repository import (
     consume_password_reset_token,
     change_password,
 )
+from services.auth import async_repository as async_repo
+from services.auth.hashing import hasher, HashingOverloaded
+from services.auth.sweeper import RefreshTokenSweeper
+from services.auth.email_index import email_index
+from services.auth import bulk
 
-app = FastAPI(title="SalahkaarPro Auth Service")
+sweeper = RefreshTokenSweeper()
+email_check_buckets = load_bucket_store(EMAIL_CHECK_RATE_LIMIT_BACKEND)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with db_lifespan(app):
+        sweeper.start()
+        email_index.start()
+        try:
+            yield
+        finally:
+            await sweeper.stop()
+    hasher.shutdown()
+
+
+app = FastAPI(title="SalahkaarPro Auth Service", lifespan=lifespan)
+
+@app.exception_handler(HashingOverloaded)
+async def hashing_overloaded(request: Request, exc: HashingOverloaded):
+    # Shed logins/registrations quickly instead of queueing them behind a storm
+    return JSONResponse(status_code=503, content={"detail": "Too many sign-in attempts, try again shortly"}, headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))})
 
 # Add CORS middleware
 app.add_middleware(
@@ -59,14 +96,15 @@ app.add_middleware(
 
 router = APIRouter(prefix="/api/v1")
 
-# Create tables on startup
-Base.metadata.create_all(bind=engine)
-
 @router.get("/health")
 def health(request: Request):
     locale = get_locale(request)
     return {"status": "ok", "message": t(locale, "health_ok", "OK")}
 
+@router.get("/health/hashing")
+def hashing_health():
+    return hasher.stats()
+
 # Helpers
 
 def as_user_response(user) -> UserResponse:
@@ -84,6 +122,10 @@ def as_user_response(user) -> UserResponse:
         mfa_enabled=user.mfa_enabled,
     )
 
+def access_claims(user) -> dict:
+    # role/active let the gateway build the internal principal without a DB lookup
+    return {"sub": str(user.id), "email": user.email, "tier": user.tier, "role": user.role, "active": bool(user.active)}
+
 # Auth endpoints
 
 @router.post("/auth/register")
@@ -125,34 +167,35 @@ def resend_verification(payload: EmailResendRequest, request: Request, db: Sessi
     return {"message": "Verification email resent", "token": v.token}
 
 @router.post("/auth/login", response_model=TokenResponse)
-def login(payload: LoginRequest, request: Request, db: Session = Depends(get_session)):
+async def login(payload: LoginRequest, request: Request, db: AsyncSession = Depends(get_async_session)):
     locale = get_locale(request)
-    user = get_user_by_email(db, payload.email)
-    if not user or not verify_password(payload.password, user.password_hash):
+    user = await async_repo.get_user_by_email(db, payload.email)
+    if not user or not await async_repo.verify_and_rehash(user, payload.password):
         raise HTTPException(status_code=401, detail=t(locale, "invalid_credentials", "Invalid credentials"))
     # MFA check (if enabled, the client should separately call /mfa/verify)
-    token = create_access_token({"sub": str(user.id), "email": user.email, "tier": user.tier})
-    rt = create_refresh_token(db, user.id)
+    token = create_access_token(access_claims(user))
+    # Also commits a rehashed password from verify_and_rehash
+    rt = await async_repo.create_refresh_token(db, user.id)
     return TokenResponse(access_token=token, refresh_token=rt.token, user=as_user_response(user).model_dump())
 
 # Dependency to get current user from token
 
-def get_current_user(request: Request, db: Session = Depends(get_session)) -> UserResponse:
-    auth = request.headers.get("Authorization", "")
-    if not auth.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing token")
-    token = auth.split(" ", 1)[1]
-    try:
-        data = decode_token(token)
-    except TokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user = get_user_by_email(db, data.get("email"))
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+def get_current_user(user: UserSnapshot = Depends(require_user)) -> UserResponse:
     return as_user_response(user)
 
 @router.post("/auth/logout")
-def logout(current_user: UserResponse = Depends(get_current_user), db: Session = Depends(get_session)):
+def logout(
+    authorization: str = Header(None),
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_session),
+):
+    # Revoke the access token itself too, rather than letting it live until exp
+    try:
+        claims = decode_token(authorization.split(" ", 1)[1])
+    except TokenError:
+        claims = {}
+    if claims.get("jti"):
+        revocations.revoke(claims["jti"], current_user.id, claims["exp"])
     revoke_refresh_tokens_for_user(db, current_user.id)
     return {"message": "Logged out"}
 
@@ -162,7 +205,7 @@ def refresh(payload: RefreshRequest, db: Session = Depends(get_session)):
     if not rt:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     user = get_user_by_id(db, rt.user_id)
-    token = create_access_token({"sub": str(user.id), "email": user.email, "tier": user.tier})
+    token = create_access_token(access_claims(user))
     return {"access_token": token, "expires_in": 60 * 60}
 
 @router.post("/auth/password-reset/request")
@@ -222,6 +265,7 @@ def mfa_verify(payload: MfaVerifyRequest, current_user: UserResponse = Depends(g
         raise HTTPException(status_code=400, detail="Invalid code")
     user.mfa_enabled = True
     db.commit()
+    invalidate_user(user.id)
     return {"mfa_verified": True}
 
 @router.post("/auth/mfa/disable")
@@ -232,15 +276,44 @@ def mfa_disable(payload: MfaVerifyRequest, current_user: UserResponse = Depends(
     user.mfa_enabled = False
     user.mfa_secret = None
     db.commit()
+    invalidate_user(user.id)
     return {"message": "MFA disabled"}
 
+@router.post("/auth/admin/bulk-register")
+async def bulk_register(request: Request, current_user: UserResponse = Depends(get_current_user)):
+    """CSV (header row of register fields) or NDJSON body; streams one NDJSON result per row."""
+    require_admin(current_user)
+    is_csv = "csv" in request.headers.get("content-type", "")
+    return bulk.UploadStreamingResponse(bulk.bulk_register(request.stream(), is_csv), media_type="application/x-ndjson")
+
 @router.get("/auth/me", response_model=UserResponse)
 def me(current_user: UserResponse = Depends(get_current_user)):
     return current_user
 
+trusted_proxies = [ip_network(p, strict=False) for p in TRUSTED_PROXIES]
+
+def client_ip(request: Request) -> str:
+    peer = request.client.host if request.client else "unknown"
+    # Only the gateway may name the caller: it appends the caller's address to X-Forwarded-For
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded:
+        try:
+            trusted = any(ip_address(peer) in network for network in trusted_proxies)
+        except ValueError:
+            trusted = False
+        if trusted:
+            return forwarded.rsplit(",", 1)[-1].strip()
+    return peer
+
 @router.get("/auth/check-email")
-def check_email(email: str, db: Session = Depends(get_session)):
-    exists = get_user_by_email(db, email) is not None
-    return {"exists": exists}
+async def check_email(email: str, request: Request, db: AsyncSession = Depends(get_async_session)):
+    # Limited per address so the endpoint cannot be used to enumerate accounts
+    allowed, _, retry_after = await email_check_buckets.take(f"check-email:{client_ip(request)}", EMAIL_CHECK_RATE, EMAIL_CHECK_BURST)
+    if not allowed:
+        raise HTTPException(status_code=429, detail="Too many requests", headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+    return {"exists": await email_index.exists(db, email)}
 
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+app.include_router(pool_router)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatsMiddleware)
\ No newline at end of file
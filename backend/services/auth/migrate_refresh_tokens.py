@@ -0,0 +1,95 @@
+"""Move an existing MySQL refresh_tokens table to hashed tokens.
+
+    python -m services.auth.migrate_refresh_tokens [--batch 10000] [--keep-stale]
+
+1. deletes revoked and expired rows (unless --keep-stale),
+2. adds token_hash and fills it with SHA2(token, 256) in primary-key ranges,
+3. makes it NOT NULL and unique, adds the (user_id, revoked) and expires_at
+   indexes, then drops the plaintext token column and the old user_id index.
+
+Every step checks the current schema first, so an interrupted run can be
+restarted. Tokens issued before the migration keep working: clients still send
+the plaintext, and its hash is now what is stored. Run it before deploying the
+auth service that reads token_hash; new databases get the new schema from
+`python -m common.db.bootstrap`.
+"""
+import argparse
+
+from sqlalchemy import inspect, text
+
+from common.db.mysql import engine
+
+TABLE = "refresh_tokens"
+
+
+def id_ranges(conn, batch: int):
+    low, high = conn.execute(text(f"SELECT MIN(id), MAX(id) FROM {TABLE}")).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, batch):
+        yield start, start + batch
+
+
+def in_batches(statement: str, batch: int) -> int:
+    """Run `statement` (with :lo/:hi id bounds) over the whole table, one short transaction per range."""
+    with engine.connect() as conn:
+        ranges = list(id_ranges(conn, batch))
+    total = 0
+    for low, high in ranges:
+        with engine.begin() as conn:
+            total += conn.execute(text(statement), {"lo": low, "hi": high}).rowcount
+    return total
+
+
+def migrate(batch: int, keep_stale: bool = False):
+    inspector = inspect(engine)
+    if not inspector.has_table(TABLE):
+        print(f"{TABLE} does not exist; run python -m common.db.bootstrap auth")
+        return
+    columns = {c["name"] for c in inspector.get_columns(TABLE)}
+    indexes = {i["name"] for i in inspector.get_indexes(TABLE)}
+
+    if "token" in columns:
+        if not keep_stale:
+            deleted = in_batches(
+                f"DELETE FROM {TABLE} WHERE id >= :lo AND id < :hi AND (revoked = 1 OR expires_at < UTC_TIMESTAMP())", batch
+            )
+            print(f"Deleted {deleted} revoked or expired tokens")
+        if "token_hash" not in columns:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {TABLE} ADD COLUMN token_hash CHAR(64) NULL AFTER user_id"))
+        hashed = in_batches(
+            f"UPDATE {TABLE} SET token_hash = SHA2(token, 256) WHERE id >= :lo AND id < :hi AND token_hash IS NULL", batch
+        )
+        print(f"Hashed {hashed} tokens")
+
+    changes = []
+    if "token_hash" not in indexes:
+        # Same key name create_all gives the unique column
+        changes += ["MODIFY token_hash CHAR(64) NOT NULL", "ADD UNIQUE KEY token_hash (token_hash)"]
+    if "ix_refresh_tokens_user_revoked" not in indexes:
+        changes.append("ADD INDEX ix_refresh_tokens_user_revoked (user_id, revoked)")
+    if "ix_refresh_tokens_expires_at" not in indexes:
+        changes.append("ADD INDEX ix_refresh_tokens_expires_at (expires_at)")
+    if changes:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {TABLE} " + ", ".join(changes)))
+
+    # The composite index now backs the user_id foreign key, so the old index can go
+    drops = []
+    if "token" in columns:
+        drops.append("DROP COLUMN token")
+    if "ix_refresh_tokens_user_id" in indexes:
+        drops.append("DROP INDEX ix_refresh_tokens_user_id")
+    if drops:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {TABLE} " + ", ".join(drops)))
+    print(f"{TABLE} stores hashed tokens")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, default=10000, help="rows per id range")
+    parser.add_argument("--keep-stale", action="store_true", help="hash revoked and expired rows instead of deleting them")
+    args = parser.parse_args()
+    migrate(args.batch, args.keep_stale)
@@ -1,11 +1,18 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, CHAR, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 from common.db.mysql import Base
+from common.security.revocation import register_revocation_feed
+from common.security.users import register_user_model
+from services.auth.revocation_feed import SqlRevocationFeed
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Incremental sync of the check-email index (services.auth.email_index)
+        Index("ix_users_updated_at", "updated_at"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     email = Column(String(255), unique=True, index=True, nullable=False)
@@ -26,11 +33,21 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+# Loaded by common.security.users.require_user in every service
+register_user_model(User)
+
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        # Revoke-all on logout and the per-user cap; also serves lookups by user_id alone
+        Index("ix_refresh_tokens_user_revoked", "user_id", "revoked"),
+        # Expiry sweeper (revoked tokens are expired at revocation)
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+    )
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), index=True)
-    token = Column(String(256), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    # Hex SHA-256 of the token; the token itself is only ever returned to the client
+    token_hash = Column(CHAR(64), unique=True, nullable=False)
     revoked = Column(Boolean, default=False)
     expires_at = Column(DateTime, nullable=False)
 
@@ -48,4 +65,16 @@ class PasswordResetToken(Base):
     user_id = Column(Integer, ForeignKey("users.id"), index=True)
     token = Column(String(128), unique=True, nullable=False)
     used = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class RevokedAccessToken(Base):
+    __tablename__ = "revoked_access_tokens"
+    # The autoincrement id is the cursor the services' revocation filters sync from
+    id = Column(Integer, primary_key=True)
+    jti = Column(CHAR(32), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    # Copied from the token; the row is useless (and swept) once the token has expired anyway
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+# Every process that loads these models can check revocations against the table
+register_revocation_feed("sql", SqlRevocationFeed)
@@ -1,14 +1,14 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select, update
+from sqlalchemy import select, update, delete
 from datetime import datetime, timedelta, timezone
-from passlib.context import CryptContext
+from hashlib import sha256
 from secrets import token_urlsafe
 
-from common.config import REFRESH_EXPIRES_MINUTES
-from services.auth.models import User, RefreshToken, EmailVerification, PasswordResetToken
-
-# Use a hashing scheme that avoids bcrypt backend issues
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+from common.config import REFRESH_EXPIRES_MINUTES, REFRESH_TOKENS_PER_USER, REFRESH_SWEEP_BATCH
+from common.security.users import invalidate_user
+from services.auth.email_index import email_index
+from services.auth.hashing import hasher
+from services.auth.models import User, RefreshToken, EmailVerification, PasswordResetToken, RevokedAccessToken
 
 def get_user_by_email(db: Session, email: str) -> User | None:
     stmt = select(User).where(User.email == email)
@@ -19,7 +19,7 @@ def get_user_by_id(db: Session, user_id: int) -> User | None:
     return db.scalar(stmt)
 
 def create_user(db: Session, **data) -> User:
-    password_hash = pwd_context.hash(data.pop("password"))
+    password_hash = hasher.hash_blocking(data.pop("password"))
     if not data.get("locked_fields_after"):
         data["locked_fields_after"] = datetime.utcnow() + timedelta(hours=72)
     user = User(
@@ -29,29 +29,57 @@ def create_user(db: Session, **data) -> User:
     db.add(user)
     db.commit()
     db.refresh(user)
+    email_index.add(user.email)
     return user
 
 def verify_password(plain_password: str, password_hash: str) -> bool:
-    return pwd_context.verify(plain_password, password_hash)
+    return hasher.verify_and_update_blocking(plain_password, password_hash)[0]
 
 # Refresh token management
+# Only the SHA-256 of a refresh token is stored. Revoking a token also expires it,
+# so sweep_refresh_tokens can delete revoked and expired rows through one index.
+
+def hash_refresh_token(token: str) -> str:
+    return sha256(token.encode()).hexdigest()
+
+def stale_refresh_tokens(user_id: int):
+    """Ids of the user's live tokens beyond the newest REFRESH_TOKENS_PER_USER."""
+    return (
+        select(RefreshToken.id)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked == False)
+        .order_by(RefreshToken.id.desc())
+        .offset(REFRESH_TOKENS_PER_USER)
+    )
+
+def revoke_refresh_tokens(ids):
+    return update(RefreshToken).where(RefreshToken.id.in_(ids)).values(revoked=True, expires_at=datetime.now(timezone.utc))
 
 def create_refresh_token(db: Session, user_id: int, token: str | None = None) -> RefreshToken:
     token_value = token or token_urlsafe(64)
     expires = datetime.now(timezone.utc) + timedelta(minutes=REFRESH_EXPIRES_MINUTES)
-    rt = RefreshToken(user_id=user_id, token=token_value, expires_at=expires)
+    rt = RefreshToken(user_id=user_id, token_hash=hash_refresh_token(token_value), expires_at=expires)
     db.add(rt)
+    db.flush()
+    stale = db.scalars(stale_refresh_tokens(user_id)).all()
+    if stale:
+        db.execute(revoke_refresh_tokens(stale))
     db.commit()
     db.refresh(rt)
+    # Plaintext for the response only; it is not persisted
+    rt.token = token_value
     return rt
 
 def revoke_refresh_tokens_for_user(db: Session, user_id: int):
-    db.query(RefreshToken).filter(RefreshToken.user_id == user_id, RefreshToken.revoked == False).update({RefreshToken.revoked: True})
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked == False)
+        .values(revoked=True, expires_at=datetime.now(timezone.utc))
+    )
     db.commit()
 
 
 def get_valid_refresh_token(db: Session, token: str) -> RefreshToken | None:
-    stmt = select(RefreshToken).where(RefreshToken.token == token, RefreshToken.revoked == False)
+    stmt = select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(token), RefreshToken.revoked == False)
     rt = db.scalar(stmt)
     if not rt:
         return None
@@ -63,6 +91,28 @@ def get_valid_refresh_token(db: Session, token: str) -> RefreshToken | None:
         return None
     return rt
 
+def sweep_expired(db: Session, model, batch_size: int = REFRESH_SWEEP_BATCH) -> int:
+    """Delete a token table's expired rows in short batches; returns the number deleted."""
+    deleted = 0
+    now = datetime.now(timezone.utc)
+    while True:
+        ids = db.scalars(select(model.id).where(model.expires_at < now).order_by(model.expires_at).limit(batch_size)).all()
+        if not ids:
+            return deleted
+        db.execute(delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+        db.commit()
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            return deleted
+
+def sweep_refresh_tokens(db: Session, batch_size: int = REFRESH_SWEEP_BATCH) -> int:
+    # Revoked tokens are expired at revocation, so this covers them too
+    return sweep_expired(db, RefreshToken, batch_size)
+
+def sweep_revoked_access_tokens(db: Session, batch_size: int = REFRESH_SWEEP_BATCH) -> int:
+    # An expired access token is rejected anyway, so its revocation entry is no longer needed
+    return sweep_expired(db, RevokedAccessToken, batch_size)
+
 # Email verification
 
 def create_verification_token(db: Session, user_id: int) -> EmailVerification:
@@ -81,6 +131,7 @@ def mark_verification_used(db: Session, token: str) -> User | None:
     user = db.get(User, v.user_id)
     user.verified = True
     db.commit()
+    invalidate_user(user.id)
     return user
 
 # Password reset
@@ -99,14 +150,16 @@ def consume_password_reset_token(db: Session, token: str, new_password: str) ->
         return False
     pr.used = True
     user = db.get(User, pr.user_id)
-    user.password_hash = pwd_context.hash(new_password)
+    user.password_hash = hasher.hash_blocking(new_password)
     db.commit()
+    invalidate_user(user.id)
     return True
 
 def change_password(db: Session, user_id: int, old_password: str, new_password: str) -> bool:
     user = db.get(User, user_id)
     if not user or not verify_password(old_password, user.password_hash):
         return False
-    user.password_hash = pwd_context.hash(new_password)
+    user.password_hash = hasher.hash_blocking(new_password)
     db.commit()
+    invalidate_user(user_id)
     return True
\ No newline at end of file
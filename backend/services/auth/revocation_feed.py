@@ -0,0 +1,74 @@
+"""The `sql` token revocation feed: revoked_access_tokens in the shared MySQL database."""
+from datetime import datetime, timezone
+from typing import FrozenSet, Tuple
+
+from common.security.revocation import Changes, RevocationFeed
+
+
+class SqlRevocationFeed(RevocationFeed):
+    """revoked_access_tokens in the shared MySQL database.
+
+    Auth workers insert concurrently, so ids can commit out of order: a row may
+    become visible after one with a higher id has been synced. Each sync
+    therefore re-reads the last `trailing_ids` ids below the highest one seen.
+    The cursor is (highest id, ids already returned in that window), so a
+    re-read row is only returned once.
+    """
+
+    def __init__(self, trailing_ids: int = 1000):
+        self.trailing_ids = trailing_ids
+
+    # Imported lazily: common.db.mysql imports the principal resolver, and
+    # services.auth.models imports this module to register the feed
+    @staticmethod
+    def _session():
+        from common.db.mysql import SessionLocal
+        return SessionLocal()
+
+    def revoke(self, jti: str, user_id: int | None, expires_at: float):
+        from sqlalchemy.exc import IntegrityError
+        from services.auth.models import RevokedAccessToken
+
+        db = self._session()
+        try:
+            expires = datetime.fromtimestamp(expires_at, timezone.utc).replace(tzinfo=None)
+            db.add(RevokedAccessToken(jti=jti, user_id=user_id, expires_at=expires))
+            db.commit()
+        except IntegrityError:
+            # Already revoked
+            db.rollback()
+        finally:
+            db.close()
+
+    def changes(self, cursor: Tuple[int, FrozenSet[int]] | None) -> Changes:
+        from sqlalchemy import func, select
+        from services.auth.models import RevokedAccessToken as R
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        high, seen = cursor if cursor is not None else (0, frozenset())
+        db = self._session()
+        try:
+            stmt = select(R.id, R.jti, R.expires_at).where(R.expires_at > now).order_by(R.id)
+            if cursor is not None:
+                stmt = stmt.where(R.id > high - self.trailing_ids)
+            rows = [r for r in db.execute(stmt).all() if r.id not in seen]
+            if rows:
+                high = max(high, rows[-1].id)
+            elif cursor is None:
+                high = db.scalar(select(func.max(R.id))) or 0
+            floor = high - self.trailing_ids
+            seen = frozenset(i for i in seen.union(r.id for r in rows) if i > floor)
+            return (high, seen), [(r.jti, r.expires_at.replace(tzinfo=timezone.utc).timestamp()) for r in rows]
+        finally:
+            db.close()
+
+    def is_revoked(self, jti: str) -> bool:
+        from sqlalchemy import select
+        from services.auth.models import RevokedAccessToken as R
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        db = self._session()
+        try:
+            return db.scalar(select(R.id).where(R.jti == jti, R.expires_at > now)) is not None
+        finally:
+            db.close()
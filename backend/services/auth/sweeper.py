@@ -0,0 +1,59 @@
+"""Background deletion of expired and revoked refresh tokens and expired access-token revocations.
+
+The auth service runs a RefreshTokenSweeper in its lifespan. Every replica
+sweeps, which is harmless: each batch deletes by primary key. To sweep once
+from cron instead (with REFRESH_SWEEP_INTERVAL_SECONDS=0 on the service):
+
+    python -m services.auth.sweeper
+"""
+import asyncio
+import logging
+
+from starlette.concurrency import run_in_threadpool
+
+from common.config import REFRESH_SWEEP_INTERVAL_SECONDS, REFRESH_SWEEP_BATCH
+from common.db.mysql import SessionLocal
+from services.auth.repository import sweep_refresh_tokens, sweep_revoked_access_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def sweep_once(batch_size: int = REFRESH_SWEEP_BATCH) -> int:
+    db = SessionLocal()
+    try:
+        return sweep_refresh_tokens(db, batch_size) + sweep_revoked_access_tokens(db, batch_size)
+    finally:
+        db.close()
+
+
+class RefreshTokenSweeper:
+    def __init__(self, interval: float = REFRESH_SWEEP_INTERVAL_SECONDS, batch_size: int = REFRESH_SWEEP_BATCH):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.deleted = 0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.deleted += await run_in_threadpool(sweep_once, self.batch_size)
+            except Exception:
+                logger.exception("Refresh token sweep failed")
+
+    def start(self):
+        if self.interval and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+if __name__ == "__main__":
+    print(f"Deleted {sweep_once()} expired tokens")
@@ -1,8 +1,9 @@
-from fastapi import FastAPI, APIRouter, Header, HTTPException
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException
 from typing import List
 from math import pow
 
-from common.security.jwt import decode_token
+from common.security.jwt import TokenError
+from common.security.principal import resolve_claims
 
 from .schemas import (
     TermInsuranceRequest, TermInsuranceResponse,
@@ -22,12 +23,13 @@ app = FastAPI(title="Calculation Service", version="1.0.0")
 router = APIRouter(prefix="/api/v1")
 
 
-def require_auth(authorization: str = Header(None)):
+def require_auth(authorization: str = Header(None), x_internal_principal: str = Header(None)):
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Unauthorized")
     token = authorization.split(" ", 1)[1]
-    payload = decode_token(token)
-    if not payload:
+    try:
+        payload = resolve_claims(token, x_internal_principal)
+    except TokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
     return payload
 
@@ -48,7 +50,7 @@ def sip_required(target: float, rate_percent: float, months: int) -> float:
 
 # 69: Term insurance
 @router.post("/calculate/term-insurance", response_model=TermInsuranceResponse)
-def calc_term(req: TermInsuranceRequest, user= require_auth):
+def calc_term(req: TermInsuranceRequest, user=Depends(require_auth)):
     recommended = max(req.annual_income * 15, req.liabilities + 20_00_000)
     shortfall = max(0.0, recommended - req.existing_cover)
     monthly_premium = recommended / 10_00_000 * 500  # rough heuristic
@@ -56,7 +58,7 @@ def calc_term(req: TermInsuranceRequest, user= require_auth):
 
 # 70: Health insurance
 @router.post("/calculate/health-insurance", response_model=HealthInsuranceResponse)
-def calc_health(req: HealthInsuranceRequest, user= require_auth):
+def calc_health(req: HealthInsuranceRequest, user=Depends(require_auth)):
     members = req.adults + req.children
     recommended = 3_00_000 + members * 2_00_000 + (req.city_tier - 1) * 1_00_000
     floater = max(5_00_000, recommended)
@@ -67,7 +69,7 @@ def calc_health(req: HealthInsuranceRequest, user= require_auth):
 
 # 71: Retirement
 @router.post("/calculate/retirement", response_model=RetirementResponse)
-def calc_retirement(req: RetirementRequest, user= require_auth):
+def calc_retirement(req: RetirementRequest, user=Depends(require_auth)):
     years = max(0, req.retirement_age - req.current_age)
     needed_monthly_today = req.desired_monthly_expense
     needed_monthly_at_retire = future_value(needed_monthly_today, req.inflation_percent, years)
@@ -80,7 +82,7 @@ def calc_retirement(req: RetirementRequest, user= require_auth):
 
 # 72: Child education
 @router.post("/calculate/child-education", response_model=ChildEducationResponse)
-def calc_child_education(req: ChildEducationRequest, user= require_auth):
+def calc_child_education(req: ChildEducationRequest, user=Depends(require_auth)):
     target_per_child = future_value(req.current_cost_per_child, req.inflation_percent, req.years_to_goal)
     per_child = [target_per_child for _ in range(req.children)]
     total = target_per_child * req.children
@@ -90,7 +92,7 @@ def calc_child_education(req: ChildEducationRequest, user= require_auth):
 
 # 73: Child wedding
 @router.post("/calculate/child-wedding", response_model=ChildWeddingResponse)
-def calc_child_wedding(req: ChildWeddingRequest, user= require_auth):
+def calc_child_wedding(req: ChildWeddingRequest, user=Depends(require_auth)):
     target_per_child = future_value(req.current_cost_per_child, req.inflation_percent, req.years_to_goal)
     per_child = [target_per_child for _ in range(req.children)]
     total = target_per_child * req.children
@@ -100,7 +102,7 @@ def calc_child_wedding(req: ChildWeddingRequest, user= require_auth):
 
 # 74: Home purchase
 @router.post("/calculate/home-purchase", response_model=HomePurchaseResponse)
-def calc_home_purchase(req: HomePurchaseRequest, user= require_auth):
+def calc_home_purchase(req: HomePurchaseRequest, user=Depends(require_auth)):
     eligibility = req.annual_income * 4
     principal = max(0.0, req.property_price - req.down_payment)
     r = req.interest_percent / 100.0 / 12.0
@@ -112,7 +114,7 @@ def calc_home_purchase(req: HomePurchaseRequest, user= require_auth):
 
 # 75: Car purchase
 @router.post("/calculate/car-purchase", response_model=CarPurchaseResponse)
-def calc_car_purchase(req: CarPurchaseRequest, user= require_auth):
+def calc_car_purchase(req: CarPurchaseRequest, user=Depends(require_auth)):
     eligibility = req.annual_income * 0.6
     principal = max(0.0, req.car_price - req.down_payment)
     r = req.interest_percent / 100.0 / 12.0
@@ -123,7 +125,7 @@ def calc_car_purchase(req: CarPurchaseRequest, user= require_auth):
 
 # 76: Vacation planning
 @router.post("/calculate/vacation", response_model=VacationPlanningResponse)
-def calc_vacation(req: VacationPlanningRequest, user= require_auth):
+def calc_vacation(req: VacationPlanningRequest, user=Depends(require_auth)):
     per_sip: List[float] = []
     total = 0.0
     for plan in req.plans:
@@ -136,7 +138,7 @@ def calc_vacation(req: VacationPlanningRequest, user= require_auth):
 
 # 77: Tax planning
 @router.post("/calculate/tax-planning", response_model=TaxPlanningResponse)
-def calc_tax(req: TaxPlanningRequest, user= require_auth):
+def calc_tax(req: TaxPlanningRequest, user=Depends(require_auth)):
     taxable = max(0.0, req.annual_income - (req.deductions_80c + req.deductions_80d + req.housing_loan_interest))
     # Simple slab (old regime placeholder): 5%, 20%, 30%
     tax = 0.0
@@ -157,12 +159,12 @@ def calc_tax(req: TaxPlanningRequest, user= require_auth):
 
 # 78: Cache read (stub)
 @router.get("/calculate/cache/{calculation_id}", response_model=CalculationCacheResponse)
-def calc_cache(calculation_id: str, user= require_auth):
+def calc_cache(calculation_id: str, user=Depends(require_auth)):
     return CalculationCacheResponse(calculation_id=calculation_id, results=None)
 
 # 79: Validate inputs
 @router.post("/calculate/validate-inputs", response_model=ValidateInputsResponse)
-def validate_inputs(payload: dict, user= require_auth):
+def validate_inputs(payload: dict, user=Depends(require_auth)):
     errors: List[ValidationErrorItem] = []
     for field in ("annual_income", "age"):
         if field not in payload:
@@ -0,0 +1,29 @@
+from typing import Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, IndexModel
+
+TEMPLATES = "form_templates"
+SUBMISSIONS = "form_submissions"
+DRAFTS = "form_drafts"
+
+# Indexes behind the form service's lookups; created by `python -m common.db.bootstrap`
+INDEXES: Dict[str, List[IndexModel]] = {
+    # get_schema / submit by key; keys are unique per template
+    TEMPLATES: [IndexModel([("key", ASCENDING)], name="key_unique", unique=True)],
+    # my_submissions by user, in the order they were stored
+    SUBMISSIONS: [IndexModel([("user_id", ASCENDING)], name="user_id")],
+    # save_draft upserts by user and template key or id; my_drafts uses the user_id prefix
+    DRAFTS: [
+        IndexModel([("user_id", ASCENDING), ("template_key", ASCENDING)], name="user_template_key"),
+        IndexModel([("user_id", ASCENDING), ("template_id", ASCENDING)], name="user_template_id"),
+    ],
+}
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> List[str]:
+    """Create any missing form indexes (existing ones are left as they are); returns their names."""
+    names: List[str] = []
+    for collection, indexes in INDEXES.items():
+        names += [f"{collection}.{name}" for name in await db[collection].create_indexes(indexes)]
+    return names
@@ -1,19 +1,25 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, Header
+from fastapi import FastAPI, APIRouter, Depends, HTTPException
 from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
 from datetime import datetime
 import re
 import ast
 import operator
 import math
 
-from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
-
-from common.config import MONGO_URI, MONGO_DB
-from common.security.jwt import decode_token
-from common.db.mysql import get_session, Base, engine
+from pymongo.errors import DuplicateKeyError
+
+from common.config import DB_BOOTSTRAP_ON_STARTUP
+from common.security.users import require_user
+from common.db.mysql import get_session, ReadYourWritesMiddleware
+from common.db.telemetry import pool_router
+from common.db.bootstrap import db_lifespan
+from common.db.mongo import get_mongo_db, close_mongo
+from common.db.instrumentation import QueryStatsMiddleware
 from services.auth.models import User
 
+from .indexes import TEMPLATES, SUBMISSIONS, DRAFTS, ensure_indexes
 from .schemas import (
     FormTemplate,
     CreateTemplateRequest,
@@ -31,33 +37,25 @@ from .schemas import (
     DraftsResponse,
 )
 
-app = FastAPI(title="Form Service", version="1.0.0")
-router = APIRouter(prefix="/api/v1")
+def collection(name: str):
+    return get_mongo_db()[name]
+
 
-# Ensure SQL tables are initialized (for user lookup)
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with db_lifespan(app):
+        if DB_BOOTSTRAP_ON_STARTUP:
+            await ensure_indexes(get_mongo_db())
+        yield
+    close_mongo()
 
-# Mongo setup
-mongo_client = AsyncIOMotorClient(MONGO_URI)
-db = mongo_client[MONGO_DB]
-TEMPLATES = db["form_templates"]
-SUBMISSIONS = db["form_submissions"]
-DRAFTS = db["form_drafts"]
+
+app = FastAPI(title="Form Service", version="1.0.0", lifespan=lifespan)
+router = APIRouter(prefix="/api/v1")
 
 # --- Auth helpers ---
 
-def require_auth(authorization: str = Header(None), db_session=Depends(get_session)) -> User:
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    token = authorization.split(" ", 1)[1]
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user_id = int(payload.get("sub"))
-    user = db_session.get(User, user_id)
-    if not user or not user.active:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return user
+require_auth = require_user
 
 
 def require_admin(user: User = Depends(require_auth)) -> User:
@@ -245,7 +243,7 @@ async def health():
 # Templates
 @router.get("/forms/templates", response_model=TemplatesResponse)
 async def list_templates(user: User = Depends(require_auth)):
-    cursor = TEMPLATES.find({}, {"_id": 1, "key": 1, "title": 1, "is_custom": 1, "version": 1})
+    cursor = collection(TEMPLATES).find({}, {"_id": 1, "key": 1, "title": 1, "is_custom": 1, "version": 1})
     items = []
     async for doc in cursor:
         items.append(TemplateItem(id=str(doc["_id"]), key=doc.get("key"), title=doc.get("title"), is_custom=doc.get("is_custom", False), version=doc.get("version", 1)))
@@ -256,14 +254,17 @@ async def create_template(payload: CreateTemplateRequest, admin: User = Depends(
     doc = payload.model_dump()
     now = datetime.utcnow().isoformat()
     doc.update({"created_by": admin.id, "created_at": now, "updated_at": now})
-    res = await TEMPLATES.insert_one(doc)
+    try:
+        res = await collection(TEMPLATES).insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Template key already exists")
     doc["id"] = str(res.inserted_id)
     doc["_id"] = str(res.inserted_id)
     return TemplateDetailResponse(template=FormTemplate(**doc))
 
 @router.get("/forms/templates/{template_id}", response_model=TemplateDetailResponse)
 async def get_template(template_id: str, user: User = Depends(require_auth)):
-    doc = await TEMPLATES.find_one({"_id": ObjectId(template_id)})
+    doc = await collection(TEMPLATES).find_one({"_id": ObjectId(template_id)})
     if not doc:
         raise HTTPException(status_code=404, detail="Template not found")
     doc["id"] = str(doc["_id"])
@@ -273,8 +274,8 @@ async def get_template(template_id: str, user: User = Depends(require_auth)):
 async def update_template(template_id: str, payload: UpdateTemplateRequest, admin: User = Depends(require_admin)):
     updates = {k: v for k, v in payload.model_dump(exclude_unset=True).items() if v is not None}
     updates["updated_at"] = datetime.utcnow().isoformat()
-    await TEMPLATES.update_one({"_id": ObjectId(template_id)}, {"$set": updates})
-    doc = await TEMPLATES.find_one({"_id": ObjectId(template_id)})
+    await collection(TEMPLATES).update_one({"_id": ObjectId(template_id)}, {"$set": updates})
+    doc = await collection(TEMPLATES).find_one({"_id": ObjectId(template_id)})
     if not doc:
         raise HTTPException(status_code=404, detail="Template not found")
     doc["id"] = str(doc["_id"])
@@ -282,13 +283,13 @@ async def update_template(template_id: str, payload: UpdateTemplateRequest, admi
 
 @router.delete("/forms/templates/{template_id}")
 async def delete_template(template_id: str, admin: User = Depends(require_admin)):
-    await TEMPLATES.delete_one({"_id": ObjectId(template_id)})
+    await collection(TEMPLATES).delete_one({"_id": ObjectId(template_id)})
     return {"deleted": True}
 
 # Dynamic schema by key (for custom forms)
 @router.get("/forms/schema/{key}", response_model=SchemaResponse)
 async def get_schema(key: str, user: User = Depends(require_auth)):
-    doc = await TEMPLATES.find_one({"key": key})
+    doc = await collection(TEMPLATES).find_one({"key": key})
     if not doc:
         raise HTTPException(status_code=404, detail="Schema not found")
     doc["id"] = str(doc["_id"])
@@ -305,7 +306,7 @@ async def submit(payload: SubmissionRequest, user: User = Depends(require_auth))
         query = {"_id": ObjectId(payload.template_id)}
     else:
         raise HTTPException(status_code=400, detail="template_key or template_id required")
-    tpl = await TEMPLATES.find_one(query)
+    tpl = await collection(TEMPLATES).find_one(query)
     if not tpl:
         raise HTTPException(status_code=404, detail="Template not found")
 
@@ -319,12 +320,12 @@ async def submit(payload: SubmissionRequest, user: User = Depends(require_auth))
         "user_id": user.id,
         "created_at": datetime.utcnow().isoformat(),
     }
-    res = await SUBMISSIONS.insert_one(rec)
+    res = await collection(SUBMISSIONS).insert_one(rec)
     return SubmissionResponse(id=str(res.inserted_id), template_key=rec["template_key"], template_id=rec["template_id"], data=computed, errors=errors or None)
 
 @router.get("/forms/submissions/my", response_model=SubmissionsResponse)
 async def my_submissions(page: int = 1, limit: int = 20, user: User = Depends(require_auth)):
-    cursor = SUBMISSIONS.find({"user_id": user.id}).skip((page - 1) * limit).limit(limit)
+    cursor = collection(SUBMISSIONS).find({"user_id": user.id}).skip((page - 1) * limit).limit(limit)
     items: List[SubmissionItem] = []
     async for d in cursor:
         items.append(SubmissionItem(id=str(d["_id"]), template_key=d.get("template_key"), template_id=d.get("template_id"), title=None, created_at=d.get("created_at")))
@@ -332,7 +333,7 @@ async def my_submissions(page: int = 1, limit: int = 20, user: User = Depends(re
 
 @router.get("/forms/submissions/{submission_id}", response_model=SubmissionResponse)
 async def submission_detail(submission_id: str, user: User = Depends(require_auth)):
-    d = await SUBMISSIONS.find_one({"_id": ObjectId(submission_id), "user_id": user.id})
+    d = await collection(SUBMISSIONS).find_one({"_id": ObjectId(submission_id), "user_id": user.id})
     if not d:
         raise HTTPException(status_code=404, detail="Submission not found")
     return SubmissionResponse(id=str(d["_id"]), template_key=d.get("template_key"), template_id=d.get("template_id"), data=d.get("data", {}), errors=d.get("errors"))
@@ -351,19 +352,22 @@ async def save_draft(payload: DraftRequest, user: User = Depends(require_auth)):
         selector.update({"template_id": payload.template_id})
     now = datetime.utcnow().isoformat()
     update = {"$set": {"data": payload.data, "updated_at": now, **selector}}
-    res = await DRAFTS.update_one(selector, update, upsert=True)
-    doc = await DRAFTS.find_one(selector)
+    res = await collection(DRAFTS).update_one(selector, update, upsert=True)
+    doc = await collection(DRAFTS).find_one(selector)
     return DraftItem(id=str(doc["_id"]), template_key=doc.get("template_key"), template_id=doc.get("template_id"), title=None, updated_at=doc.get("updated_at"))
 
 @router.get("/forms/drafts/my", response_model=DraftsResponse)
 async def my_drafts(user: User = Depends(require_auth)):
-    cursor = DRAFTS.find({"user_id": user.id})
+    cursor = collection(DRAFTS).find({"user_id": user.id})
     items: List[DraftItem] = []
     async for d in cursor:
         items.append(DraftItem(id=str(d["_id"]), template_key=d.get("template_key"), template_id=d.get("template_id"), title=None, updated_at=d.get("updated_at")))
     return DraftsResponse(items=items)
 
 app.include_router(router)
+app.include_router(pool_router)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatsMiddleware)
 
 # New helper functions to support sample forms' finance and date logic
 
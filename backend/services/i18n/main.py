@@ -3,8 +3,12 @@ from fastapi.routing import APIRouter
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
-from common.db.mysql import get_session, Base, engine
-from common.security.jwt import decode_token
+from common.db.mysql import get_session, ReadYourWritesMiddleware
+from common.db.telemetry import pool_router
+from common.db.bootstrap import db_lifespan
+from common.db.instrumentation import QueryStatsMiddleware
+from common.security.jwt import TokenError
+from common.security.principal import resolve_claims
 
 from services.auth.models import User
 from .models import Language, Translation
@@ -21,18 +25,19 @@ from .schemas import (
     TranslationListResponse,
 )
 
-app = FastAPI(title="I18N Service", version="1.0.0")
+app = FastAPI(title="I18N Service", version="1.0.0", lifespan=db_lifespan)
 router = APIRouter(prefix="/api/v1")
 
-Base.metadata.create_all(bind=engine)
-
 # Auth dependencies
 
-def require_auth(authorization: str = Header(None)) -> User:
+def require_auth(authorization: str = Header(None), x_internal_principal: str = Header(None)) -> User:
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Unauthorized")
     token = authorization.split(" ", 1)[1]
-    payload = decode_token(token)
+    try:
+        payload = resolve_claims(token, x_internal_principal)
+    except TokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
     user = User(id=payload.get("sub"), email=payload.get("email"), role=payload.get("role", "user"))
     return user
 
@@ -167,4 +172,7 @@ def delete_string(key: str, lang: str, admin: User = Depends(require_admin), db:
     db.commit()
     return {"deleted": True}
 
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+app.include_router(pool_router)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatsMiddleware)
\ No newline at end of file
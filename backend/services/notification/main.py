@@ -1,11 +1,15 @@
-from fastapi import FastAPI, Depends, HTTPException, Header
+from fastapi import FastAPI, Depends, HTTPException, Query
 from fastapi.routing import APIRouter
 from sqlalchemy.orm import Session
-from sqlalchemy import select, update, desc
+from sqlalchemy import select, update, desc, func
 from datetime import datetime
+from typing import Optional
 
-from common.db.mysql import get_session, Base, engine
-from common.security.jwt import decode_token
+from common.db.mysql import get_session, get_read_session, ReadYourWritesMiddleware
+from common.db.telemetry import pool_router
+from common.db.bootstrap import db_lifespan
+from common.db.instrumentation import QueryStatsMiddleware
+from common.security.users import require_user
 
 from services.auth.models import User
 from .models import Notification, NotificationTemplate, NotificationPreference
@@ -26,24 +30,11 @@ from .schemas import (
     PreferencesUpdateRequest,
 )
 
-app = FastAPI(title="Notification Service", version="1.0.0")
+app = FastAPI(title="Notification Service", version="1.0.0", lifespan=db_lifespan)
 router = APIRouter(prefix="/api/v1")
 
-Base.metadata.create_all(bind=engine)
 
-
-def require_auth(authorization: str = Header(None), db: Session = Depends(get_session)) -> User:
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    token = authorization.split(" ", 1)[1]
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user_id = payload.get("sub")
-    user = db.get(User, user_id)
-    if not user or not user.active:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return user
+require_auth = require_user
 
 
 def require_admin(user: User = Depends(require_auth)) -> User:
@@ -128,7 +119,7 @@ def test_email(req: TestEmailRequest, admin: User = Depends(require_admin)):
 
 # 164/165: queue and retry (simplified: use notifications table)
 @router.get("/notifications/queue", response_model=QueueResponse)
-def queue(status: str | None = None, admin: User = Depends(require_admin), db: Session = Depends(get_session)):
+def queue(status: str | None = None, admin: User = Depends(require_admin), db: Session = Depends(get_read_session)):
     stmt = select(Notification).order_by(desc(Notification.created_at))
     if status:
         stmt = stmt.where(Notification.status == status)
@@ -147,10 +138,19 @@ def retry(notification_id: int, admin: User = Depends(require_admin), db: Sessio
 
 # 166: my-notifications
 @router.get("/notifications/my-notifications", response_model=MyNotificationsResponse)
-def my_notifications(user: User = Depends(require_auth), db: Session = Depends(get_session)):
+def my_notifications(unread: bool = False, limit: Optional[int] = Query(None, ge=1, le=100), user: User = Depends(require_auth), db: Session = Depends(get_read_session)):
     stmt = select(Notification).where(Notification.user_id == user.id).order_by(desc(Notification.created_at))
+    if unread:
+        stmt = stmt.where(Notification.read.is_(False))
+    if limit is not None:
+        stmt = stmt.limit(limit)
     rows = db.scalars(stmt).all()
-    return MyNotificationsResponse(notifications=[NotificationItem(id=r.id, type=r.type, subject=r.subject, body_text=r.body_text, language=r.language, read=r.read, created_at=r.created_at.isoformat()) for r in rows])
+    # Counted in the database so callers showing a badge need not page through everything
+    unread_count = db.scalar(select(func.count()).select_from(Notification).where(Notification.user_id == user.id, Notification.read.is_(False)))
+    return MyNotificationsResponse(
+        notifications=[NotificationItem(id=r.id, type=r.type, subject=r.subject, body_text=r.body_text, language=r.language, read=r.read, created_at=r.created_at.isoformat()) for r in rows],
+        unread_count=unread_count,
+    )
 
 # 167: mark as read
 @router.put("/notifications/{notification_id}/read")
@@ -251,4 +251,7 @@ def delete_template(template_key: str, language: str = "en", admin: User = Depen
     db.commit()
     return {"deleted": True}
 
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+app.include_router(pool_router)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatsMiddleware)
\ No newline at end of file
@@ -71,6 +71,7 @@ class NotificationItem(BaseModel):
 
 class MyNotificationsResponse(BaseModel):
     notifications: List[NotificationItem]
+    unread_count: int = 0
 
 class PreferencesResponse(BaseModel):
     email_enabled: bool
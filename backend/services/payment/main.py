@@ -1,12 +1,15 @@
-from fastapi import FastAPI, Depends, HTTPException, Header, Request
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.routing import APIRouter
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import datetime
 
-from common.db.mysql import get_session, Base, engine
-from common.security.jwt import decode_token
+from common.db.mysql import get_session, get_read_session, ReadYourWritesMiddleware
+from common.db.telemetry import pool_router
+from common.db.bootstrap import db_lifespan
+from common.db.instrumentation import QueryStatsMiddleware
+from common.security.users import require_user
 
 from services.auth.models import User
 from .models import Payment, PaymentOrder, RefundRequest
@@ -42,24 +45,11 @@ from .repository import (
     retry_failed_payment,
 )
 
-app = FastAPI(title="Payment Service", version="1.0.0")
+app = FastAPI(title="Payment Service", version="1.0.0", lifespan=db_lifespan)
 router = APIRouter(prefix="/api/v1")
 
-Base.metadata.create_all(bind=engine)
 
-
-def require_auth(authorization: str = Header(None), db: Session = Depends(get_session)) -> User:
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    token = authorization.split(" ", 1)[1]
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user_id = payload.get("sub")
-    user = db.get(User, user_id)
-    if not user or not user.active:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return user
+require_auth = require_user
 
 
 def require_admin(user: User = Depends(require_auth)) -> User:
@@ -102,7 +92,7 @@ async def webhook_stripe(request: Request, db: Session = Depends(get_session)):
 
 # 57: My payments
 @router.get("/payments/my-payments", response_model=List[PaymentItem])
-def my_payments(page: int = 1, user: User = Depends(require_auth), db: Session = Depends(get_session)):
+def my_payments(page: int = 1, user: User = Depends(require_auth), db: Session = Depends(get_read_session)):
     items = get_payments_for_user(db, user.id, page=page)
     return [
         PaymentItem(
@@ -190,7 +180,7 @@ def admin_refund_process(refund_id: int, gateway_refund_id: str, admin: User = D
 
 # 66: Payment analytics
 @router.get("/payments/analytics", response_model=AnalyticsResponse)
-def admin_analytics(frm: Optional[str] = None, to: Optional[str] = None, admin: User = Depends(require_admin), db: Session = Depends(get_session)):
+def admin_analytics(frm: Optional[str] = None, to: Optional[str] = None, admin: User = Depends(require_admin), db: Session = Depends(get_read_session)):
     since = datetime.fromisoformat(frm) if frm else None
     until = datetime.fromisoformat(to) if to else None
     revenue, txns = get_analytics(db, since, until)
@@ -198,7 +188,7 @@ def admin_analytics(frm: Optional[str] = None, to: Optional[str] = None, admin:
 
 # 67: Failed payments
 @router.get("/payments/failed")
-def admin_failed(admin: User = Depends(require_admin), db: Session = Depends(get_session)):
+def admin_failed(admin: User = Depends(require_admin), db: Session = Depends(get_read_session)):
     orders = get_failed_payments_admin(db)
     return [{"order_id": o.id, "user_id": o.user_id, "amount": o.amount, "gateway": o.gateway, "status": o.status} for o in orders]
 
@@ -210,4 +200,7 @@ def retry(payment_id: int, user: User = Depends(require_auth), db: Session = Dep
         raise HTTPException(status_code=404, detail="Order not found")
     return RetryResponse(payment_url=url)
 
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+app.include_router(pool_router)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatsMiddleware)
\ No newline at end of file
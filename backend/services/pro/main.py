@@ -1,11 +1,14 @@
 from datetime import datetime
-from fastapi import FastAPI, Depends, HTTPException, Header
+from fastapi import FastAPI, Depends, HTTPException
 from fastapi.routing import APIRouter
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
-from common.db.mysql import get_session, Base, engine
-from common.security.jwt import decode_token
+from common.db.mysql import get_session, ReadYourWritesMiddleware
+from common.db.telemetry import pool_router
+from common.db.bootstrap import db_lifespan
+from common.db.instrumentation import QueryStatsMiddleware
+from common.security.users import require_user
 
 from services.auth.models import User
 from .models import PlanningSession
@@ -16,24 +19,11 @@ from .schemas import (
     PlanningSessionsResponse,
 )
 
-app = FastAPI(title="Pro Service", version="1.0.0")
+app = FastAPI(title="Pro Service", version="1.0.0", lifespan=db_lifespan)
 router = APIRouter(prefix="/api/v1")
 
-Base.metadata.create_all(bind=engine)
 
-
-def require_auth(authorization: str = Header(None), db: Session = Depends(get_session)) -> User:
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    token = authorization.split(" ", 1)[1]
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user_id = payload.get("sub")
-    user = db.get(User, user_id)
-    if not user or not user.active:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return user
+require_auth = require_user
 
 
 @app.get("/health")
@@ -108,4 +98,7 @@ def delete_session(session_id: int, user: User = Depends(require_auth), db: Sess
     db.commit()
     return {"deleted": True}
 
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+app.include_router(pool_router)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatsMiddleware)
\ No newline at end of file
@@ -1,17 +1,21 @@
-from fastapi import FastAPI, APIRouter, Header, HTTPException
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException
 from fastapi.responses import StreamingResponse
 from typing import List
 from datetime import datetime
 import io
 
-from common.security.jwt import decode_token
+from common.security.jwt import TokenError
+from common.security.principal import resolve_claims
 
 from .schemas import (
     GenerateReportRequest, GenerateReportResponse,
     ReportItem, ReportDetailResponse,
     ShareReportRequest, ShareReportResponse,
+    SharedListResponse,
     TemplatesResponse,
     PreviewReportRequest, PreviewReportResponse,
+    DuplicateReportResponse,
+    EmailReportRequest, EmailReportResponse,
     ReportStatisticsResponse,
     BulkDeleteRequest, BulkDeleteResponse,
 )
@@ -20,12 +24,13 @@ app = FastAPI(title="Report Service", version="1.0.0")
 router = APIRouter(prefix="/api/v1")
 
 
-def require_auth(authorization: str = Header(None)):
+def require_auth(authorization: str = Header(None), x_internal_principal: str = Header(None)):
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Unauthorized")
     token = authorization.split(" ", 1)[1]
-    payload = decode_token(token)
-    if not payload:
+    try:
+        payload = resolve_claims(token, x_internal_principal)
+    except TokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
     return payload
 
@@ -42,20 +47,25 @@ def health():
 
 # 80: Generate report
 @router.post("/reports/generate", response_model=GenerateReportResponse)
-def generate_report(req: GenerateReportRequest, user= require_auth):
+def generate_report(req: GenerateReportRequest, user=Depends(require_auth)):
     rid = f"RPT-{int(datetime.utcnow().timestamp())}"
     url = f"https://cdn.salahkaarpro.com/reports/{rid}.pdf"
     return GenerateReportResponse(report_id=rid, pdf_url=url)
 
 # 81: My reports
 @router.get("/reports/my-reports", response_model=List[ReportItem])
-def my_reports(page: int = 1, limit: int = 20, user= require_auth):
+def my_reports(page: int = 1, limit: int = 20, user=Depends(require_auth)):
     # Stub: return empty list
     return []
 
+# 88: Statistics (registered before /reports/{report_id}, which would otherwise match it)
+@router.get("/reports/statistics", response_model=ReportStatisticsResponse)
+def stats(user=Depends(require_auth)):
+    return ReportStatisticsResponse(total_reports=0, reports_generated_today=0, reports_remaining=0)
+
 # 82: Report detail
 @router.get("/reports/{report_id}", response_model=ReportDetailResponse)
-def report_detail(report_id: str, user= require_auth):
+def report_detail(report_id: str, user=Depends(require_auth)):
     return ReportDetailResponse(
         report_id=report_id,
         report_type="financial_plan",
@@ -66,7 +76,7 @@ def report_detail(report_id: str, user= require_auth):
 
 # 83: Download report
 @router.get("/reports/{report_id}/download")
-def download_report(report_id: str, user= require_auth):
+def download_report(report_id: str, user=Depends(require_auth)):
     # Stub pdf content
     buf = io.BytesIO()
     buf.write(b"%PDF-1.4\n% Demo PDF for report \n")
@@ -75,58 +85,53 @@ def download_report(report_id: str, user= require_auth):
 
 # 84: Delete report
 @router.delete("/reports/{report_id}")
-def delete_report(report_id: str, user= require_auth):
+def delete_report(report_id: str, user=Depends(require_auth)):
     return {"deleted": True, "report_id": report_id}
 
 # 85: Share report
 @router.post("/reports/{report_id}/share", response_model=ShareReportResponse)
-def share_report(report_id: str, payload: ShareReportRequest, user= require_auth):
+def share_report(report_id: str, payload: ShareReportRequest, user=Depends(require_auth)):
     return ShareReportResponse(shared=True, recipients=payload.emails)
 
 # NEW: Revoke share
 @router.delete("/reports/{report_id}/share")
-def revoke_share(report_id: str, user= require_auth):
+def revoke_share(report_id: str, user=Depends(require_auth)):
     return {"revoked": True, "report_id": report_id}
 
 # NEW: List shared recipients
 @router.get("/reports/{report_id}/shared", response_model=SharedListResponse)
-def list_shared(report_id: str, user= require_auth):
+def list_shared(report_id: str, user=Depends(require_auth)):
     # Stub: return empty list since no persistence
     return SharedListResponse(recipients=[])
 
 # 86: Templates (admin)
 @router.get("/reports/templates", response_model=TemplatesResponse)
-def list_templates(user= require_auth):
+def list_templates(user=Depends(require_auth)):
     require_admin(user)
     return TemplatesResponse(templates=["financial_plan", "insurance_needs", "retirement_plan"])
 
 # 87: Preview report
 @router.post("/reports/preview", response_model=PreviewReportResponse)
-def preview_report(req: PreviewReportRequest, user= require_auth):
+def preview_report(req: PreviewReportRequest, user=Depends(require_auth)):
     charts = {"growth": [100, 120, 140, 165, 190]}
     return PreviewReportResponse(summary=f"Preview of {req.report_type}", charts_data=charts)
 
 # NEW: Duplicate report
 @router.post("/reports/{report_id}/duplicate", response_model=DuplicateReportResponse)
-def duplicate_report(report_id: str, user= require_auth):
+def duplicate_report(report_id: str, user=Depends(require_auth)):
     new_id = f"RPT-{int(datetime.utcnow().timestamp())}-copy"
     url = f"https://cdn.salahkaarpro.com/reports/{new_id}.pdf"
     return DuplicateReportResponse(report_id=new_id, pdf_url=url)
 
 # NEW: Email report
 @router.post("/reports/{report_id}/email", response_model=EmailReportResponse)
-def email_report(report_id: str, req: EmailReportRequest, user= require_auth):
+def email_report(report_id: str, req: EmailReportRequest, user=Depends(require_auth)):
     # Stub email sending
     return EmailReportResponse(sent=True, recipients=req.emails)
 
-# 88: Statistics
-@router.get("/reports/statistics", response_model=ReportStatisticsResponse)
-def stats(user= require_auth):
-    return ReportStatisticsResponse(total_reports=0, reports_generated_today=0, reports_remaining=0)
-
 # 89: Bulk delete (admin)
 @router.post("/reports/bulk-delete", response_model=BulkDeleteResponse)
-def bulk_delete(req: BulkDeleteRequest, user= require_auth):
+def bulk_delete(req: BulkDeleteRequest, user=Depends(require_auth)):
     require_admin(user)
     return BulkDeleteResponse(deleted_count=len(req.report_ids))
 
@@ -45,7 +45,7 @@ class PreviewReportResponse(BaseModel):
     summary: str
     charts_data: Dict[str, List[float]]
 
-// NEW: Duplicate report response
+# NEW: Duplicate report response
 class DuplicateReportResponse(BaseModel):
     report_id: str
     pdf_url: str
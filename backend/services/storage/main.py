@@ -1,13 +1,16 @@
 import os
-from fastapi import FastAPI, Depends, HTTPException, Header, UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File
 from fastapi.routing import APIRouter
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import select, desc
 from datetime import datetime, timedelta
 
-from common.db.mysql import get_session, Base, engine
-from common.security.jwt import decode_token
+from common.db.mysql import get_session, ReadYourWritesMiddleware
+from common.db.telemetry import pool_router
+from common.db.bootstrap import db_lifespan
+from common.db.instrumentation import QueryStatsMiddleware
+from common.security.users import require_user
 
 from services.auth.models import User
 from .models import StorageFile
@@ -20,29 +23,16 @@ from .schemas import (
     FilesResponse,
 )
 
-app = FastAPI(title="Storage Service", version="1.0.0")
+app = FastAPI(title="Storage Service", version="1.0.0", lifespan=db_lifespan)
 router = APIRouter(prefix="/api/v1")
 
-Base.metadata.create_all(bind=engine)
-
 # Reuse existing storage root used by user uploads
 BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 STORAGE_ROOT = os.path.join(BACKEND_ROOT, "storage")
 os.makedirs(STORAGE_ROOT, exist_ok=True)
 
 
-def require_auth(authorization: str = Header(None), db: Session = Depends(get_session)) -> User:
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    token = authorization.split(" ", 1)[1]
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user_id = payload.get("sub")
-    user = db.get(User, user_id)
-    if not user or not user.active:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return user
+require_auth = require_user
 
 
 def require_admin(user: User = Depends(require_auth)) -> User:
@@ -202,4 +192,7 @@ def rename(file_id: int, new_name: str, user: User = Depends(require_auth), db:
     db.commit()
     return {"renamed": True, "filename": rec.filename}
 
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+app.include_router(pool_router)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatsMiddleware)
\ No newline at end of file
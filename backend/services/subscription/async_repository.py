@@ -0,0 +1,54 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+
+from services.auth.models import User
+from .models import Subscription
+from .repository import TIER_LIMITS
+
+# Async counterparts of the read-mostly paths in repository.py
+
+
+async def get_or_create_subscription(db: AsyncSession, user_id: int) -> Subscription:
+    stmt = select(Subscription).where(Subscription.user_id == user_id)
+    sub = (await db.scalars(stmt)).first()
+    if sub:
+        # reset monthly period if needed
+        now = datetime.utcnow()
+        month_start = sub.month_start or now
+        if month_start.month != now.month or month_start.year != now.year:
+            sub.month_start = now
+            sub.reports_used = 0
+            await db.commit()
+        return sub
+    user = await db.get(User, user_id)
+    sub = Subscription(user_id=user_id, tier=user.tier or "free")
+    db.add(sub)
+    await db.commit()
+    await db.refresh(sub)
+    return sub
+
+
+def limits_for(sub: Subscription) -> tuple[int, int, int]:
+    limit = TIER_LIMITS.get(sub.tier, 3)
+    used = sub.reports_used or 0
+    remaining = max(0, limit - used)
+    return limit, used, remaining
+
+
+async def get_limits(db: AsyncSession, user_id: int) -> tuple[int, int, int]:
+    sub = await get_or_create_subscription(db, user_id)
+    return limits_for(sub)
+
+
+async def consume_report_count(db: AsyncSession, user_id: int) -> int:
+    """Deduct one report from user's monthly allowance if available.
+    Returns remaining reports after deduction.
+    """
+    sub = await get_or_create_subscription(db, user_id)
+    _, _, remaining = limits_for(sub)
+    if remaining <= 0:
+        return 0
+    sub.reports_used = (sub.reports_used or 0) + 1
+    await db.commit()
+    return limits_for(sub)[2]
@@ -1,9 +1,13 @@
-from fastapi import FastAPI, Depends, HTTPException, Header
+from fastapi import FastAPI, Depends, HTTPException
 from fastapi.routing import APIRouter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from common.db.mysql import get_session, Base, engine
-from common.security.jwt import decode_token
+from common.db.mysql import get_session, get_async_session, ReadYourWritesMiddleware
+from common.db.telemetry import pool_router
+from common.db.bootstrap import db_lifespan
+from common.db.instrumentation import QueryStatsMiddleware
+from common.security.users import require_user, require_user_async
 
 from services.auth.models import User
 from typing import List, Optional
@@ -33,27 +37,17 @@ from .repository import (
     admin_get_subscription,
     admin_update_subscription,
     TIER_LIMITS,
-    consume_report_count,
 )
+from . import async_repository as async_repo
 
-app = FastAPI(title="Subscription Service", version="1.0.0")
+app = FastAPI(title="Subscription Service", version="1.0.0", lifespan=db_lifespan)
 router = APIRouter(prefix="/api/v1")
 
-Base.metadata.create_all(bind=engine)
 
+require_auth = require_user
 
-def require_auth(authorization: str = Header(None), db: Session = Depends(get_session)) -> User:
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    token = authorization.split(" ", 1)[1]
-    payload = decode_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user_id = payload.get("sub")
-    user = db.get(User, user_id)
-    if not user or not user.active:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return user
+
+require_auth_async = require_user_async
 
 
 def require_admin(user: User = Depends(require_auth)) -> User:
@@ -67,9 +61,9 @@ async def health():
     return {"status": "ok", "service": "subscription"}
 
 @router.get("/subscription/status", response_model=SubscriptionStatusResponse)
-def status(user: User = Depends(require_auth), db: Session = Depends(get_session)):
-    sub = get_or_create_subscription(db, user.id)
-    monthly_limit, used, remaining = get_limits(db, user.id)
+async def status(user: User = Depends(require_auth_async), db: AsyncSession = Depends(get_async_session)):
+    sub = await async_repo.get_or_create_subscription(db, user.id)
+    monthly_limit, used, remaining = async_repo.limits_for(sub)
     return SubscriptionStatusResponse(
         tier=sub.tier,
         renewal_enabled=sub.renewal_enabled,
@@ -116,9 +110,9 @@ def set_renewal_endpoint(req: RenewalUpdateRequest, user: User = Depends(require
     )
 
 @router.get("/subscription/report-limits", response_model=ReportLimitsResponse)
-def report_limits(user: User = Depends(require_auth), db: Session = Depends(get_session)):
-    monthly_limit, used, remaining = get_limits(db, user.id)
-    sub = get_or_create_subscription(db, user.id)
+async def report_limits(user: User = Depends(require_auth_async), db: AsyncSession = Depends(get_async_session)):
+    sub = await async_repo.get_or_create_subscription(db, user.id)
+    monthly_limit, used, remaining = async_repo.limits_for(sub)
     return ReportLimitsResponse(tier=sub.tier, monthly_limit=monthly_limit, reports_used=used, reports_remaining=remaining)
 
 # Admin endpoints
@@ -175,9 +169,9 @@ def tier_detail(tier_id: str):
     return TierDetailResponse(tier_name=tier_id, price=info["price"], features=info["features"])
 
 @router.get("/subscriptions/my-subscription", response_model=SubscriptionStatusResponse)
-def my_subscription(user: User = Depends(require_auth), db: Session = Depends(get_session)):
-    sub = get_or_create_subscription(db, user.id)
-    monthly_limit, used, remaining = get_limits(db, user.id)
+async def my_subscription(user: User = Depends(require_auth_async), db: AsyncSession = Depends(get_async_session)):
+    sub = await async_repo.get_or_create_subscription(db, user.id)
+    monthly_limit, used, remaining = async_repo.limits_for(sub)
     return SubscriptionStatusResponse(
         tier=sub.tier,
         renewal_enabled=sub.renewal_enabled,
@@ -194,9 +188,9 @@ def trial_activate(user: User = Depends(require_auth), db: Session = Depends(get
     return TrialStartResponse(trial_active=sub.trial_active(), trial_expires_at=sub.trial_expires_at)
 
 @router.get("/subscriptions/trial/status", response_model=TrialStatusResponse)
-def trial_status(user: User = Depends(require_auth), db: Session = Depends(get_session)):
-    sub = get_or_create_subscription(db, user.id)
-    _, used, _ = get_limits(db, user.id)
+async def trial_status(user: User = Depends(require_auth_async), db: AsyncSession = Depends(get_async_session)):
+    sub = await async_repo.get_or_create_subscription(db, user.id)
+    _, used, _ = async_repo.limits_for(sub)
     return TrialStatusResponse(status=sub.trial_active(), reports_used=used, expires_at=sub.trial_expires_at)
 
 @router.post("/subscriptions/subscribe", response_model=SubscribeResponse)
@@ -270,13 +264,13 @@ def available_forms(user: User = Depends(require_auth)):
     return AvailableFormsResponse(available_forms=[])
 
 @router.post("/subscriptions/reports/check-limit", response_model=CheckLimitResponse)
-def reports_check_limit(user: User = Depends(require_auth), db: Session = Depends(get_session)):
-    limit, used, remaining = get_limits(db, user.id)
+async def reports_check_limit(user: User = Depends(require_auth_async), db: AsyncSession = Depends(get_async_session)):
+    limit, used, remaining = await async_repo.get_limits(db, user.id)
     return CheckLimitResponse(can_generate=remaining > 0, remaining=remaining)
 
 @router.post("/subscriptions/reports/deduct", response_model=DeductResponse)
-def reports_deduct(user: User = Depends(require_auth), db: Session = Depends(get_session)):
-    remaining = consume_report_count(db, user.id)
+async def reports_deduct(user: User = Depends(require_auth_async), db: AsyncSession = Depends(get_async_session)):
+    remaining = await async_repo.consume_report_count(db, user.id)
     return DeductResponse(remaining_reports=remaining)
 
 @router.post("/subscriptions/{user_id}/extend")
@@ -308,4 +302,7 @@ def admin_change_tier(user_id: int, req: AdminTierUpdateRequest, admin: User = D
 def subs_analytics(frm: Optional[str] = None, to: Optional[str] = None, admin: User = Depends(require_admin)):
     # Placeholder data
     return AnalyticsAdminResponse(stats={"signups": 0, "upgrades": 0})
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+app.include_router(pool_router)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatsMiddleware)
\ No newline at end of file
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import select, update
 from datetime import datetime, timedelta
 
+from common.security.users import invalidate_user
 from services.auth.models import User
 from .models import Subscription
 
@@ -42,6 +43,7 @@ def change_tier(db: Session, user_id: int, new_tier: str) -> Subscription:
     if user:
         user.tier = new_tier
     db.commit()
+    invalidate_user(user_id)
     db.refresh(sub)
     return sub
 
@@ -89,6 +91,8 @@ def admin_update_subscription(db: Session, user_id: int, tier: str | None, renew
     if renewal_enabled is not None:
         sub.renewal_enabled = renewal_enabled
     db.commit()
+    if tier:
+        invalidate_user(user_id)
     db.refresh(sub)
     return sub
 
@@ -1,11 +1,14 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Header
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File
 from fastapi.routing import APIRouter
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import datetime
 
-from common.db.mysql import get_session, Base, engine
-from common.security.jwt import decode_token, TokenError
+from common.db.mysql import get_session, get_read_session, ReadYourWritesMiddleware
+from common.db.telemetry import pool_router
+from common.db.bootstrap import db_lifespan
+from common.db.instrumentation import QueryStatsMiddleware
+from common.security.users import require_user
 from common.i18n import t, get_locale
 
 from services.auth.models import User
@@ -40,32 +43,12 @@ from .repository import (
     set_user_active,
 )
 
-app = FastAPI(title="User Service", version="1.0.0")
+app = FastAPI(title="User Service", version="1.0.0", lifespan=db_lifespan)
 router = APIRouter(prefix="/api/v1")
 
-# Ensure tables exist
-Base.metadata.create_all(bind=engine)
-
-
-def require_auth(authorization: str = Header(None), db: Session = Depends(get_session)) -> User:
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    token = authorization.split(" ", 1)[1]
-    try:
-        payload = decode_token(token)
-    except TokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user_id = payload.get("sub")
-    try:
-        user_id_int = int(user_id) if user_id is not None else None
-    except (TypeError, ValueError):
-        user_id_int = None
-    if user_id_int is None:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    user = db.get(User, user_id_int)
-    if not user or not user.active:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    return user
+
+
+require_auth = require_user
 
 
 def require_admin(user: User = Depends(require_auth)) -> User:
@@ -162,7 +145,7 @@ def update_requests(user: User = Depends(require_auth), db: Session = Depends(ge
     return [CriticalUpdateItem(id=i.id, field_name=i.field_name, new_value=i.new_value, reason=i.reason, status=i.status, created_at=i.created_at) for i in items]
 
 @router.get("/users/activity-log", response_model=List[ActivityItem])
-def activity_log(page: int = 1, limit: int = 20, user: User = Depends(require_auth), db: Session = Depends(get_session)):
+def activity_log(page: int = 1, limit: int = 20, user: User = Depends(require_auth), db: Session = Depends(get_read_session)):
     items = list_activity(db, user.id, page, limit)
     return [ActivityItem(id=i.id, action=i.action, meta=i.meta, created_at=i.created_at) for i in items]
 
@@ -171,7 +154,7 @@ def dashboard_stats_alias(user: User = Depends(require_auth)):
     return DashboardStatsResponse(reports_generated=0, reports_remaining=0, subscription_tier=user.tier)
 
 @router.get("/users/search", response_model=List[UserSearchItem])
-def users_search_admin(q: str, page: int = 1, limit: int = 20, admin: User = Depends(require_admin), db: Session = Depends(get_session)):
+def users_search_admin(q: str, page: int = 1, limit: int = 20, admin: User = Depends(require_admin), db: Session = Depends(get_read_session)):
     users = admin_search_users(db, q, page, limit)
     return [UserSearchItem(id=u.id, name=u.name, email=u.email, mobile=u.mobile, active=u.active, verified=u.verified) for u in users]
 
@@ -210,7 +193,7 @@ def users_deactivate_admin(user_id: int, admin: User = Depends(require_admin), d
 
 # 27: Admin search users
 @router.get("/admin/users/search", response_model=List[UserSearchItem])
-def admin_search(q: str, page: int = 1, limit: int = 20, admin: User = Depends(require_admin), db: Session = Depends(get_session)):
+def admin_search(q: str, page: int = 1, limit: int = 20, admin: User = Depends(require_admin), db: Session = Depends(get_read_session)):
     users = admin_search_users(db, q, page, limit)
     return [UserSearchItem(id=u.id, name=u.name, email=u.email, mobile=u.mobile, active=u.active, verified=u.verified) for u in users]
 
@@ -264,4 +247,7 @@ def lock_profile(user: User = Depends(require_auth), db: Session = Depends(get_s
     log_action(db, user.id, "lock_profile", {"locked_at": locked_at.isoformat()})
     return ProfileLockResponse(locked=ok, locked_at=locked_at)
 
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+app.include_router(pool_router)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatsMiddleware)
\ No newline at end of file
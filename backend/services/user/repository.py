@@ -5,6 +5,7 @@ import json
 import os
 from typing import Optional
 
+from common.security.users import invalidate_user
 from services.auth.models import User
 from .models import ProfileImage, ProfileUpdateRequest, ActivityLog
 
@@ -56,6 +57,7 @@ def update_allowed_fields(db: Session, user_id: int, mobile: Optional[str], emai
         user.email = email
         user.verified = False  # re-verify after email change
     db.commit()
+    invalidate_user(user_id)
     db.refresh(user)
     return user
 
@@ -71,6 +73,7 @@ def lock_profile_fields(db: Session, user_id: int) -> tuple[bool, datetime]:
     locked_at = datetime.utcnow()
     db.execute(update(User).where(User.id == user_id).values(locked_fields_after=locked_at))
     db.commit()
+    invalidate_user(user_id)
     return True, locked_at
 
 def create_critical_update(db: Session, user_id: int, field_name: str, new_value: str, reason: Optional[str]) -> ProfileUpdateRequest:
@@ -110,6 +113,7 @@ def admin_update_user(db: Session, user_id: int, data: dict) -> Optional[User]:
         if hasattr(user, k) and k not in {"id", "password_hash"}:
             setattr(user, k, v)
     db.commit()
+    invalidate_user(user_id)
     db.refresh(user)
     return user
 
@@ -119,5 +123,6 @@ def set_user_active(db: Session, user_id: int, active: bool) -> Optional[User]:
         return None
     user.active = active
     db.commit()
+    invalidate_user(user_id)
     db.refresh(user)
     return user
\ No newline at end of file
@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from services.auth import async_repository as auth_repo
+from services.auth.models import User
+from services.subscription import async_repository as subscription_repo
+from services.subscription.models import Subscription
+
+
+async def sessionmaker_for(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/app.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync: (User.__table__.create(sync), Subscription.__table__.create(sync)))
+    maker = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with maker() as db:
+        db.add(User(id=5, name="Ada", email="ada@example.com", password_hash="-", tier="free"))
+        await db.commit()
+    return engine, maker
+
+
+def test_report_allowance_is_created_and_consumed(tmp_path):
+    async def scenario():
+        engine, maker = await sessionmaker_for(tmp_path)
+        async with maker() as db:
+            assert await subscription_repo.get_limits(db, 5) == (3, 0, 3)
+            remaining = [await subscription_repo.consume_report_count(db, 5) for _ in range(4)]
+        async with maker() as db:
+            limits = await subscription_repo.get_limits(db, 5)
+        await engine.dispose()
+        return remaining, limits
+
+    remaining, limits = asyncio.run(scenario())
+    assert remaining == [2, 1, 0, 0]
+    assert limits == (3, 3, 0)
+
+
+def test_allowance_resets_in_a_new_month(tmp_path):
+    async def scenario():
+        engine, maker = await sessionmaker_for(tmp_path)
+        async with maker() as db:
+            db.add(Subscription(user_id=5, tier="starter", reports_used=20, month_start=datetime.utcnow() - timedelta(days=40)))
+            await db.commit()
+            limits = await subscription_repo.get_limits(db, 5)
+        await engine.dispose()
+        return limits
+
+    assert asyncio.run(scenario()) == (20, 0, 20)
+
+
+def test_user_lookups(tmp_path):
+    async def scenario():
+        engine, maker = await sessionmaker_for(tmp_path)
+        async with maker() as db:
+            found = await auth_repo.get_user_by_email(db, "ada@example.com")
+            missing = await auth_repo.get_user_by_email(db, "nobody@example.com")
+            by_id = await auth_repo.get_user_by_id(db, 5)
+        await engine.dispose()
+        return found, missing, by_id
+
+    found, missing, by_id = asyncio.run(scenario())
+    assert found.id == 5 and missing is None and by_id.email == "ada@example.com"
@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from common.db.mysql import Base
+from services.auth import bulk
+from services.auth.models import EmailVerification, User
+
+
+async def arrive(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def parsed(chunks, is_csv: bool):
+    return [(row, req.email if req else rejected["status"]) async for row, req, rejected in bulk.parse_rows(chunks, is_csv)]
+
+
+def test_rows_are_parsed_across_chunk_boundaries():
+    ndjson = arrive(b'{"name": "A", "email": "a@example.com", "pass', b'word": "x"}\n\n{"name": "B"', b', "email": "b@example.com", "password": "y"}')
+    assert asyncio.run(parsed(ndjson, False)) == [(1, "a@example.com"), (2, "b@example.com")]
+
+    upload = arrive(b"\xef\xbb\xbfname,email,password,organization\n", b'"Doe, J",j@example.com,x,"Line one\nline', b' two"\nbroken\n')
+    assert asyncio.run(parsed(upload, True)) == [(1, "j@example.com"), (2, "invalid")]
+
+
+@pytest.fixture
+def auth_db(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/auth.db")
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[User.__table__, EmailVerification.__table__])
+            await conn.execute(insert(User), [{"name": "Old", "email": "old@example.com", "password_hash": "h", "mobile": "555"}])
+
+    class Hasher:
+        async def hash_many(self, passwords):
+            return [f"hashed:{p}" for p in passwords]
+
+    asyncio.run(create())
+    monkeypatch.setattr(bulk, "AsyncSessionLocal", async_sessionmaker(bind=engine, expire_on_commit=False))
+    monkeypatch.setattr(bulk, "hasher", Hasher())
+    monkeypatch.setattr(bulk.email_index, "add", lambda email: None)
+    yield
+    asyncio.run(engine.dispose())
+
+
+def test_only_email_conflicts_are_reported_as_existing(auth_db):
+    rows = [
+        {"name": "Old", "email": "old@example.com", "password": "x"},
+        {"name": "New", "email": "new@example.com", "password": "x", "mobile": "555"},
+        {"name": "Other", "email": "other@example.com", "password": "x"},
+    ]
+    upload = arrive(*(json.dumps(r).encode() + b"\n" for r in rows))
+
+    async def run():
+        return [json.loads(out) async for out in bulk.bulk_register(upload, False)]
+
+    results = asyncio.run(run())
+    assert [r.get("status") for r in results[:3]] == ["exists", "invalid", "created"]
+    assert results[1]["detail"] == "mobile: already registered"
+    assert results[3] == {"summary": {"created": 1, "exists": 1, "invalid": 1}}
+
+
+def test_upload_is_read_by_the_streamed_response():
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        async def lines():
+            async for record in bulk.records(request.stream(), False):
+                yield record.upper().encode()
+
+        return bulk.UploadStreamingResponse(lines(), media_type="text/plain")
+
+    resp = TestClient(app).post("/echo", content=b"one\ntwo\n")
+    assert resp.text == "ONE\nTWO\n"
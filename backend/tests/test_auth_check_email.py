@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert, update
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+from services.auth import email_index as email_index_module
+from services.auth.email_index import EmailIndex
+from services.auth.main import client_ip
+from services.auth.models import User
+
+
+def request_from(peer: str, forwarded: str | None = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "client": (peer, 1234)})
+
+
+def test_forwarded_for_only_trusted_from_the_gateway():
+    assert client_ip(request_from("127.0.0.1", "198.51.100.1, 203.0.113.5")) == "203.0.113.5"
+    # A caller reaching the service directly cannot pick its own rate-limit key
+    assert client_ip(request_from("203.0.113.9", "198.51.100.1")) == "203.0.113.9"
+    assert client_ip(request_from("203.0.113.9")) == "203.0.113.9"
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/users.db")
+    User.__table__.create(engine)
+    maker = sessionmaker(bind=engine)
+    monkeypatch.setattr(email_index_module, "SessionLocal", maker)
+    return maker
+
+
+def add_user(db, email: str, updated_at: datetime | None = None):
+    with db() as session:
+        session.execute(insert(User).values(name="U", email=email, password_hash="-", updated_at=updated_at or datetime.utcnow()))
+        session.commit()
+
+
+def test_email_changes_reach_the_index_without_a_rebuild(db):
+    add_user(db, "first@example.com", updated_at=datetime.utcnow() - timedelta(hours=2))
+    index = EmailIndex(interval=0, rebuild_every=3600)
+    index.sync()
+    assert "first@example.com" in index.filter
+
+    with db() as session:
+        session.execute(update(User).where(User.email == "first@example.com").values(email="Renamed@Example.com"))
+        session.commit()
+    # Committed late with an earlier timestamp than the cursor
+    add_user(db, "late@example.com", updated_at=index.cursor - timedelta(seconds=10))
+    built_at = index.built_at
+    index.sync()
+    assert index.built_at == built_at
+    assert "renamed@example.com" in index.filter
+    assert "late@example.com" in index.filter
+
+
+def test_registration_during_a_rebuild_is_not_reported_free(db):
+    index = EmailIndex(interval=0, rebuild_every=0)
+    index.sync()
+    index.add("new@example.com")
+    # The rebuild read the table before the registration committed
+    index.sync()
+    assert "new@example.com" not in index.filter
+    assert asyncio.run(index.exists(None, "New@Example.com"))
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from api_gateway.dashboard import LATEST_NOTIFICATIONS, SOURCES, summarize_notifications
+from common.db.mysql import get_read_session
+from common.security import principal
+from common.security.jwt import create_access_token
+from common.security.revocation import RevocationList
+from services.notification.models import Notification
+
+
+def test_reports_source_reaches_the_statistics_route(monkeypatch):
+    from services.report.main import app
+
+    monkeypatch.setattr(principal, "revocations", RevocationList(None))
+    token = create_access_token({"sub": "7"})
+    resp = TestClient(app).get(f"/{SOURCES['reports'].path}", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    assert set(resp.json()) == {"total_reports", "reports_generated_today", "reports_remaining"}
+
+
+def test_notifications_source_counts_unread_without_listing_them(tmp_path):
+    from services.notification.main import app, require_auth
+
+    engine = create_engine(f"sqlite:///{tmp_path}/notifications.db")
+    Notification.__table__.create(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Notification), [
+            {"user_id": 7, "type": "email", "subject": f"n{i}", "read": i < 3, "created_at": now - timedelta(minutes=i)}
+            for i in range(12)
+        ] + [{"user_id": 8, "type": "email", "subject": "other", "read": False, "created_at": now}])
+    factory = sessionmaker(bind=engine)
+
+    def session():
+        with factory() as db:
+            yield db
+
+    app.dependency_overrides[require_auth] = lambda: SimpleNamespace(id=7)
+    app.dependency_overrides[get_read_session] = session
+    try:
+        resp = TestClient(app).get(f"/{SOURCES['notifications'].path}")
+    finally:
+        app.dependency_overrides.clear()
+    assert resp.status_code == 200
+    summary = summarize_notifications(resp.json())
+    assert summary["unread"] == 9
+    assert [n["subject"] for n in summary["latest"]] == [f"n{i}" for i in range(LATEST_NOTIFICATIONS)]
@@ -0,0 +1,26 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from common.db import telemetry
+from common.db.telemetry import InstrumentedQueuePool, pool_stats, register_engine
+
+
+def test_pool_checkouts_timeouts_and_invalidations_are_counted(tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetry, "ENGINES", {})
+    engine = create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    register_engine("primary", engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        stats = pool_stats()["primary"]
+        assert (stats["checked_out"], stats["checkouts"], stats["timeouts"]) == (1, 1, 1)
+        assert stats["wait_ms_max"] >= 40
+        conn.invalidate()
+
+    engine.dispose()
+    stats = pool_stats()["primary"]
+    # Counters survive the pool being recreated by dispose()
+    assert (stats["checkouts"], stats["timeouts"], stats["invalidations"]) == (1, 1, 1)
+    assert (stats["checked_out"], stats["waiting"]) == (0, 0)
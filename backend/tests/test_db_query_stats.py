@@ -0,0 +1,51 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from common.db import instrumentation
+from common.db.instrumentation import QueryStatsMiddleware
+
+
+def app_running(engine, queries: int, **options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, **options)
+
+    @app.get("/rows")
+    def rows():
+        # A sync handler: runs in the threadpool but counts against the request
+        with engine.connect() as conn:
+            for i in range(queries):
+                conn.execute(text("select :i"), {"i": i})
+        return {}
+
+    return app
+
+
+def test_request_query_counts_and_n_plus_one(tmp_path, caplog):
+    engine = create_engine(f"sqlite:///{tmp_path}/q.db")
+    client = TestClient(app_running(engine, 4, debug=True, n_plus_one=3))
+    with caplog.at_level(logging.INFO, logger=instrumentation.__name__):
+        response = client.get("/rows")
+    assert response.headers["x-db-queries"] == "4"
+    assert float(response.headers["x-db-time-ms"]) >= 0
+    assert 'desc="4 queries"' in response.headers["server-timing"]
+    assert any("Likely N+1 in GET /rows" in r.message and "4 times" in r.message for r in caplog.records)
+
+
+def test_quiet_without_debug_below_threshold(tmp_path, caplog):
+    engine = create_engine(f"sqlite:///{tmp_path}/q.db")
+    client = TestClient(app_running(engine, 2, debug=False, n_plus_one=3))
+    with caplog.at_level(logging.INFO, logger=instrumentation.__name__):
+        response = client.get("/rows")
+    assert "x-db-queries" not in response.headers
+    assert not [r for r in caplog.records if "N+1" in r.message]
+
+
+def test_slow_queries_are_logged(tmp_path, caplog, monkeypatch):
+    monkeypatch.setattr(instrumentation, "DB_SLOW_QUERY_MS", 0.000001)
+    engine = create_engine(f"sqlite:///{tmp_path}/q.db")
+    with caplog.at_level(logging.WARNING, logger=instrumentation.__name__), engine.connect() as conn:
+        conn.execute(text("select 42"))
+    assert any(r.message.startswith("Slow query") and "select 42" in r.message for r in caplog.records)
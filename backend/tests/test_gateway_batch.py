@@ -0,0 +1,37 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from api_gateway import main as gateway
+from api_gateway.ratelimit import TIER_LIMITS
+from api_gateway.upstreams import UpstreamRegistry
+from common.config import GATEWAY_BATCH_MAX_ITEMS
+
+
+async def echo_forwarded_for(scope, receive, send):
+    headers = dict(scope["headers"])
+    body = json.dumps({"forwarded_for": headers.get(b"x-forwarded-for", b"").decode()}).encode()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def test_batch_items_keep_caller_address_and_are_admitted_once(monkeypatch):
+    registry = UpstreamRegistry()
+    registry.mount("i18n", echo_forwarded_for)
+    monkeypatch.setattr(gateway, "upstreams", registry)
+    items = [
+        {"id": str(n), "path": "/api/v1/i18n/languages", "headers": {"x-gateway-client": "10.9.9.9"}}
+        for n in range(GATEWAY_BATCH_MAX_ITEMS)
+    ]
+    # A full batch plus the batch request itself exceeds the anonymous burst if items are charged
+    assert GATEWAY_BATCH_MAX_ITEMS + 1 > TIER_LIMITS["anonymous"][1]
+
+    with TestClient(gateway.app) as client:
+        allowed = gateway.rate_limiter.allowed
+        resp = client.post("/api/v1/batch", json={"requests": items})
+        assert resp.status_code == 200
+        assert gateway.rate_limiter.allowed == allowed + 1
+
+    for item in resp.json()["responses"]:
+        assert item["status"] == 200
+        assert item["body"] == {"forwarded_for": "testclient"}
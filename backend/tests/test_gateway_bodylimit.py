@@ -0,0 +1,57 @@
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from api_gateway import main as gateway
+from api_gateway.bodylimit import BodyLimitMiddleware
+from api_gateway.upstreams import UpstreamRegistry
+from common.config import GATEWAY_MAX_BODY_BYTES
+
+CHUNK = b"x" * (1024 * 1024)
+
+
+def chunks(total: int):
+    for _ in range(total // len(CHUNK)):
+        yield CHUNK
+
+
+async def early_responder(scope, receive, send):
+    # Answers without reading the request body, like a service rejecting an upload up front
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_chunked_upload_over_limit_on_streamed_route(monkeypatch):
+    registry = UpstreamRegistry()
+    registry.mount("storage", early_responder)
+    monkeypatch.setattr(gateway, "upstreams", registry)
+    with TestClient(gateway.app) as client:
+        resp = client.post("/api/v1/storage/upload", content=chunks(GATEWAY_MAX_BODY_BYTES + 5 * len(CHUNK)))
+        assert resp.status_code == 413
+
+        resp = client.post("/api/v1/storage/upload", content=chunks(2 * len(CHUNK)))
+        assert resp.status_code == 200
+        assert resp.text == "ok"
+
+
+def test_upload_over_limit_from_streaming_response_is_refused():
+    async def streaming_app(scope, receive, send):
+        # StreamingResponse keeps calling receive() to watch for a disconnect
+        await StreamingResponse(iter([b"partial"]))(scope, receive, send)
+
+    client = TestClient(BodyLimitMiddleware(streaming_app, max_bytes=len(CHUNK)))
+    resp = client.post("/", content=chunks(4 * len(CHUNK)))
+    # Depending on which task runs first the limit is crossed before or after the headers go out
+    assert resp.status_code in (200, 413)
+
+
+def test_limit_crossed_after_response_started_ends_quietly():
+    async def echo_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        await send({"type": "http.response.body", "body": b"cut"})
+
+    client = TestClient(BodyLimitMiddleware(echo_app, max_bytes=len(CHUNK)))
+    resp = client.post("/", content=chunks(4 * len(CHUNK)))
+    assert resp.status_code == 200
+    assert resp.text == "cut"
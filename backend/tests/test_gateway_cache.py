@@ -0,0 +1,70 @@
+import asyncio
+
+import httpx
+
+from api_gateway import auth as gateway_auth, main as gateway
+from api_gateway.cache import ResponseCache
+from api_gateway.upstreams import UpstreamRegistry
+from common.security.jwt import create_access_token
+from common.security.revocation import RevocationList
+
+
+def serve(monkeypatch, name: str, cache_control: bytes | None = None):
+    """Mounts a service that answers with the caller's Authorization header and counts its calls."""
+    calls = []
+
+    async def service(scope, receive, send):
+        headers = dict(scope["headers"])
+        calls.append(headers.get(b"authorization"))
+        response_headers = [(b"content-type", b"application/json")]
+        if cache_control:
+            response_headers.append((b"cache-control", cache_control))
+        await send({"type": "http.response.start", "status": 200, "headers": response_headers})
+        await send({"type": "http.response.body", "body": b'"' + (headers.get(b"authorization") or b"") + b'"'})
+
+    registry = UpstreamRegistry()
+    registry.mount(name, service)
+    monkeypatch.setattr(gateway, "upstreams", registry)
+    monkeypatch.setattr(gateway, "response_cache", ResponseCache(enabled=True))
+    monkeypatch.setattr(gateway_auth, "revocations", RevocationList(None))
+    return calls
+
+
+def get_all(paths_and_headers):
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=gateway.app), base_url="http://gateway") as client:
+            return [await client.get(path, headers=headers) for path, headers in paths_and_headers]
+
+    return asyncio.run(scenario())
+
+
+def bearer(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def test_shared_route_misses_then_hits_and_answers_304(monkeypatch):
+    calls = serve(monkeypatch, "subscription")
+    first, second = get_all([("/api/v1/subscriptions/tiers", {}), ("/api/v1/subscription/tiers", {})])
+    assert first.headers["x-cache"] == "MISS" and second.headers["x-cache"] == "MISS"
+    third, = get_all([("/api/v1/subscription/tiers", {"If-None-Match": second.headers["etag"]})])
+    assert third.status_code == 304 and third.headers["x-cache"] == "HIT"
+    assert len(calls) == 2
+
+
+def test_per_user_route_is_keyed_by_caller(monkeypatch):
+    calls = serve(monkeypatch, "form")
+    alice, bob = bearer(1), bearer(2)
+    responses = get_all([("/api/v1/forms/templates", alice), ("/api/v1/forms/templates", bob), ("/api/v1/forms/templates", alice)])
+    assert [r.headers["x-cache"] for r in responses] == ["MISS", "MISS", "HIT"]
+    assert responses[2].content == responses[0].content != responses[1].content
+    assert responses[0].headers["cache-control"].startswith("private")
+    assert len(calls) == 2
+    assert get_all([("/api/v1/forms/templates", {})])[0].headers.get("x-cache") is None
+
+
+def test_no_store_and_private_responses_are_not_cached(monkeypatch):
+    for directive in (b"no-store", b"private, max-age=60"):
+        calls = serve(monkeypatch, "i18n", cache_control=directive)
+        responses = get_all([("/api/v1/i18n/languages", {}), ("/api/v1/i18n/languages", {})])
+        assert all("x-cache" not in r.headers for r in responses)
+        assert len(calls) == 2
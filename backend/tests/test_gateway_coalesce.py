@@ -0,0 +1,61 @@
+import asyncio
+
+import httpx
+from fastapi import Request
+
+from api_gateway import auth as gateway_auth, main as gateway
+from api_gateway.coalesce import SingleFlight
+from api_gateway.upstreams import UpstreamRegistry
+from common.security.jwt import create_access_token
+from common.security.revocation import RevocationList
+
+
+def request(path: str, headers: dict | None = None) -> Request:
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": raw})
+
+
+def test_per_user_paths_only_collapse_the_same_caller():
+    flight = SingleFlight()
+    path = "/api/v1/notifications/my-notifications"
+    alice = flight.key_for(request(path, {"Authorization": "Bearer alice"}))
+    assert alice == flight.key_for(request(path, {"Authorization": "Bearer alice"}))
+    assert alice != flight.key_for(request(path, {"Authorization": "Bearer bob"}))
+    assert flight.key_for(request(path)) is None
+
+
+def test_client_that_just_wrote_is_not_coalesced():
+    flight = SingleFlight()
+    path = "/api/v1/i18n/languages"
+    assert flight.key_for(request(path)) is not None
+    assert flight.key_for(request(path, {"Cookie": "db_primary_until=1700000000"})) is None
+
+
+def test_concurrent_gets_share_one_call_without_the_leaders_cookies(monkeypatch):
+    calls = []
+
+    async def service(scope, receive, send):
+        calls.append(scope["path"])
+        # Holds the first call open until the second request has joined it
+        while gateway.inflight.collapsed == 0:
+            await asyncio.sleep(0.01)
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"), (b"set-cookie", b"session=leader")]})
+        await send({"type": "http.response.body", "body": b"[]"})
+
+    registry = UpstreamRegistry()
+    registry.mount("notification", service)
+    monkeypatch.setattr(gateway, "upstreams", registry)
+    monkeypatch.setattr(gateway, "inflight", SingleFlight())
+    monkeypatch.setattr(gateway_auth, "revocations", RevocationList(None))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '7'})}"}
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=gateway.app), base_url="http://gateway") as client:
+            get = lambda: client.get("/api/v1/notifications/my-notifications", headers=headers)
+            return await asyncio.wait_for(asyncio.gather(get(), get()), timeout=5)
+
+    responses = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [r.status_code for r in responses] == [200, 200]
+    assert all("set-cookie" not in r.headers for r in responses)
@@ -0,0 +1,86 @@
+import asyncio
+import gzip
+
+import pytest
+from starlette.responses import Response
+
+from api_gateway import compression
+from api_gateway.compression import CompressionMiddleware, CompressionStats, negotiate
+
+BODY = b'{"rows": "' + b"x" * 4000 + b'"}'
+
+
+def test_negotiation_prefers_brotli_and_honours_q_values(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert negotiate("gzip, deflate, br") == "br"
+    assert negotiate("br;q=0.5, gzip") == "gzip"
+    assert negotiate("*") == "br"
+    assert negotiate("gzip;q=0, *;q=0") is None
+    assert negotiate("identity") is None
+    assert negotiate(None) is None
+
+
+def test_without_brotli_only_gzip_is_offered(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert negotiate("br") is None
+    assert negotiate("br, gzip;q=0.1") == "gzip"
+
+
+def run(app, accept_encoding: str | None, minimum_size: int = 1024):
+    stats = CompressionStats()
+    middleware = CompressionMiddleware(app, stats, minimum_size=minimum_size, enabled=True)
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/report", "headers": headers}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    start = messages[0]
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return {k.decode(): v.decode() for k, v in start["headers"]}, body, stats
+
+
+def test_gzip_response_carries_vary_and_a_weak_etag():
+    app = Response(BODY, media_type="application/json", headers={"ETag": '"abc"'})
+    headers, body, stats = run(app, "gzip")
+    assert headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in headers["vary"].lower()
+    assert headers["etag"] == 'W/"abc"'
+    assert "content-length" not in headers
+    assert gzip.decompress(body) == BODY
+    assert stats.snapshot()["routes"]
+
+
+def test_brotli_round_trip():
+    brotli = pytest.importorskip("brotli")
+    headers, body, _ = run(Response(BODY, media_type="application/json"), "br")
+    assert headers["content-encoding"] == "br"
+    assert brotli.decompress(body) == BODY
+
+
+def test_small_incompressible_and_unrequested_bodies_pass_through():
+    for app, accept in (
+        (Response(b"{}", media_type="application/json"), "gzip"),
+        (Response(BODY, media_type="image/png"), "gzip"),
+        (Response(BODY, media_type="application/json"), None),
+    ):
+        headers, body, _ = run(app, accept)
+        assert "content-encoding" not in headers
+        assert body == app.body
+
+
+def test_streamed_body_is_compressed_chunk_by_chunk():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        for _ in range(3):
+            await send({"type": "http.response.body", "body": b"y" * 2000, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    headers, body, _ = run(app, "gzip")
+    assert headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body) == b"y" * 6000
@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+
+from api_gateway import main as gateway
+from api_gateway.upstreams import UpstreamRegistry
+
+
+def mount(monkeypatch, name: str, app):
+    registry = UpstreamRegistry()
+    registry.mount(name, app)
+    monkeypatch.setattr(gateway, "upstreams", registry)
+
+
+async def call_gateway(method: str, path: str, receive, send):
+    # TestClient reads the whole request body up front, so the gateway is driven at the ASGI level
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"gateway"), (b"transfer-encoding", b"chunked")],
+        "client": ("198.51.100.7", 1234), "server": ("gateway", 80),
+    }
+    await asyncio.wait_for(gateway.app(scope, receive, send), timeout=5)
+
+
+def test_mounted_service_response_streams_through(monkeypatch):
+    async def scenario():
+        first_chunk_sent = asyncio.Event()
+        received = []
+
+        async def slow_service(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": b"first", "more_body": True})
+            # Only finishes once the client has the first chunk: a buffered hop never gets here
+            await first_chunk_sent.wait()
+            await send({"type": "http.response.body", "body": b"rest"})
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                received.append(message["body"])
+                first_chunk_sent.set()
+
+        mount(monkeypatch, "storage", slow_service)
+        await call_gateway("GET", "/api/v1/storage/files/1", receive, send)
+        return received
+
+    assert b"".join(asyncio.run(scenario())) == b"firstrest"
+
+
+def test_mounted_service_reads_upload_as_it_arrives(monkeypatch):
+    async def scenario():
+        chunks = [b"one", b"two", b"three"]
+        service_read = asyncio.Event()
+        seen = {}
+        sent = []
+
+        async def upload_service(scope, receive, send):
+            body = b""
+            while True:
+                message = await receive()
+                body += message["body"]
+                service_read.set()
+                if not message.get("more_body"):
+                    break
+            seen.update(path=scope["path"], body=body)
+            await send({"type": "http.response.start", "status": 201, "headers": [(b"set-cookie", b"a=1"), (b"set-cookie", b"b=2")]})
+            await send({"type": "http.response.body", "body": b"stored"})
+
+        async def receive():
+            # Each chunk is only sent once the service has read the previous one
+            if not chunks:
+                return {"type": "http.disconnect"}
+            if len(chunks) < 3:
+                await service_read.wait()
+                service_read.clear()
+            chunk = chunks.pop(0)
+            return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+        async def send(message):
+            sent.append(message)
+
+        mount(monkeypatch, "storage", upload_service)
+        await call_gateway("POST", "/api/v1/storage/upload", receive, send)
+        return seen, sent
+
+    seen, sent = asyncio.run(scenario())
+    assert seen == {"path": "/api/v1/upload", "body": b"onetwothree"}
+    assert sent[0]["status"] == 201
+    assert [v for k, v in sent[0]["headers"] if k == b"set-cookie"] == [b"a=1", b"b=2"]
+    assert sent[1]["body"] == b"stored"
+
+
+def test_proxied_body_is_passed_through_unchanged(monkeypatch):
+    csv = b"name,amount\nAda,1\n"
+
+    def forms_service(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=csv, headers={"content-type": "text/csv", "etag": '"v1"', "set-cookie": "s=1"})
+
+    registry = UpstreamRegistry()
+    registry.transports["form"] = httpx.MockTransport(forms_service)
+    monkeypatch.setattr(gateway, "upstreams", registry)
+    resp = TestClient(gateway.app).get("/api/v1/forms/export")
+    assert resp.status_code == 200
+    assert resp.content == csv
+    assert resp.headers["content-type"] == "text/csv"
+    assert resp.headers["etag"] == '"v1"'
+    assert resp.headers["set-cookie"] == "s=1"
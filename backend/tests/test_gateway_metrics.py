@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+
+from api_gateway import main as gateway
+from api_gateway.metrics import Histogram, MetricsRegistry, route_key
+
+
+def test_route_labels_collapse_resource_ids():
+    assert route_key("/api/v1/forms/submissions/65f1c2a9e4b0a1b2c3d4e5f6") == "/api/v1/forms/submissions/:id"
+    assert route_key("/api/v1/users/42/profile") == "/api/v1/users/:id/profile"
+    assert route_key("/api/v1/i18n/languages") == "/api/v1/i18n/languages"
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    registry.histogram("demo_seconds", "Demo.")
+    for value in (0.003, 0.003, 2.0):
+        registry.observe("demo_seconds", value, route="/x")
+    text = registry.render()
+    assert 'demo_seconds_bucket{route="/x",le="0.005"} 2' in text
+    assert 'demo_seconds_bucket{route="/x",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{route="/x"} 3' in text
+    assert Histogram().counts == [0] * 14
+
+
+def test_responses_carry_server_timing_and_show_up_on_metrics():
+    client = TestClient(gateway.app)
+    response = client.get("/health")
+    assert response.headers["server-timing"].startswith("gw;dur=")
+    scrape = client.get("/metrics")
+    assert "server-timing" not in scrape.headers
+    assert 'gateway_request_duration_seconds_count{route="/health",method="GET",status="2xx"}' in scrape.text
+    assert "gateway_cache_requests_total" in scrape.text
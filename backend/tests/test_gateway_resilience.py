@@ -0,0 +1,84 @@
+import asyncio
+
+import httpx
+import pytest
+
+from api_gateway.resilience import Bulkhead, CircuitBreaker, UpstreamUnavailable
+from api_gateway.upstreams import Upstream
+
+
+def upstream(handler, base_url: str = "http://svc") -> tuple[Upstream, list]:
+    hosts = []
+
+    def record(request: httpx.Request):
+        hosts.append(request.url.host)
+        return handler(request)
+
+    return Upstream("svc", base_url, httpx.MockTransport(record)), hosts
+
+
+def call(target: Upstream) -> httpx.Response:
+    return asyncio.run(target.call(lambda base: target.client.get(f"{base}/ping")))
+
+
+def test_breaker_trips_then_recovers_through_one_probe():
+    status = {"code": 503}
+    target, hosts = upstream(lambda request: httpx.Response(status["code"]))
+    target.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        assert call(target).status_code == 503
+    assert target.breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(UpstreamUnavailable) as rejected:
+        call(target)
+    assert len(hosts) == 2
+    assert rejected.value.retry_after > 1
+
+    # Once the reset timeout has passed, one probe goes through and closes the breaker
+    target.breaker.opened_at -= 60
+    status["code"] = 200
+    assert call(target).status_code == 200
+    assert target.breaker.state == CircuitBreaker.CLOSED and len(hosts) == 3
+
+
+def test_failed_probe_reopens_and_only_one_probe_is_let_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.on_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.on_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_failing_instance_is_ejected():
+    def handler(request: httpx.Request):
+        if request.url.host == "bad":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200)
+
+    target, hosts = upstream(handler, "http://bad,http://good")
+    target.breaker = CircuitBreaker(failure_threshold=100)
+    target.pool.eject_failures = 2
+    for _ in range(4):
+        try:
+            call(target)
+        except httpx.ConnectError:
+            pass
+    assert hosts == ["bad", "good", "bad", "good"]
+    hosts.clear()
+    for _ in range(3):
+        call(target)
+    assert hosts == ["good", "good", "good"]
+
+
+def test_bulkhead_fails_fast_when_full():
+    async def scenario():
+        bulkhead = Bulkhead(limit=1, wait=0.01)
+        await bulkhead.acquire()
+        with pytest.raises(UpstreamUnavailable):
+            await bulkhead.acquire()
+        bulkhead.release()
+        await bulkhead.acquire()
+        return bulkhead.rejected
+
+    assert asyncio.run(scenario()) == 1
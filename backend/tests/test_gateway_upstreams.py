@@ -0,0 +1,26 @@
+import asyncio
+
+from api_gateway.upstreams import UpstreamRegistry, build_client
+
+
+def test_one_long_lived_client_per_upstream_url():
+    async def scenario():
+        registry = UpstreamRegistry({"user": "http://users:8000", "admin": "http://users:8000", "form": "http://forms:8000"})
+        await registry.start()
+        first = registry.client_for("http://users:8000")
+        assert registry.client_for("http://users:8000") is first
+        assert registry.client_for("http://forms:8000") is not first
+        # A base URL outside the table is registered on first use and then reused
+        extra = registry.client_for("http://extra:8000")
+        assert registry.client_for("http://extra:8000") is extra
+        clients = [first, registry.client_for("http://forms:8000"), extra]
+        await registry.close()
+        return clients
+
+    assert all(client.is_closed for client in asyncio.run(scenario()))
+
+
+def test_clients_use_per_upstream_timeouts(monkeypatch):
+    monkeypatch.setattr("api_gateway.upstreams.upstream_timeout", lambda name: 90.0 if name == "report" else 10.0)
+    assert build_client("report").timeout.read == 90.0
+    assert build_client("user").timeout.read == 10.0
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+from passlib.hash import pbkdf2_sha256
+
+from common.config import PASSWORD_HASH_ROUNDS
+from services.auth import async_repository
+from services.auth.hashing import HashingOverloaded, PasswordHasher
+from services.auth.models import User
+
+
+def rounds(password_hash: str) -> int:
+    return int(password_hash.split("$")[2])
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_login_rehashes_an_outdated_hash(monkeypatch, workers):
+    hasher = PasswordHasher(workers=workers, max_wait=60)
+    monkeypatch.setattr(async_repository, "hasher", hasher)
+    old_hash = pbkdf2_sha256.using(rounds=1000).hash("s3cret")
+    user = User(id=1, email="ada@example.com", password_hash=old_hash)
+    try:
+        assert not asyncio.run(async_repository.verify_and_rehash(user, "wrong"))
+        assert user.password_hash == old_hash
+        assert asyncio.run(async_repository.verify_and_rehash(user, "s3cret"))
+        assert rounds(user.password_hash) == PASSWORD_HASH_ROUNDS
+        assert pbkdf2_sha256.verify("s3cret", user.password_hash)
+        # A current hash is left alone
+        current = user.password_hash
+        assert asyncio.run(async_repository.verify_and_rehash(user, "s3cret"))
+        assert user.password_hash == current
+    finally:
+        hasher.shutdown()
+
+
+def test_backlog_beyond_max_wait_is_refused():
+    hasher = PasswordHasher(workers=1, max_wait=0.1)
+    hasher.cost = 0.05
+    hasher.pending = 5
+    with pytest.raises(HashingOverloaded) as refused:
+        asyncio.run(hasher.hash("pw"))
+    assert refused.value.retry_after == pytest.approx(0.25)
+    assert hasher.stats()["rejected"] == 1
+    hasher.shutdown()
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from api_gateway import auth as gateway_auth
+from api_gateway.auth import PrincipalResolver
+from common.security import principal
+from common.security.jwt import TokenError, create_access_token, decode_token
+from common.security.principal import resolve_claims, sign_principal
+from common.security.revocation import RevocationList
+
+
+@pytest.fixture(autouse=True)
+def no_revocations(monkeypatch):
+    monkeypatch.setattr(principal, "revocations", RevocationList(None))
+    monkeypatch.setattr(gateway_auth, "revocations", RevocationList(None))
+
+
+def header_for(token: str, **claims) -> str:
+    data = decode_token(token)
+    return sign_principal(dict({"sub": data["sub"], "role": "advisor"}, **claims), token, 300, data["exp"])
+
+
+def test_header_is_used_with_its_own_token():
+    token = create_access_token({"sub": "1"})
+    assert resolve_claims(token, header_for(token, role="admin"))["role"] == "admin"
+
+
+def test_header_replayed_with_another_token_is_ignored():
+    admin = create_access_token({"sub": "1"})
+    other = create_access_token({"sub": "2", "role": "advisor"})
+    claims = resolve_claims(other, header_for(admin, role="admin"))
+    assert (claims["sub"], claims["role"]) == ("2", "advisor")
+    with pytest.raises(TokenError):
+        resolve_claims("not-a-jwt", header_for(admin, role="admin"))
+
+
+def test_header_never_outlives_the_token():
+    token = create_access_token({"sub": "1"})
+    stale = sign_principal({"sub": "1", "role": "admin"}, token, 300, time.time() - 1)
+    assert principal.verify_principal(stale, token) is None
+
+
+def test_gateway_header_is_bound_to_the_token():
+    token = create_access_token({"sub": "3", "role": "advisor"})
+    resolved = PrincipalResolver().resolve(f"Bearer {token}")
+    assert principal.verify_principal(resolved.header, token)["sub"] == "3"
+    assert principal.verify_principal(resolved.header, create_access_token({"sub": "3"})) is None
+    assert decode_token(token)["exp"] >= principal.verify_principal(resolved.header, token)["exp"]
@@ -0,0 +1,74 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from starlette.requests import Request
+
+from api_gateway.ratelimit import RateLimiter, TIER_LIMITS
+from common.ratelimit import BucketStore, MemoryBucketStore, SqliteBucketStore, load_bucket_store
+
+
+def anonymous_request(host: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/api/v1/forms/templates", "headers": [], "client": (host, 1234)})
+
+
+async def admitted(limiter: RateLimiter, request: Request, attempts: int) -> int:
+    return sum([await limiter.check(request, None) is None for _ in range(attempts)])
+
+
+def test_two_limiters_share_one_budget(tmp_path, monkeypatch):
+    # Next to no refill, so the counts are exact
+    monkeypatch.setitem(TIER_LIMITS, "anonymous", (0.001, 20))
+    path = str(tmp_path / "buckets.sqlite3")
+    first = RateLimiter(store=load_bucket_store(f"sqlite:{path}"), enabled=True)
+    second = RateLimiter(store=load_bucket_store(f"sqlite:{path}"), enabled=True)
+    burst = int(TIER_LIMITS["anonymous"][1])
+    request = anonymous_request("198.51.100.1")
+
+    async def scenario():
+        return (
+            await admitted(first, request, burst // 2),
+            await admitted(second, request, burst),
+            await admitted(first, anonymous_request("198.51.100.2"), 1),
+        )
+
+    from_first, from_second, other_ip = asyncio.run(scenario())
+    assert from_first == burst // 2
+    assert from_second == burst - burst // 2
+    assert other_ip == 1
+
+
+def test_memory_limiters_do_not_share():
+    first, second = RateLimiter(store=MemoryBucketStore(), enabled=True), RateLimiter(store=MemoryBucketStore(), enabled=True)
+    burst = int(TIER_LIMITS["anonymous"][1])
+    request = anonymous_request("198.51.100.3")
+
+    async def scenario():
+        return await admitted(first, request, burst) + await admitted(second, request, burst)
+
+    assert asyncio.run(scenario()) == 2 * burst
+
+
+def take_many(path: str, attempts: int) -> int:
+    store = SqliteBucketStore(path)
+
+    async def run():
+        return sum([(await store.take("user:1", 0.001, 50))[0] for _ in range(attempts)])
+
+    return asyncio.run(run())
+
+
+def test_processes_share_one_budget(tmp_path):
+    path = str(tmp_path / "buckets.sqlite3")
+    with ProcessPoolExecutor(max_workers=3, mp_context=multiprocessing.get_context("spawn")) as pool:
+        allowed = sum(pool.map(take_many, [path] * 3, [40] * 3))
+    assert allowed == 50
+
+
+def test_incomplete_store_fails_when_created():
+    class NoTake(BucketStore):
+        pass
+
+    with pytest.raises(TypeError):
+        NoTake()
@@ -0,0 +1,96 @@
+import asyncio
+from itertools import cycle
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from common.cache import TTLCache
+from common.db import mysql
+from common.db.mysql import READ_STICKY_COOKIE, ReadYourWritesMiddleware, get_async_session, get_read_session, get_session
+
+metadata = MetaData()
+notes = Table("notes", metadata, Column("id", Integer, primary_key=True), Column("text", String(50)))
+
+
+@pytest.fixture
+def engines(tmp_path, monkeypatch):
+    """A primary and a replica that never catches up: anything read from the replica is stale."""
+    primary = create_engine(f"sqlite:///{tmp_path}/primary.db")
+    replica = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    for e in (primary, replica):
+        metadata.create_all(e)
+    async_primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/primary.db")
+    monkeypatch.setattr(mysql, "engine", primary)
+    monkeypatch.setattr(mysql, "replica_engines", [replica])
+    monkeypatch.setattr(mysql, "_next_replica", cycle([replica]))
+    monkeypatch.setattr(mysql, "SessionLocal", sessionmaker(bind=primary, autoflush=False))
+    monkeypatch.setattr(mysql, "_async_engine", async_primary)
+    monkeypatch.setattr(mysql, "_async_sessionmaker", async_sessionmaker(bind=async_primary, expire_on_commit=False))
+    monkeypatch.setattr(mysql, "_recent_writers", TTLCache(maxsize=100, ttl=5))
+    yield primary, replica
+    asyncio.run(async_primary.dispose())
+
+
+def notes_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/notes")
+    def add(text: str, db: Session = Depends(get_session)):
+        db.execute(insert(notes).values(text=text))
+        db.commit()
+        return {"ok": True}
+
+    @app.post("/async-notes")
+    async def add_async(text: str, db: AsyncSession = Depends(get_async_session)):
+        await db.execute(insert(notes).values(text=text))
+        await db.commit()
+        return {"ok": True}
+
+    @app.get("/notes")
+    def read(db: Session = Depends(get_read_session)):
+        return [row.text for row in db.execute(select(notes.c.text))]
+
+    app.add_middleware(ReadYourWritesMiddleware)
+    return app
+
+
+def test_reads_go_to_the_replica(engines):
+    primary, replica = engines
+    with replica.begin() as conn:
+        conn.execute(insert(notes).values(text="replicated"))
+    client = TestClient(notes_app())
+    assert client.get("/notes").json() == ["replicated"]
+    assert READ_STICKY_COOKIE not in client.get("/notes").cookies
+
+
+@pytest.mark.parametrize("path", ["/notes", "/async-notes"])
+def test_writer_reads_own_write_on_any_worker(engines, path):
+    app = notes_app()
+    writer = TestClient(app)
+    resp = writer.post(path, params={"text": "mine"})
+    assert READ_STICKY_COOKIE in resp.cookies
+
+    # Another worker: nothing remembered in-process, only the cookie carries over
+    mysql._recent_writers.clear()
+    assert writer.get("/notes").json() == ["mine"]
+    # Other clients still read from the lagging replica
+    assert TestClient(app).get("/notes").json() == []
+
+
+def test_forged_far_future_marker_is_ignored(engines):
+    client = TestClient(notes_app())
+    client.cookies.set(READ_STICKY_COOKIE, "9999999999")
+    with engines[0].begin() as conn:
+        conn.execute(insert(notes).values(text="primary only"))
+    assert client.get("/notes").json() == []
+
+
+def test_admin_user_search_reads_from_replicas():
+    from services.user.main import app
+
+    route = next(r for r in app.routes if getattr(r, "path", None) == "/api/v1/admin/users/search")
+    assert get_read_session in [d.call for d in route.dependant.dependencies]
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from hashlib import sha256
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from common.config import REFRESH_TOKENS_PER_USER
+from services.auth import repository, sweeper
+from services.auth.models import RefreshToken, RevokedAccessToken, User
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/auth.db")
+    for model in (User, RefreshToken, RevokedAccessToken):
+        model.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User).values(id=1, name="Ada", email="ada@example.com", password_hash="-"))
+    return sessionmaker(bind=engine)
+
+
+def test_only_the_hash_is_stored(db):
+    with db() as session:
+        rt = repository.create_refresh_token(session, 1)
+        stored = session.scalar(select(RefreshToken.token_hash))
+        assert stored == sha256(rt.token.encode()).hexdigest()
+        assert rt.token not in stored
+        assert repository.get_valid_refresh_token(session, rt.token).id == rt.id
+        assert repository.get_valid_refresh_token(session, stored) is None
+
+
+def test_tokens_beyond_the_per_user_cap_are_revoked(db):
+    with db() as session:
+        tokens = [repository.create_refresh_token(session, 1).token for _ in range(REFRESH_TOKENS_PER_USER + 2)]
+        assert repository.get_valid_refresh_token(session, tokens[0]) is None
+        assert repository.get_valid_refresh_token(session, tokens[1]) is None
+        assert all(repository.get_valid_refresh_token(session, t) for t in tokens[2:])
+        live = session.scalar(select(func.count()).select_from(RefreshToken).where(RefreshToken.revoked == False))
+        assert live == REFRESH_TOKENS_PER_USER
+
+
+def test_sweep_deletes_expired_and_revoked_rows_in_batches(db, monkeypatch):
+    past, future = datetime.utcnow() - timedelta(days=1), datetime.utcnow() + timedelta(days=1)
+    with db() as session:
+        kept = repository.create_refresh_token(session, 1).id
+        repository.create_refresh_token(session, 1)
+        # Logout revokes, which also expires the token
+        for token in session.scalars(select(RefreshToken).where(RefreshToken.id != kept)):
+            token.revoked, token.expires_at = True, past
+        session.add_all([RefreshToken(user_id=1, token_hash=f"{i:064x}", expires_at=past) for i in range(5)])
+        session.add_all([
+            RevokedAccessToken(jti="a" * 32, user_id=1, expires_at=past),
+            RevokedAccessToken(jti="b" * 32, user_id=1, expires_at=future),
+        ])
+        session.commit()
+
+    monkeypatch.setattr(sweeper, "SessionLocal", db)
+    assert sweeper.sweep_once(batch_size=2) == 7
+    with db() as session:
+        assert session.scalars(select(RefreshToken.id)).all() == [kept]
+        assert session.scalars(select(RevokedAccessToken.jti)).all() == ["b" * 32]
@@ -0,0 +1,92 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from common.db import mysql
+from common.security.revocation import MemoryRevocationFeed, RevocationFeed, RevocationList
+from services.auth.models import RevokedAccessToken
+from services.auth.revocation_feed import SqlRevocationFeed
+
+
+def revoked_row(session_factory, id: int, jti: str):
+    with session_factory() as db:
+        db.add(RevokedAccessToken(id=id, jti=jti, expires_at=datetime.utcnow() + timedelta(hours=1)))
+        db.commit()
+
+
+def idle_list(feed) -> RevocationList:
+    revocations = RevocationList(feed)
+    # Synced by hand below rather than by the background thread
+    revocations.start = lambda: None
+    return revocations
+
+
+def test_sql_feed_picks_up_rows_committed_out_of_order(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/auth.db")
+    RevokedAccessToken.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(mysql, "SessionLocal", factory)
+    revocations = idle_list(SqlRevocationFeed())
+
+    revoked_row(factory, 1, "a" * 32)
+    revocations.sync()
+    # Id 2 was allocated first but its transaction commits after id 3 has been synced
+    revoked_row(factory, 3, "c" * 32)
+    revocations.sync()
+    revoked_row(factory, 2, "b" * 32)
+    revocations.sync()
+
+    assert all(jti * 32 in revocations.filter for jti in "abc")
+    # Re-read rows are not returned again
+    assert revocations.feed.changes(revocations.cursor)[1] == []
+
+
+def test_filter_hit_is_confirmed_off_the_event_loop():
+    class SlowFeed(MemoryRevocationFeed):
+        def is_revoked(self, jti):
+            self.checked_on = threading.current_thread()
+            time.sleep(0.05)
+            return super().is_revoked(jti)
+
+    feed = SlowFeed()
+    feed.revoke("d" * 32, 1, time.time() + 3600)
+    revocations = idle_list(feed)
+    revocations.sync()
+
+    async def check():
+        return await revocations.is_revoked_async("d" * 32), threading.current_thread()
+
+    revoked, loop_thread = asyncio.run(check())
+    assert revoked
+    assert feed.checked_on is not loop_thread
+
+
+def feed_after(imports: str) -> str:
+    code = f"import {imports}; from common.security.revocation import revocations; print(type(revocations.feed).__name__)"
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip()
+
+
+def test_sql_feed_comes_with_the_auth_models():
+    # Services without the auth models rely on the gateway and never poll the table
+    assert feed_after("services.calculation.main, services.report.main") == "NoneType"
+    assert feed_after("services.auth.models") == "SqlRevocationFeed"
+    assert feed_after("api_gateway.main") == "SqlRevocationFeed"
+
+
+def test_incomplete_feed_fails_when_created():
+    class NoConfirmation(RevocationFeed):
+        def revoke(self, jti, user_id, expires_at):
+            pass
+
+        def changes(self, cursor):
+            return cursor, []
+
+    with pytest.raises(TypeError):
+        NoConfirmation()
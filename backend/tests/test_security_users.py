@@ -0,0 +1,115 @@
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, update
+from sqlalchemy.orm import sessionmaker
+
+from common.db import mysql
+from common.db.mysql import get_session
+from common.security import principal, users
+from common.security.jwt import create_access_token
+from common.security.revocation import RevocationList
+from services.auth.models import User
+
+
+def test_common_does_not_import_the_auth_service():
+    code = "import sys, common.security.users, common.security.revocation; print('services' in {m.split('.')[0] for m in sys.modules})"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "False"
+
+
+def test_require_user_loads_the_registered_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(principal, "revocations", RevocationList(None))
+    monkeypatch.setattr(users, "user_changes", users.UserChangeSync(interval=0))
+    engine = create_engine(f"sqlite:///{tmp_path}/users.db")
+    User.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": 41, "name": "Ada", "email": "ada@example.com", "password_hash": "h", "mfa_secret": "s", "active": True},
+            {"id": 42, "name": "Gone", "email": "gone@example.com", "password_hash": "h", "mfa_secret": None, "active": False},
+        ])
+    users._users.clear()
+
+    with sessionmaker(bind=engine)() as db:
+        user = users.require_user(f"Bearer {create_access_token({'sub': '41'})}", None, db)
+        assert (user.id, user.email) == (41, "ada@example.com")
+        assert not hasattr(user, "password_hash") and not hasattr(user, "mfa_secret")
+        with pytest.raises(HTTPException):
+            users.require_user(f"Bearer {create_access_token({'sub': '42'})}", None, db)
+
+
+def _users_db(tmp_path, rows):
+    engine = create_engine(f"sqlite:///{tmp_path}/users.db")
+    User.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), rows)
+    return engine
+
+
+def test_changes_made_by_another_process_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(principal, "revocations", RevocationList(None))
+    engine = _users_db(tmp_path, [
+        {"id": 41, "name": "Ada", "email": "ada@example.com", "password_hash": "h", "active": True,
+         "updated_at": datetime(2026, 1, 1)},
+    ])
+    maker = sessionmaker(bind=engine)
+    monkeypatch.setattr(mysql, "SessionLocal", maker)
+    sync = users.UserChangeSync(interval=0)
+    monkeypatch.setattr(users, "user_changes", sync)
+    users._users.clear()
+    token = f"Bearer {create_access_token({'sub': '41'})}"
+
+    with maker() as db:
+        sync.sync()
+        assert users.require_user(token, None, db).active
+        # Another process deactivates the user without touching this process's cache
+        with engine.begin() as conn:
+            conn.execute(update(User).where(User.id == 41).values(active=False, updated_at=datetime(2026, 1, 1, 0, 0, 1)))
+        assert users.require_user(token, None, db).active
+        sync.sync()
+        with pytest.raises(HTTPException):
+            users.require_user(token, None, db)
+
+
+def test_sync_keeps_entries_whose_row_did_not_change(tmp_path, monkeypatch):
+    engine = _users_db(tmp_path, [
+        {"id": 41, "name": "Ada", "email": "ada@example.com", "password_hash": "h", "active": True,
+         "updated_at": datetime(2026, 1, 1)},
+    ])
+    monkeypatch.setattr(mysql, "SessionLocal", sessionmaker(bind=engine))
+    sync = users.UserChangeSync(interval=0)
+    sync.sync()
+    users._users.set(41, users.UserSnapshot(id=41, active=True))
+    sync.sync()
+    assert users._users.get(41) is not None
+
+
+def test_gateway_admin_routes_check_the_role_on_the_user_record(tmp_path, monkeypatch):
+    from api_gateway import auth as gateway_auth, main as gateway
+
+    monkeypatch.setattr(gateway_auth, "revocations", RevocationList(None))
+    monkeypatch.setattr(users, "user_changes", users.UserChangeSync(interval=0))
+    engine = _users_db(tmp_path, [
+        {"id": 1, "name": "Root", "email": "root@example.com", "password_hash": "h", "role": "admin", "active": True},
+        {"id": 2, "name": "Demoted", "email": "was-admin@example.com", "password_hash": "h", "role": "advisor", "active": True},
+    ])
+    maker = sessionmaker(bind=engine)
+
+    def session():
+        with maker() as db:
+            yield db
+
+    gateway.app.dependency_overrides[get_session] = session
+    users._users.clear()
+    try:
+        client = TestClient(gateway.app)
+        for user_id, status in ((1, 200), (2, 403)):
+            token = create_access_token({"sub": str(user_id), "role": "admin"})
+            response = client.get("/api/v1/gateway/cache/stats", headers={"Authorization": f"Bearer {token}"})
+            assert response.status_code == status
+    finally:
+        gateway.app.dependency_overrides.clear()
@@ -0,0 +1,47 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from common.security import principal
+from common.security.jwt import create_access_token, decode_token
+from common.security.revocation import MemoryRevocationFeed, RevocationList
+
+TERM = {"age": 35, "annual_income": 1_000_000}
+
+
+@pytest.fixture
+def revocations(monkeypatch):
+    revocations = RevocationList(MemoryRevocationFeed())
+    revocations.start = lambda: None
+    monkeypatch.setattr(principal, "revocations", revocations)
+    return revocations
+
+
+@pytest.fixture
+def calculation():
+    from services.calculation.main import app
+
+    return TestClient(app)
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_calculation_requires_a_valid_token(revocations, calculation):
+    token = create_access_token({"sub": "1"})
+    assert calculation.post("/api/v1/calculate/term-insurance", json=TERM, headers=bearer(token)).status_code == 200
+    assert calculation.post("/api/v1/calculate/term-insurance", json=TERM).status_code == 401
+    assert calculation.post("/api/v1/calculate/term-insurance", json=TERM, headers=bearer("not-a-jwt")).status_code == 401
+
+
+def test_revoked_token_gets_401_not_500(revocations, calculation):
+    from services.i18n.main import app as i18n
+
+    token = create_access_token({"sub": "1", "role": "admin"})
+    revocations.revoke(decode_token(token)["jti"], 1, time.time() + 3600)
+    resp = calculation.post("/api/v1/calculate/term-insurance", json=TERM, headers=bearer(token))
+    assert resp.status_code == 401
+    resp = TestClient(i18n).delete("/api/v1/i18n/languages/fr", headers=bearer(token))
+    assert resp.status_code == 401